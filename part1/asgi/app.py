@@ -0,0 +1,44 @@
+import asyncio
+import logging
+
+from wsgi.app import app as flask_app
+
+from .server import ASGIServer
+from .wsgi_bridge import WSGIMiddleware
+
+# Flask-приложение работает в пуле потоков за тем же event loop
+wsgi_app = WSGIMiddleware(flask_app)
+
+
+async def app(scope, receive, send):
+    """Нативное ASGI-приложение: /async/* обрабатывает само, остальное отдаёт во Flask."""
+    if scope["type"] != "http":
+        return
+    if not scope["path"].startswith("/async/"):
+        await wsgi_app(scope, receive, send)
+        return
+
+    if scope["path"] == "/async/sleep":
+        # В отличие от time.sleep во Flask, не занимает ни поток, ни event loop
+        await asyncio.sleep(0.5)
+        status, body = 200, b"pong"
+    elif scope["path"] == "/async/ping":
+        status, body = 200, b"pong"
+    else:
+        status, body = 404, b"Not Found"
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    server = ASGIServer("0.0.0.0", 9999, app)
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    server.serve_forever()
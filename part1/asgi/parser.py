@@ -0,0 +1,183 @@
+from collections import deque
+from dataclasses import dataclass
+
+
+class ProtocolError(ValueError):
+    """Клиент прислал некорректный HTTP."""
+
+
+@dataclass
+class RequestHead:
+    method: str
+    target: str
+    http_version: str
+    # Имена заголовков приведены к нижнему регистру, как требует ASGI
+    headers: list[tuple[bytes, bytes]]
+    keep_alive: bool
+
+
+@dataclass
+class Body:
+    data: bytes
+
+
+class EndOfMessage:
+    pass
+
+
+END_OF_MESSAGE = EndOfMessage()
+
+Event = RequestHead | Body | EndOfMessage
+
+
+class HTTPParser:
+    """
+    Инкрементальный парсер HTTP/1.1 запросов без ввода-вывода.
+    Байты подаются через feed() по мере поступления из транспорта,
+    готовые события (RequestHead, Body, EndOfMessage) забираются через next_event().
+    Поддерживает тело по Content-Length и Transfer-Encoding: chunked, а также pipelining.
+    """
+
+    def __init__(self, max_head_size: int = 64 * 1024):
+        self.max_head_size = max_head_size
+        self.buffer = bytearray()
+        self.events: deque[Event] = deque()
+        self.state = self._parse_head
+        # Сколько байт тела (или текущего чанка) осталось прочитать
+        self.remaining = 0
+
+    def feed(self, data: bytes):
+        self.buffer += data
+        # Каждое состояние возвращает False, если ему не хватает данных
+        while self.state():
+            pass
+
+    def next_event(self) -> Event | None:
+        return self.events.popleft() if self.events else None
+
+    def peek_event(self) -> Event | None:
+        return self.events[0] if self.events else None
+
+    @property
+    def buffered(self) -> int:
+        return len(self.buffer)
+
+    def _parse_head(self) -> bool:
+        end = self.buffer.find(b"\r\n\r\n")
+        if end == -1:
+            if len(self.buffer) > self.max_head_size:
+                raise ProtocolError("Слишком большие заголовки")
+            return False
+
+        head = bytes(self.buffer[:end])
+        del self.buffer[: end + 4]
+        request_line, *header_lines = head.split(b"\r\n")
+
+        try:
+            method, target, version = request_line.decode("ascii").split()
+        except (UnicodeDecodeError, ValueError):
+            raise ProtocolError(f"Некорректная строка запроса: {request_line!r}")
+        if not version.startswith("HTTP/"):
+            raise ProtocolError(f"Неподдерживаемый протокол: {version!r}")
+        http_version = version[5:]
+
+        headers = []
+        content_length: int | None = None
+        chunked = False
+        connection = b""
+        for line in header_lines:
+            name, sep, value = line.partition(b":")
+            if not sep or not name or name != name.strip():
+                raise ProtocolError(f"Некорректный заголовок: {line!r}")
+            name = name.lower()
+            value = value.strip()
+            headers.append((name, value))
+
+            if name == b"content-length":
+                if not value.isdigit():
+                    raise ProtocolError("Некорректный Content-Length")
+                if content_length is not None and int(value) != content_length:
+                    # Какой из заголовков главный, клиент и прокси могут решить по-разному
+                    raise ProtocolError("Разные значения Content-Length")
+                content_length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = value.lower().endswith(b"chunked")
+                if not chunked:
+                    raise ProtocolError(f"Неподдерживаемый Transfer-Encoding: {value!r}")
+            elif name == b"connection":
+                connection = value.lower()
+
+        if chunked and content_length is not None:
+            # Длину тела два заголовка определяют по-разному: путь к request smuggling
+            raise ProtocolError("Transfer-Encoding вместе с Content-Length")
+
+        if http_version == "1.1":
+            keep_alive = b"close" not in connection
+        else:
+            keep_alive = b"keep-alive" in connection
+
+        self.events.append(RequestHead(method, target, http_version, headers, keep_alive))
+
+        if chunked:
+            self.state = self._parse_chunk_size
+        elif content_length:
+            self.remaining = content_length
+            self.state = self._parse_body
+        else:
+            self.events.append(END_OF_MESSAGE)
+        return True
+
+    def _parse_body(self) -> bool:
+        if not self.buffer:
+            return False
+        data = self._take(self.remaining)
+        self.events.append(Body(data))
+        if self.remaining == 0:
+            self.events.append(END_OF_MESSAGE)
+            self.state = self._parse_head
+        return True
+
+    def _parse_chunk_size(self) -> bool:
+        end = self.buffer.find(b"\r\n")
+        if end == -1:
+            return False
+        size_line = bytes(self.buffer[:end]).split(b";", 1)[0].strip()
+        del self.buffer[: end + 2]
+        # int() допускает знак, "0x" и "_" - для размера чанка разрешены только hex-цифры
+        if not size_line or size_line.strip(b"0123456789abcdefABCDEF"):
+            raise ProtocolError(f"Некорректный размер чанка: {size_line!r}")
+        self.remaining = int(size_line, 16)
+        self.state = self._parse_chunk_data if self.remaining else self._parse_trailers
+        return True
+
+    def _parse_chunk_data(self) -> bool:
+        if self.remaining:
+            if not self.buffer:
+                return False
+            self.events.append(Body(self._take(self.remaining)))
+            return True
+        # Чанк прочитан - за ним идёт \r\n
+        if len(self.buffer) < 2:
+            return False
+        if self.buffer[:2] != b"\r\n":
+            raise ProtocolError("Отсутствует CRLF после чанка")
+        del self.buffer[:2]
+        self.state = self._parse_chunk_size
+        return True
+
+    def _parse_trailers(self) -> bool:
+        # Trailer-заголовки пропускаем до пустой строки
+        end = self.buffer.find(b"\r\n")
+        if end == -1:
+            return False
+        del self.buffer[: end + 2]
+        if end == 0:
+            self.events.append(END_OF_MESSAGE)
+            self.state = self._parse_head
+        return True
+
+    def _take(self, size: int) -> bytes:
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        self.remaining -= len(data)
+        return data
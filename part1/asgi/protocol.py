@@ -0,0 +1,334 @@
+import asyncio
+import logging
+import traceback
+from collections import deque
+from collections.abc import Awaitable, Callable
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from .parser import Body, HTTPParser, ProtocolError, RequestHead
+
+ASGIApp = Callable[[dict, Callable, Callable], Awaitable[None]]
+
+# Сколько байт из сокета держим в буфере, прежде чем перестать читать (flow control)
+HIGH_WATER_MARK = 64 * 1024
+
+
+def reason_phrase(status: int) -> bytes:
+    """Причина для строки статуса; у нестандартного кода (299, 599) она пустая."""
+    try:
+        return HTTPStatus(status).phrase.encode()
+    except ValueError:
+        return b""
+
+
+class RequestCycle:
+    """Один запрос-ответ: реализует receive()/send() из спецификации ASGI."""
+
+    def __init__(self, protocol: "HTTPProtocol", head: RequestHead):
+        self.protocol = protocol
+        self.head = head
+        self.body: deque[bytes] = deque()
+        self.body_complete = False
+        self.body_delivered = False
+        # Будит receive(): пришло тело, ответ завершён или клиент отключился
+        self.body_event = asyncio.Event()
+
+        self.status = 0
+        self.headers: list[tuple[bytes, bytes]] | None = None
+        self.response_started = False
+        self.response_complete = False
+        self.chunked = False
+        self.is_head = head.method == "HEAD"
+
+    async def receive(self) -> dict:
+        # Тело уже отдано целиком - дальше остаётся только дождаться отключения
+        while self.body_delivered or (not self.body and not self.body_complete):
+            if self.response_complete or self.protocol.transport.is_closing():
+                return {"type": "http.disconnect"}
+            self.body_event.clear()
+            await self.body_event.wait()
+
+        body = b"".join(self.body)
+        self.body.clear()
+        self.body_delivered = self.body_complete
+        self.protocol.resume_reading()
+        return {"type": "http.request", "body": body, "more_body": not self.body_complete}
+
+    async def send(self, message: dict):
+        transport = self.protocol.transport
+        if transport.is_closing():
+            return
+
+        if message["type"] == "http.response.start":
+            if self.response_started:
+                raise RuntimeError("Ответ уже начат")
+            self.response_started = True
+            self.status = message["status"]
+            self.headers = [(bytes(k).lower(), bytes(v)) for k, v in message.get("headers", [])]
+
+        elif message["type"] == "http.response.body":
+            if not self.response_started or self.response_complete:
+                raise RuntimeError("http.response.body вне ответа")
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if self.headers is not None:
+                self._write_head(body, more_body)
+            if not self.is_head:
+                if self.chunked:
+                    if body:
+                        transport.write(b"%x\r\n%b\r\n" % (len(body), body))
+                    if not more_body:
+                        transport.write(b"0\r\n\r\n")
+                elif body:
+                    transport.write(body)
+
+            await self.protocol.drain()
+            if not more_body:
+                self.response_complete = True
+                self.body_event.set()
+                self.protocol.on_response_complete(self)
+
+    def _write_head(self, body: bytes, more_body: bool):
+        """Заголовки отправляем вместе с первым чанком тела - тогда известна длина ответа."""
+        headers = self.headers
+        self.headers = None
+        names = {name for name, _ in headers}
+        if b"content-length" not in names:
+            if more_body and self.head.http_version == "1.1":
+                # Длина неизвестна - стримим ответ чанками
+                self.chunked = True
+                headers.append((b"transfer-encoding", b"chunked"))
+            elif more_body:
+                # HTTP/1.0 не знает chunked: конец тела обозначаем закрытием соединения
+                self.protocol.keep_alive = False
+            else:
+                headers.append((b"content-length", str(len(body)).encode()))
+        if not self.protocol.keep_alive:
+            headers.append((b"connection", b"close"))
+
+        phrase = reason_phrase(self.status)
+        lines = [b"HTTP/1.1 %d %b" % (self.status, phrase)]
+        lines.extend(b"%b: %b" % header for header in headers)
+        self.protocol.transport.write(b"\r\n".join(lines) + b"\r\n\r\n")
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """
+    asyncio-протокол HTTP/1.1: асинхронный аналог WSGIHandler.
+    Данные приходят через data_received(), парсятся инкрементально,
+    и на каждый запрос запускается задача с ASGI-приложением.
+    Запросы одного соединения обрабатываются по очереди (keep-alive, pipelining).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_state: "ServerState",
+        idle_timeout: float = 5,
+    ):
+        self.app = app
+        self.server_state = server_state
+        self.idle_timeout = idle_timeout
+        self.parser = HTTPParser()
+        self.transport: asyncio.Transport | None = None
+        self.cycle: RequestCycle | None = None
+        self.keep_alive = True
+        self.idle_handle: asyncio.TimerHandle | None = None
+        # Код ответа на некорректные данные: его отправляют после ответов на запросы,
+        # разобранные до ошибки (None - ошибки не было)
+        self.error_status: int | None = None
+        self.reading_paused = False
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    # --- asyncio.Protocol ---
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+        self.server_state.connections.add(self)
+        self.client = transport.get_extra_info("peername")
+        self.server = transport.get_extra_info("sockname")
+        self._reset_idle_timer()
+
+    def connection_lost(self, exc):
+        self.server_state.connections.discard(self)
+        self._cancel_idle_timer()
+        self.writable.set()
+        if self.cycle:
+            self.cycle.body_event.set()
+
+    def data_received(self, data: bytes):
+        if self.error_status is not None:
+            return
+        self._cancel_idle_timer()
+        try:
+            self.parser.feed(data)
+        except ProtocolError as exc:
+            logging.debug(f"Python: некорректный запрос: {exc}")
+            # Pipelined-запросы перед ошибкой уже разобраны: они получат ответы, 400 - за ними
+            self.error_status = 400
+            self.pause_reading()
+        if self.parser.buffered > HIGH_WATER_MARK:
+            self.pause_reading()
+        self._process_events()
+        # Пока запроса нет, клиент дописывает заголовки: каждая порция данных продлевает таймаут,
+        # молчание дольше idle_timeout посреди заголовков - 408
+        if self.cycle is None and not self.transport.is_closing():
+            self._reset_idle_timer()
+
+    def pause_writing(self):
+        self.writable.clear()
+
+    def resume_writing(self):
+        self.writable.set()
+
+    # --- flow control ---
+
+    async def drain(self):
+        await self.writable.wait()
+
+    def pause_reading(self):
+        if not self.reading_paused:
+            self.reading_paused = True
+            self.transport.pause_reading()
+
+    def resume_reading(self):
+        if self.reading_paused and not self.transport.is_closing() and self.error_status is None:
+            self.reading_paused = False
+            self.transport.resume_reading()
+
+    # --- обработка запросов ---
+
+    def _process_events(self):
+        while (event := self.parser.peek_event()) is not None:
+            if isinstance(event, RequestHead):
+                if self.cycle is not None:
+                    # Pipelining: следующий запрос ждёт завершения текущего
+                    self.pause_reading()
+                    return
+                self.parser.next_event()
+                self._start_cycle(event)
+            elif self.cycle is None:
+                # Приложение ответило, не дочитав тело, - остаток тела отбрасываем
+                self.parser.next_event()
+            elif isinstance(event, Body):
+                self.parser.next_event()
+                self.cycle.body.append(event.data)
+                self.cycle.body_event.set()
+                if sum(map(len, self.cycle.body)) > HIGH_WATER_MARK:
+                    self.pause_reading()
+            else:
+                self.parser.next_event()
+                self.cycle.body_complete = True
+                self.cycle.body_event.set()
+        if self.error_status is not None:
+            self._fail_after_responses()
+
+    def _fail_after_responses(self):
+        """Все события до ошибки обработаны: отвечаем ошибкой, когда завершится текущий ответ."""
+        if self.cycle is None:
+            self._send_error(self.error_status)
+        elif not self.cycle.body_complete:
+            # Ошибка посреди тела текущего запроса - дочитать его уже нельзя
+            if self.cycle.response_started:
+                self.transport.close()
+            else:
+                self._send_error(self.error_status)
+
+    def _start_cycle(self, head: RequestHead):
+        self.keep_alive = head.keep_alive and not self.server_state.shutting_down
+        self.cycle = RequestCycle(self, head)
+        task = self.loop.create_task(self._run_app(self.cycle, self._build_scope(head)))
+        self.server_state.tasks.add(task)
+        task.add_done_callback(self.server_state.tasks.discard)
+
+    def _build_scope(self, head: RequestHead) -> dict:
+        path, _, query = head.target.partition("?")
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": head.http_version,
+            "method": head.method,
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": path.encode("ascii"),
+            "query_string": query.encode("ascii"),
+            "root_path": "",
+            "headers": head.headers,
+            "client": self.client,
+            "server": self.server,
+        }
+
+    async def _run_app(self, cycle: RequestCycle, scope: dict):
+        try:
+            await self.app(scope, cycle.receive, cycle.send)
+        except Exception:
+            logging.error(f"Python: ошибка ASGI-приложения при обработке запроса {self.client}")
+            traceback.print_exc()
+            if not cycle.response_started:
+                self._send_error(500)
+            else:
+                self.transport.close()
+            return
+
+        if not cycle.response_complete and not self.transport.is_closing():
+            if not cycle.response_started:
+                self._send_error(500)
+            else:
+                # Приложение не дописало ответ - соединение в неопределённом состоянии
+                self.transport.close()
+
+    def on_response_complete(self, cycle: RequestCycle):
+        self.cycle = None
+        if not self.keep_alive:
+            self.transport.close()
+            return
+        self._reset_idle_timer()
+        self.resume_reading()
+        self._process_events()
+
+    def _send_error(self, status: int):
+        phrase = reason_phrase(status)
+        self.transport.write(
+            b"HTTP/1.1 %d %b\r\nContent-Type: text/plain\r\nContent-Length: %d\r\n"
+            b"Connection: close\r\n\r\n%b" % (status, phrase, len(phrase), phrase)
+        )
+        self.transport.close()
+
+    # --- таймауты и завершение ---
+
+    def _reset_idle_timer(self):
+        self._cancel_idle_timer()
+        self.idle_handle = self.loop.call_later(self.idle_timeout, self._on_idle_timeout)
+
+    def _cancel_idle_timer(self):
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+
+    def _on_idle_timeout(self):
+        logging.debug(f"Python: timeout ожидания клиента {self.client}")
+        self.idle_handle = None
+        if self.parser.buffered:
+            # Клиент начал запрос и замолчал
+            self._send_error(408)
+        else:
+            self.transport.close()
+
+    def shutdown(self):
+        """Graceful shutdown: простаивающее соединение закрываем, активное - после ответа."""
+        self.keep_alive = False
+        if self.cycle is None:
+            self.transport.close()
+
+
+class ServerState:
+    """Общее состояние сервера, разделяемое всеми соединениями."""
+
+    def __init__(self):
+        self.connections: set[HTTPProtocol] = set()
+        self.tasks: set[asyncio.Task] = set()
+        self.shutting_down = False
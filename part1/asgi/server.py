@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import signal
+import socket
+from collections.abc import Callable
+
+from .protocol import ASGIApp, HTTPProtocol, ServerState
+
+
+def get_loop_factory(loop: str | Callable[[], asyncio.AbstractEventLoop]):
+    """
+    Подключаемая реализация event loop: "asyncio" - стандартная,
+    "uvloop" - uvloop (если установлен), "auto" - uvloop при наличии, иначе asyncio.
+    Можно передать и собственную фабрику цикла.
+    """
+    if callable(loop):
+        return loop
+    if loop == "asyncio":
+        return asyncio.new_event_loop
+    if loop in ("uvloop", "auto"):
+        try:
+            import uvloop
+        except ImportError:
+            if loop == "uvloop":
+                raise RuntimeError("uvloop не установлен: uv pip install uvloop")
+            return asyncio.new_event_loop
+        return uvloop.new_event_loop
+    raise ValueError(f"Неизвестная реализация event loop: {loop!r}")
+
+
+class ASGIServer:
+    """
+    Асинхронный аналог TCPServer: asyncio-сервер с HTTP/1.1-протоколом и ASGI-приложением.
+    Все соединения обслуживаются одним потоком в одном event loop.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app: ASGIApp,
+        client_idle_timeout: float = 5,
+        shutdown_timeout: float = 10,
+        loop: str | Callable[[], asyncio.AbstractEventLoop] = "auto",
+        backlog: int = 1024,
+    ):
+        self.address = (host, port)
+        self.app = app
+        self.client_idle_timeout = client_idle_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.loop_factory = get_loop_factory(loop)
+        self.backlog = backlog
+        self.state = ServerState()
+        self.shutdown_event: asyncio.Event | None = None
+
+    def serve_forever(self):
+        """Запуск сервера."""
+        asyncio.run(self.serve(), loop_factory=self.loop_factory)
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self.shutdown_event = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._on_shutdown)
+
+        server = await loop.create_server(
+            lambda: HTTPProtocol(self.app, self.state, self.client_idle_timeout),
+            host=self.address[0],
+            port=self.address[1],
+            family=socket.AF_INET,
+            reuse_address=True,
+            backlog=self.backlog,
+        )
+        logging.info(
+            f"Python: ASGI-сервер ({type(loop).__module__}) запущен на прослушивание "
+            f"{self.address[0]}:{self.address[1]}"
+        )
+
+        async with server:
+            await self.shutdown_event.wait()
+            await self._shutdown(server)
+
+    def _on_shutdown(self):
+        logging.warning("Python: получен сигнал завершения")
+        logging.warning("Python: после обработки всех активных запросов сервер будет остановлен")
+        self.shutdown_event.set()
+
+    async def _shutdown(self, server: asyncio.Server):
+        """Graceful shutdown: перестаём принимать соединения и ждём активные запросы."""
+        server.close()
+        self.state.shutting_down = True
+        for protocol in list(self.state.connections):
+            protocol.shutdown()
+
+        if self.state.tasks:
+            logging.info(f"Python: ожидаю завершения {len(self.state.tasks)} запросов")
+            _, pending = await asyncio.wait(self.state.tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+
+        for protocol in list(self.state.connections):
+            protocol.transport.abort()
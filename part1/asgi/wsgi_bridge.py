@@ -0,0 +1,112 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WSGIMiddleware:
+    """
+    Мост WSGI -> ASGI: синхронное WSGI-приложение (например, Flask)
+    выполняется в пуле потоков, а event loop продолжает обслуживать остальные соединения.
+    Тело ответа стримится: поток-воркер отдаёт чанки в цикл и ждёт, пока они будут отправлены.
+    """
+
+    def __init__(self, app, workers: int = 8):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope: dict, receive, send):
+        if scope["type"] != "http":
+            raise ValueError(f"WSGIMiddleware поддерживает только http, получено {scope['type']!r}")
+
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.write(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        environ = self._build_environ(scope, body)
+        await loop.run_in_executor(self.executor, self._run_app, environ, send, loop)
+
+    def _run_app(self, environ: dict, send, loop: asyncio.AbstractEventLoop):
+        """Выполняется в потоке пула."""
+        response_start = {}
+
+        def start_response(status, headers_list, exc_info=None):
+            code, _, _ = status.partition(" ")
+            response_start.update(
+                type="http.response.start",
+                status=int(code),
+                headers=[
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers_list
+                ],
+            )
+
+        def send_body(chunk: bytes, more_body: bool):
+            # start_response можно вызвать вплоть до первого чанка тела,
+            # поэтому http.response.start отправляем только сейчас
+            if response_start:
+                send_from_thread(dict(response_start))
+                response_start.clear()
+            send_from_thread({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        def send_from_thread(message: dict):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        body_iterator = self.app(environ, start_response)
+        try:
+            for chunk in body_iterator:
+                if chunk:
+                    send_body(chunk, more_body=True)
+            send_body(b"", more_body=False)
+        finally:
+            if hasattr(body_iterator, "close"):
+                body_iterator.close()
+
+    def _build_environ(self, scope: dict, body: io.BytesIO) -> dict:
+        server_name, server_port = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            # WSGI ожидает путь как байты, декодированные в latin-1
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "CONTENT_TYPE": "",
+            "CONTENT_LENGTH": "",
+            "SERVER_NAME": server_name,
+            "SERVER_PORT": str(server_port),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            # Тело буферизовано целиком, его конец - конец потока
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        if client := scope.get("client"):
+            environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = client[0], str(client[1])
+
+        for name, value in scope["headers"]:
+            name = name.decode("latin-1")
+            value = value.decode("latin-1")
+            if name == "content-type":
+                environ["CONTENT_TYPE"] = value
+            elif name == "content-length":
+                environ["CONTENT_LENGTH"] = value
+            else:
+                key = f"HTTP_{name.upper().replace('-', '_')}"
+                # Повторяющиеся заголовки склеиваем через запятую (RFC 9110)
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        # Тело уже целиком прочитано (в том числе chunked) - его длина известна точно
+        environ["CONTENT_LENGTH"] = str(body.getbuffer().nbytes)
+        return environ
@@ -0,0 +1,71 @@
+"""
+Контроль допуска под всплеском нагрузки: клиентов больше, чем сервер успевает обслужить.
+Без контроля лишние соединения ждут в очереди пула и в backlog ядра, и задержка растёт
+у всех запросов. С AdmissionController лишние сразу получают 503 с Retry-After,
+а p99 успешных запросов остаётся близким ко времени обработки.
+
+    uv run -m benchmarks.admission
+    uv run -m benchmarks.admission --concurrency eventloop --clients 64 --backlog 16
+"""
+
+import argparse
+from functools import partial
+
+from final_tcp_server.admission import AdmissionController
+from wsgi.app import app
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--path", default="/sleep")
+    parser.add_argument("--concurrency", default="threads", choices=["threads", "eventloop"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--accept-queue-size", type=int, default=8)
+    parser.add_argument("--backlog", type=int, default=None)
+    parser.add_argument("--max-queue-wait", type=float, default=1.0)
+    parser.add_argument("--queue-wait-target", type=float, default=0.05)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(
+        f"{args.path}: {args.clients} клиентов, {args.workers} воркеров, "
+        f"очередь {args.accept_queue_size}, режим {args.concurrency}"
+    )
+    for name, admission in (
+        ("без контроля", None),
+        (
+            "с контролем",
+            AdmissionController(
+                max_queue_wait=args.max_queue_wait, queue_wait_target=args.queue_wait_target
+            ),
+        ),
+    ):
+        server_factory = partial(
+            WSGIServer,
+            concurrency=args.concurrency,
+            workers=args.workers,
+            accept_queue_size=args.accept_queue_size,
+            backlog=args.backlog,
+            admission=admission,
+        )
+        with running_server(server_factory, HOST, PORT, app):
+            # Каждый запрос - новое соединение: так всплеск выглядит для сервера
+            result = run_load(HOST, PORT, args.path, args.clients, args.duration, keep_alive=False)
+        successful = sum(count for status, count in result.statuses.items() if status < 500)
+        print(
+            f"  {name:13s} | успешных {successful / result.duration:6.1f} rps | "
+            f"p50 {result.percentile(50, result.ok_latencies):8.2f} ms | "
+            f"p99 {result.percentile(99, result.ok_latencies):8.2f} ms | "
+            f"503: {result.statuses.get(503, 0):6d} | ошибок: {result.errors}"
+        )
+
+
+if __name__ == "__main__":
+    main()
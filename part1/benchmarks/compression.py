@@ -0,0 +1,66 @@
+"""
+Сжатие ответов: CPU на ответ против сэкономленных байт для разных уровней gzip
+и стоимость ответа из кэша сжатых вариантов.
+
+    uv run -m benchmarks.compression
+"""
+
+import argparse
+import json
+import time
+
+from wsgi.compression import ResponseCompressor, gzip_compress
+
+# Типичная HTML-страница: повторяющаяся разметка с разным текстом
+HTML_PAGE = "".join(
+    f'<div class="item" id="item-{i}"><a href="/items/{i}">Товар {i}</a>'
+    f'<span class="price">{i * 37 % 1000} руб.</span></div>\n'
+    for i in range(300)
+).encode()
+JSON_API = json.dumps(
+    [{"id": i, "name": f"item-{i}", "tags": ["a", "b", "c"], "price": i * 1.5} for i in range(3000)]
+).encode()
+
+
+def _measure(function, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = {"HTML-страница": HTML_PAGE, "JSON API": JSON_API}
+    for name, body in payloads.items():
+        print(f"{name}, {len(body) / 1024:.1f} KiB:")
+        for level in args.levels:
+            compressed = gzip_compress(body, level)
+            per_response = _measure(
+                lambda body=body, level=level: gzip_compress(body, level), args.repeat
+            )
+            saved = len(body) - len(compressed)
+            print(
+                f"  gzip -{level}            {per_response * 1e6:8.0f} мкс/ответ  "
+                f"{len(compressed) / 1024:7.1f} KiB  сэкономлено {saved / len(body):4.0%}  "
+                f"{saved / 1024 / (per_response * 1e3):6.1f} KiB на мс CPU"
+            )
+        compressor = ResponseCompressor()
+        compressor.compress(("localhost", "/"), body)
+        # Приложение каждый раз отдаёт новый объект bytes с тем же содержимым
+        fresh_body = bytes(bytearray(body))
+        per_response = _measure(
+            lambda compressor=compressor, fresh_body=fresh_body: compressor.compress(
+                ("localhost", "/"), fresh_body
+            ),
+            args.repeat * 10,
+        )
+        print(f"  кэш сжатых вариантов {per_response * 1e6:8.1f} мкс/ответ")
+
+
+if __name__ == "__main__":
+    main()
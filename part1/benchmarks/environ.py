@@ -0,0 +1,158 @@
+"""
+Микро-бенчмарк сборки environ: шаблон и кэш ключей заголовков против сборки словаря с нуля.
+Перед замером запросы прогоняются через WSGIHandler под wsgiref.validate - проверка,
+что environ (и работа сервера с приложением) соответствует PEP 3333.
+
+    uv run -m benchmarks.environ
+"""
+
+import argparse
+import socket
+import sys
+import time
+import warnings
+from threading import Event
+from wsgiref.validate import validator
+
+from final_tcp_server.file_wrapper import FileWrapper
+from final_tcp_server.socket_io import SocketIO
+from wsgi.handler import HTTPRequest, WSGIHandler
+from wsgi.http_parser import HTTPLimits, parse_request_head
+
+from .http_parser import API_REQUEST, BROWSER_REQUEST, MANY_HEADERS_REQUEST
+
+
+def baseline_environ(handler: WSGIHandler, http_request: HTTPRequest) -> dict:
+    """Исходный _generate_environ: весь словарь и ключи заголовков собираются на каждый запрос."""
+    path, _, query_string = http_request.path.partition("?")
+    environ = {
+        "REQUEST_METHOD": http_request.method,
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": query_string,
+        "CONTENT_TYPE": http_request.headers.get("content-type", ""),
+        "CONTENT_LENGTH": str(http_request.content_length) if http_request.content_length else "",
+        "SERVER_NAME": handler.host,
+        "SERVER_PORT": str(handler.port),
+        "SERVER_PROTOCOL": http_request.protocol,
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": http_request.body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": handler.multithread,
+        "wsgi.multiprocess": handler.multiprocess,
+        "wsgi.run_once": False,
+        "wsgi.file_wrapper": FileWrapper,
+    }
+    for key, value in http_request.headers.items():
+        environ[f"HTTP_{key.upper().replace('-', '_')}"] = value
+    return environ
+
+
+def template_environ(handler: WSGIHandler, http_request: HTTPRequest) -> dict:
+    return handler._generate_environ(http_request)
+
+
+# Запрос и ожидаемые значения environ
+COMPLIANCE_CASES = [
+    (
+        b"GET /items?page=2&sort=name HTTP/1.1\r\nHost: x\r\nAccept-Encoding: gzip\r\n\r\n",
+        {"PATH_INFO": "/items", "QUERY_STRING": "page=2&sort=name", "HTTP_ACCEPT_ENCODING": "gzip"},
+    ),
+    (
+        b"POST /form HTTP/1.1\r\nHost: x\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+        b"Content-Length: 7\r\n\r\na=1&b=2",
+        {
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "CONTENT_LENGTH": "7",
+            "body": b"a=1&b=2",
+        },
+    ),
+    (
+        b"PUT /upload HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n",
+        {"CONTENT_LENGTH": "5", "HTTP_TRANSFER_ENCODING": "chunked", "body": b"abcde"},
+    ),
+    (
+        # Путь декодируется в байты, представленные строкой latin-1 ("привет" в UTF-8)
+        b"GET /%D0%BF%D1%80%D0%B8%D0%B2%D0%B5%D1%82%20x?q=%20 HTTP/1.1\r\nHost: x\r\n\r\n",
+        {"PATH_INFO": "/привет x".encode().decode("latin-1"), "QUERY_STRING": "q=%20"},
+    ),
+    (
+        b"GET http://example.com/abs?x=1 HTTP/1.1\r\nHost: example.com\r\n\r\n",
+        {"PATH_INFO": "/abs", "QUERY_STRING": "x=1", "HTTP_HOST": "example.com"},
+    ),
+    (
+        b"GET / HTTP/1.0\r\nX-Forwarded-For: 10.0.0.1\r\nX-Forwarded-For: 10.0.0.2\r\n\r\n",
+        {"SERVER_PROTOCOL": "HTTP/1.0", "HTTP_X_FORWARDED_FOR": "10.0.0.1, 10.0.0.2"},
+    ),
+]
+
+
+def check_compliance(handler: WSGIHandler):
+    """
+    Прогоняет COMPLIANCE_CASES через handle() с приложением под wsgiref.validate:
+    он проверяет environ, wsgi.input/wsgi.errors и вызовы start_response/close по PEP 3333.
+    """
+    seen = []
+
+    def app(environ, start_response):
+        # validate требует у read() явный размер
+        environ["body"] = environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"] or 0))
+        seen.append(environ)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"ok"]
+
+    handler.app = validator(app)
+    for request, expected in COMPLIANCE_CASES:
+        client, server = socket.socketpair()
+        with client, server:
+            client.sendall(request)
+            client.shutdown(socket.SHUT_WR)
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                for _ in handler.handle(SocketIO(server, Event())):
+                    pass
+        environ = seen.pop()
+        for key, value in expected.items():
+            assert environ.get(key) == value, (request, key, environ.get(key), value)
+        assert "HTTP_CONTENT_TYPE" not in environ and "HTTP_CONTENT_LENGTH" not in environ
+    print(f"PEP 3333: {len(COMPLIANCE_CASES)} запросов прошли wsgiref.validate")
+
+
+def _measure(build, handler: WSGIHandler, http_request: HTTPRequest, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        build(handler, http_request)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    handler = WSGIHandler(None, "localhost", 9999)
+    handler.multithread = True
+    check_compliance(handler)
+
+    scenarios = {
+        "браузер": BROWSER_REQUEST,
+        "API": API_REQUEST,
+        "95 заголовков": MANY_HEADERS_REQUEST,
+    }
+    builders = {"с нуля": baseline_environ, "шаблон": template_environ}
+    for name, request in scenarios.items():
+        head = parse_request_head(request, HTTPLimits())
+        http_request = HTTPRequest(head.method, head.target, head.protocol, head.headers, None, 0)
+        print(f"{name} ({len(head.headers)} заголовков):")
+        for builder_name, build in builders.items():
+            # Прогрев: кэш ключей заполняется на первых запросах
+            _measure(build, handler, http_request, 1000)
+            per_request = _measure(build, handler, http_request, args.requests)
+            print(f"  {builder_name:8s} {per_request * 1e9:8.0f} нс/запрос")
+
+
+if __name__ == "__main__":
+    main()
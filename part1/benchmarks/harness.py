@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Callable
+from contextlib import contextmanager, redirect_stdout
+
+from .load import connect
+
+HOST = "127.0.0.1"
+PORT = 9998
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10, unix_socket: str | None = None):
+    """Ждём, пока сервер начнёт принимать соединения (на unix_socket, если он задан)."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            connect(host, port, 1, unix_socket).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Сервер не поднялся на {unix_socket or f'{host}:{port}'}")
+
+
+def _serve(factory: Callable, args: tuple):
+    logging.getLogger().setLevel(logging.ERROR)
+    # Ранние версии сервера печатают каждое соединение в stdout
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        factory(*args).serve_forever()
+
+
+def _process_tree(pid: int) -> list[int]:
+    """pid и все его потомки (воркеры pre-fork сервера) по /proc."""
+    pids = [pid]
+    # Список растёт по ходу обхода: потомки потомков тоже попадают в него
+    for current in pids:
+        try:
+            tasks = os.listdir(f"/proc/{current}/task")
+        except OSError:
+            continue
+        for task in tasks:
+            try:
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pids.extend(int(child) for child in children.read().split())
+            except OSError:
+                pass
+    return pids
+
+
+def process_tree_rss(pid: int) -> tuple[int, int]:
+    """
+    Текущий и пиковый RSS процесса вместе с потомками, в байтах (VmRSS и VmHWM из /proc).
+    Вне Linux - (0, 0).
+    """
+    rss = peak = 0
+    for tree_pid in _process_tree(pid):
+        try:
+            with open(f"/proc/{tree_pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+                    elif line.startswith("VmHWM:"):
+                        peak += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return rss, peak
+
+
+def cpu_seconds(pid: int) -> float:
+    """utime + stime процесса со всеми его потоками (по /proc)."""
+    with open(f"/proc/{pid}/stat") as stat:
+        # Имя процесса в скобках может содержать пробелы - поля считаем после него
+        fields = stat.read().rpartition(")")[2].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+@contextmanager
+def running_server(
+    factory: Callable, *args, host: str = HOST, port: int = PORT, unix_socket: str | None = None
+):
+    """Запускает factory(*args).serve_forever() в отдельном процессе на время блока with."""
+    process = multiprocessing.Process(target=_serve, args=(factory, args))
+    process.start()
+    try:
+        wait_for_port(host, port, unix_socket=unix_socket)
+        yield process
+    finally:
+        os.kill(process.pid, signal.SIGTERM)
+        process.join()
@@ -0,0 +1,147 @@
+"""
+Перезапуск без простоя под нагрузкой: сервер запускается отдельной командой (новое поколение
+повторяет её через sys.orig_argv), и во время нагрузки ему несколько раз отправляется SIGHUP.
+Каждое поколение наследует слушающий сокет, поэтому отказов в подключении быть не должно.
+
+    uv run -m benchmarks.hot_restart
+    uv run -m benchmarks.hot_restart --concurrency eventloop --restarts 5
+    uv run -m benchmarks.hot_restart --processes 2
+"""
+
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from wsgi.app import app
+from wsgi.server import PreforkWSGIServer, WSGIServer
+
+from .harness import HOST, PORT, wait_for_port
+from .load import LoadResult, run_load
+
+
+def serve(args):
+    """Режим --serve: одно поколение сервера, его pid - в pid-файл."""
+    logging.getLogger().setLevel(logging.INFO)
+    with open(args.pid_file, "w") as pid_file:
+        pid_file.write(str(os.getpid()))
+    if args.processes:
+        server = PreforkWSGIServer(
+            HOST,
+            PORT,
+            app,
+            processes=args.processes,
+            concurrency=args.concurrency,
+            hot_restart=True,
+        )
+    else:
+        server = WSGIServer(HOST, PORT, app, concurrency=args.concurrency, hot_restart=True)
+    server.serve_forever()
+
+
+def read_pid(path: str) -> int:
+    with open(path) as pid_file:
+        return int(pid_file.read())
+
+
+def wait_for_new_generation(path: str, old_pid: int, timeout: float = 30) -> int:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        pid = read_pid(path)
+        if pid != old_pid:
+            return pid
+        time.sleep(0.05)
+    raise TimeoutError("Новое поколение сервера не запустилось")
+
+
+def wait_for_exit(pid: int, first_generation: subprocess.Popen, timeout: float = 30):
+    # Первое поколение - наш дочерний процесс: пока его не дождались, он остаётся зомби
+    if pid == first_generation.pid:
+        first_generation.wait(timeout)
+        return
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--path", default="/ping")
+    parser.add_argument("--concurrency", default="threads", choices=["threads", "eventloop"])
+    parser.add_argument("--processes", type=int, default=0, help="0 - без pre-fork")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--restarts", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--keep-alive", action="store_true")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--pid-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    pid_path = tempfile.mktemp(suffix=".pid")
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.hot_restart",
+        "--serve",
+        "--pid-file",
+        pid_path,
+        "--concurrency",
+        args.concurrency,
+        "--processes",
+        str(args.processes),
+    ]
+    first_generation = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+    wait_for_port(HOST, PORT)
+    pid = read_pid(pid_path)
+
+    # Без keep-alive каждый запрос - новое соединение: так видны именно отказы в подключении.
+    # С keep-alive запрос, отправленный в момент, когда старое поколение закрывает простаивающее
+    # соединение, теряется - HTTP-клиенты повторяют такие запросы сами
+    duration = args.interval * (args.restarts + 1)
+    results: list[LoadResult] = []
+    load = threading.Thread(
+        target=lambda: results.append(
+            run_load(HOST, PORT, args.path, args.clients, duration, args.keep_alive)
+        )
+    )
+    load.start()
+    try:
+        for _ in range(args.restarts):
+            time.sleep(args.interval)
+            started = time.perf_counter()
+            os.kill(pid, signal.SIGHUP)
+            old_pid, pid = pid, wait_for_new_generation(pid_path, pid)
+            wait_for_exit(old_pid, first_generation)
+            print(
+                f"поколение {old_pid} -> {pid}: старое завершилось через "
+                f"{time.perf_counter() - started:.2f} с"
+            )
+        load.join()
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        wait_for_exit(pid, first_generation)
+        first_generation.wait()
+        os.remove(pid_path)
+
+    result = results[0]
+    print(f"{args.restarts} перезапусков под нагрузкой | {result.summary()}")
+    print(f"ответы по кодам: {dict(result.statuses)}")
+
+
+if __name__ == "__main__":
+    main()
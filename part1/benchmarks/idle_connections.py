@@ -0,0 +1,89 @@
+"""
+Цена простаивающих keep-alive соединений: сервер держит N соединений, каждое уже получило
+ответ и ждёт следующего запроса. Меряется процессорное время сервера за это время.
+Дедлайны ожидания стоят в общем колесе таймеров, поэтому простаивающее соединение
+не просыпается, пока нет данных, и CPU не растёт с числом соединений.
+
+    uv run -m benchmarks.idle_connections
+    uv run -m benchmarks.idle_connections --connections 100 500 --duration 5
+"""
+
+import argparse
+import time
+from functools import partial
+
+from wsgi.app import app
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, cpu_seconds, running_server
+from .load import connect
+
+REQUEST = f"GET /ping HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+
+
+def open_idle(count: int) -> list:
+    """Открывает count соединений и делает по одному запросу: дальше они простаивают."""
+    sockets = []
+    for _ in range(count):
+        sock = connect(HOST, PORT, 10)
+        sock.sendall(REQUEST)
+        response = b""
+        while not response.endswith(b"pong"):
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("Сервер закрыл соединение")
+            response += chunk
+        sockets.append(sock)
+    return sockets
+
+
+def ping_latency(samples: int = 20) -> float:
+    """Медианная задержка /ping по отдельному keep-alive соединению, мс."""
+    sock = open_idle(1)[0]
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        sock.sendall(REQUEST)
+        response = b""
+        while not response.endswith(b"pong"):
+            response += sock.recv(4096)
+        latencies.append((time.perf_counter() - started) * 1000)
+    sock.close()
+    return sorted(latencies)[len(latencies) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--connections", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for concurrency in ("threads", "eventloop"):
+        print(f"{concurrency}:")
+        for count in args.connections:
+            # В режиме threads каждое соединение занимает поток пула
+            server_factory = partial(
+                WSGIServer,
+                concurrency=concurrency,
+                workers=count + 8,
+                keepalive_timeout=args.duration * 10,
+            )
+            with running_server(server_factory, HOST, PORT, app) as process:
+                sockets = open_idle(count)
+                time.sleep(0.5)
+                cpu_before = cpu_seconds(process.pid)
+                time.sleep(args.duration)
+                cpu = cpu_seconds(process.pid) - cpu_before
+                latency = ping_latency()
+                for sock in sockets:
+                    sock.close()
+            print(
+                f"  {count:5d} простаивающих | "
+                f"CPU сервера {cpu / args.duration * 1000:7.1f} мс/с | /ping p50 {latency:6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import multiprocessing
+import socket
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LoadResult:
+    requests: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    # Число ответов по коду статуса (у эхо-протокола статусов нет)
+    statuses: Counter = field(default_factory=Counter)
+    # Задержки только тех запросов, на которые сервер не ответил 5xx
+    ok_latencies: list[float] = field(default_factory=list)
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, p: float, latencies: list[float] | None = None) -> float:
+        """Перцентиль задержки в миллисекундах (по умолчанию - по всем запросам)."""
+        if latencies is None:
+            latencies = self.latencies
+        if not latencies:
+            return 0.0
+        ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index] * 1000
+
+    def summary(self) -> str:
+        return (
+            f"{self.rps:9.1f} rps | p50 {self.percentile(50):7.2f} ms | "
+            f"p99 {self.percentile(99):7.2f} ms | p99.9 {self.percentile(99.9):7.2f} ms | "
+            f"ошибок: {self.errors}"
+        )
+
+    def to_dict(self) -> dict:
+        """Итоги прогона для сохранения в JSON (без сырых задержек)."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration": self.duration,
+            "rps": round(self.rps, 1),
+            "p50_ms": round(self.percentile(50), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "p999_ms": round(self.percentile(99.9), 3),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+
+def read_response(reader) -> tuple[int, bytes, bool]:
+    """
+    Читает один HTTP-ответ из буферизованного файла сокета.
+    Возвращает статус, тело и флаг "сервер закроет соединение" (Connection: close).
+    """
+    status_line = reader.readline()
+    if not status_line:
+        raise ConnectionError("Сервер закрыл соединение")
+    protocol, status, _ = status_line.split(b" ", 2)
+    status = int(status)
+
+    content_length = 0
+    chunked = False
+    close = protocol == b"HTTP/1.0"
+    while (line := reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            content_length = int(value)
+        elif name == b"transfer-encoding":
+            chunked = b"chunked" in value.lower()
+        elif name == b"connection":
+            tokens = value.strip().lower()
+            close = b"close" in tokens or (close and b"keep-alive" not in tokens)
+
+    if not chunked:
+        return status, reader.read(content_length), close
+    chunks = []
+    while size := int(reader.readline().split(b";")[0], 16):
+        chunks.append(reader.read(size))
+        reader.readline()
+    # Trailer-заголовки и пустая строка после последнего чанка
+    while reader.readline() not in (b"\r\n", b"\n", b""):
+        pass
+    return status, b"".join(chunks), close
+
+
+def read_echo(reader, size: int):
+    """Эхо-протокол: ответ - те же size байт, что отправил клиент."""
+    if len(reader.read(size)) != size:
+        raise ConnectionError("Сервер закрыл соединение")
+
+
+def _client(
+    host: str,
+    port: int,
+    request: bytes,
+    duration: float,
+    keep_alive: bool,
+    pipeline: int = 1,
+    protocol: str = "http",
+    timeout: float = 10.0,
+    unix_socket: str | None = None,
+) -> tuple[int, int, list[float], Counter, list[float]]:
+    """
+    Один клиент: шлёт запросы, пока не истечёт duration.
+    pipeline > 1 - отправляет сразу pipeline запросов и только потом читает ответы.
+    Если сервер ответил Connection: close (например, исчерпан лимит запросов на соединение),
+    клиент переподключается - это не ошибка. Ответы на неотвеченные pipelined-запросы
+    не засчитываются.
+    """
+    batch = request * pipeline
+    requests, errors, latencies, ok_latencies = 0, 0, [], []
+    statuses = Counter()
+    sock, reader = None, None
+    deadline = time.perf_counter() + duration
+
+    while (start := time.perf_counter()) < deadline:
+        close = not keep_alive
+        try:
+            if sock is None:
+                sock = connect(host, port, timeout, unix_socket)
+                reader = sock.makefile("rb")
+            sock.sendall(batch)
+            answered = 0
+            failed = False
+            for _ in range(pipeline):
+                if protocol == "echo":
+                    read_echo(reader, len(request))
+                else:
+                    status, _, server_close = read_response(reader)
+                    statuses[status] += 1
+                    failed = failed or status >= 500
+                    close = close or server_close
+                answered += 1
+                if close and answered < pipeline:
+                    break
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            if not failed:
+                ok_latencies.append(latency)
+            requests += answered
+        except (OSError, ValueError):
+            errors += 1
+            close = True
+
+        if close and sock is not None:
+            reader.close()
+            sock.close()
+            sock = None
+
+    if sock is not None:
+        reader.close()
+        sock.close()
+    return requests, errors, latencies, statuses, ok_latencies
+
+
+def connect(host: str, port: int, timeout: float, unix_socket: str | None = None) -> socket.socket:
+    """Соединение с сервером: по TCP или, если задан unix_socket, через unix domain socket."""
+    if unix_socket is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(unix_socket)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def build_request(host: str, path: str, method: str = "GET", body: bytes = b"") -> bytes:
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {host}"]
+    if body:
+        headers.append(f"Content-Length: {len(body)}")
+        headers.append("Content-Type: application/json")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("ascii") + body
+
+
+def run_load(
+    host: str,
+    port: int,
+    path: str = "/ping",
+    clients: int = 8,
+    duration: float = 3.0,
+    keep_alive: bool = True,
+    method: str = "GET",
+    body: bytes = b"",
+    pipeline: int = 1,
+    protocol: str = "http",
+    timeout: float = 10.0,
+    unix_socket: str | None = None,
+) -> LoadResult:
+    """
+    Запускает clients процессов-клиентов на duration секунд и собирает статистику.
+    При pipeline > 1 задержка - время ответа на всю пачку запросов.
+    protocol="echo" - вместо HTTP сервер должен вернуть body как есть (эхо-серверы part1);
+    timeout - сколько клиент ждёт ответа, прежде чем засчитать ошибку;
+    unix_socket - путь unix-сокета сервера (host и port тогда только для заголовка Host).
+    """
+    request = body if protocol == "echo" else build_request(host, path, method, body)
+    args = [
+        (host, port, request, duration, keep_alive, pipeline, protocol, timeout, unix_socket)
+    ] * clients
+
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.starmap(_client, args)
+
+    result = LoadResult(duration=duration)
+    for requests, errors, latencies, statuses, ok_latencies in results:
+        result.requests += requests
+        result.errors += errors
+        result.latencies.extend(latencies)
+        result.statuses.update(statuses)
+        result.ok_latencies.extend(ok_latencies)
+    return result
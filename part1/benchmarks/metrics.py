@@ -0,0 +1,87 @@
+"""
+Накладные расходы метрик: стоимость учёта одного запроса (шард потока, счётчики байт,
+три гистограммы фаз) и рендеринга /metrics, плюс сервер под нагрузкой с метриками и без.
+
+    uv run -m benchmarks.metrics
+    uv run -m benchmarks.metrics --concurrency eventloop --clients 64
+"""
+
+import argparse
+import time
+from functools import partial
+
+from final_tcp_server.metrics import ServerMetrics
+from wsgi.app import app
+from wsgi.response_cache import ResponseCache
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def instrumented_request(metrics: ServerMetrics, message_started: float):
+    """Всё, что сервер делает для метрик на один keep-alive запрос."""
+    # SocketIO: recv() запроса
+    metrics.shard().bytes_in += 78
+    # WSGIHandler.handle: отметки времени фаз и запись ответа
+    parsed_at = time.perf_counter()
+    app_done_at = time.perf_counter()
+    # TCPServer.send_to_client: шард берётся один раз на соединение, на ответ - инкремент
+    shard = metrics.shard()
+    shard.bytes_out += 160
+    metrics.shard().record_request(
+        "200 OK",
+        parsed_at - message_started,
+        app_done_at - parsed_at,
+        time.perf_counter() - app_done_at,
+    )
+
+
+def _measure(function, count: int, rounds: int = 5) -> float:
+    """Лучшее из нескольких прогонов - меньше шума от соседних процессов."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(count // rounds):
+            function()
+        best = min(best, (time.perf_counter() - start) / (count // rounds))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--path", default="/ping")
+    parser.add_argument("--concurrency", default="threads")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    metrics = ServerMetrics()
+    started = time.perf_counter()
+    per_request = _measure(partial(instrumented_request, metrics, started), args.requests)
+    print(f"учёт запроса:      {per_request * 1e9:8.0f} нс")
+    per_render = _measure(metrics.render, 200)
+    print(f"рендеринг /metrics: {per_render * 1e6:7.0f} мкс")
+    p50, p99 = metrics.shard().app.quantile(0.5), metrics.shard().app.quantile(0.99)
+    print(f"фаза app (пустая):  p50 {p50 * 1e6:.0f} мкс, p99 {p99 * 1e6:.0f} мкс")
+    print()
+
+    # Из кэша ответов запрос обрабатывается быстрее всего - доля метрик здесь максимальна
+    print(f"{args.path} из кэша ответов:")
+    for name, server_metrics in (("без метрик", None), ("с метриками", ServerMetrics())):
+        server_factory = partial(
+            WSGIServer,
+            concurrency=args.concurrency,
+            workers=args.workers,
+            response_cache=ResponseCache(),
+            metrics=server_metrics,
+        )
+        with running_server(server_factory, HOST, PORT, app):
+            result = run_load(HOST, PORT, args.path, args.clients, args.duration)
+        print(f"  {name:12s} | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
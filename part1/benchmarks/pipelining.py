@@ -0,0 +1,43 @@
+"""
+HTTP/1.1 pipelining: ответы на запросы из буфера уходят одной пачкой или по одному.
+
+    uv run -m benchmarks.pipelining
+    uv run -m benchmarks.pipelining --pipeline 1 8 32 --concurrency eventloop
+"""
+
+import argparse
+from functools import partial
+
+from wsgi.app import app
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/ping")
+    parser.add_argument("--pipeline", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--concurrency", default="threads")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    variants = {
+        "по одному ответу": 0,
+        "пачками (до 16)": 16,
+    }
+    for pipeline in args.pipeline:
+        print(f"{args.path}, запросов в пачке клиента: {pipeline}")
+        for name, depth in variants.items():
+            server_factory = partial(WSGIServer, concurrency=args.concurrency, pipeline_depth=depth)
+            with running_server(server_factory, HOST, PORT, app):
+                result = run_load(
+                    HOST, PORT, args.path, args.clients, args.duration, pipeline=pipeline
+                )
+            print(f"  {name:17s} | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
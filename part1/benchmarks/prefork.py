@@ -0,0 +1,42 @@
+"""
+Масштабирование пропускной способности PreforkWSGIServer по числу воркеров.
+
+    uv run -m benchmarks.prefork --processes 1 2 4 8
+    uv run -m benchmarks.prefork --processes 1 2 4 8 --reuse-port
+"""
+
+import argparse
+from functools import partial
+
+from wsgi.app import app
+from wsgi.server import PreforkWSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--paths", nargs="+", default=["/ping", "/sleep"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--close", action="store_true", help="новое соединение на каждый запрос")
+    parser.add_argument(
+        "--reuse-port", action="store_true", help="свой SO_REUSEPORT-сокет у каждого воркера"
+    )
+    args = parser.parse_args()
+    server_factory = partial(PreforkWSGIServer, reuse_port=args.reuse_port)
+
+    for path in args.paths:
+        print(f"{path}:")
+        for processes in args.processes:
+            with running_server(server_factory, HOST, PORT, app, processes):
+                result = run_load(
+                    HOST, PORT, path, args.clients, args.duration, keep_alive=not args.close
+                )
+            print(f"  воркеров: {processes:3d} | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
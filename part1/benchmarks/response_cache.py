@@ -0,0 +1,43 @@
+"""
+Кэш ответов в сервере: /page из кэша против полного прохода через Flask.
+
+    uv run -m benchmarks.response_cache
+    uv run -m benchmarks.response_cache --concurrency eventloop --clients 64
+"""
+
+import argparse
+from functools import partial
+
+from wsgi.app import app
+from wsgi.response_cache import ResponseCache
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", nargs="+", default=["/page", "/ping"])
+    parser.add_argument("--concurrency", default="threads")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        print(f"{path}:")
+        for name, with_cache in (("без кэша", False), ("кэш ответов", True)):
+            server_factory = partial(
+                WSGIServer,
+                concurrency=args.concurrency,
+                workers=args.workers,
+                response_cache=ResponseCache() if with_cache else None,
+            )
+            with running_server(server_factory, HOST, PORT, app):
+                result = run_load(HOST, PORT, path, args.clients, args.duration)
+            print(f"  {name:12s} | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
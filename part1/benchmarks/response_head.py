@@ -0,0 +1,127 @@
+"""
+Микро-бенчмарк сериализации заголовка ответа: готовые строки статуса, кэш Date и один
+encode() против f-строк с lower() на каждый заголовок (без Date и с formatdate() на ответ).
+Время - на ответ; память - пик временных аллокаций на ответ по tracemalloc.
+
+    uv run -m benchmarks.response_head
+"""
+
+import argparse
+import time
+import tracemalloc
+from email.utils import formatdate
+
+from wsgi.handler import WSGIHandler
+
+# Заголовки, которые Flask выставляет типичным ответам
+FLASK_HEADERS = [
+    ("Content-Type", "text/html; charset=utf-8"),
+    ("Content-Length", "262"),
+]
+API_HEADERS = [
+    ("Content-Type", "application/json"),
+    ("Content-Length", "27"),
+    ("Cache-Control", "no-store"),
+    ("Vary", "Cookie"),
+    ("Set-Cookie", "session=0123456789abcdef0123456789abcdef; HttpOnly; Path=/"),
+]
+MANY_HEADERS = [(f"X-Header-{i}", f"value-{i}") for i in range(30)]
+
+
+def baseline_head(handler, status, headers_list, body, connection_close, protocol):
+    """Исходная сборка заголовка: f-строки, lower() на каждое имя, join() и encode()."""
+    content_length_is_set = False
+    chunked = False
+    response_lines = [f"HTTP/1.1 {status}"]
+    for k, v in headers_list:
+        response_lines.append(f"{k}: {v}")
+        if k.lower() == "content-length":
+            content_length_is_set = True
+    if not content_length_is_set:
+        if isinstance(body, (list, tuple)):
+            response_lines.append(f"Content-Length: {sum(len(chunk) for chunk in body)}")
+        elif protocol == "HTTP/1.1":
+            chunked = True
+            response_lines.append("Transfer-Encoding: chunked")
+        else:
+            connection_close = True
+    if connection_close:
+        response_lines.append("Connection: close")
+    elif protocol == "HTTP/1.0":
+        response_lines.append("Connection: keep-alive")
+    response_lines.append("")
+    response_lines.append("")
+    return "\r\n".join(response_lines).encode("iso-8859-1"), chunked, connection_close
+
+
+def baseline_head_with_date(handler, status, headers_list, body, connection_close, protocol):
+    """Исходная сборка, дополненная заголовками Date (formatdate() на каждый ответ) и Server."""
+    headers_list = [
+        *headers_list,
+        ("Date", formatdate(usegmt=True)),
+        ("Server", "python-web-server"),
+    ]
+    return baseline_head(handler, status, headers_list, body, connection_close, protocol)
+
+
+def fast_head(handler, status, headers_list, body, connection_close, protocol):
+    return handler._response_head(status, headers_list, body, connection_close, protocol)
+
+
+def _measure_time(build, args, count: int, rounds: int = 5) -> float:
+    """Лучшее из нескольких прогонов - меньше шума от соседних процессов."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(count // rounds):
+            build(*args)
+        best = min(best, (time.perf_counter() - start) / (count // rounds))
+    return best
+
+
+def _measure_peak(build, args) -> int:
+    """Пик памяти, выделенной во время сборки одного заголовка (включая результат)."""
+    build(*args)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        build(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", type=int, default=200_000)
+    args = parser.parse_args()
+
+    handler = WSGIHandler(None, "localhost", 9999)
+    scenarios = {
+        "Flask, 200 OK": ("200 OK", FLASK_HEADERS, [b"x" * 262]),
+        "API, 201 Created": ("201 Created", API_HEADERS, [b"x" * 27]),
+        "30 заголовков, chunked": ("200 OK", MANY_HEADERS, iter(())),
+    }
+    builders = {
+        "f-строки, без Date": baseline_head,
+        "f-строки + Date": baseline_head_with_date,
+        "fast path": fast_head,
+    }
+
+    for name, (status, headers_list, body) in scenarios.items():
+        print(f"{name}:")
+        for builder_name, build in builders.items():
+            build_args = (handler, status, headers_list, body, False, "HTTP/1.1")
+            per_response = _measure_time(build, build_args, args.responses)
+            peak = _measure_peak(build, build_args)
+            print(f"  {builder_name:20s} {per_response * 1e9:7.0f} нс/ответ  {peak:6d} байт пик")
+
+    head, _, _ = handler._response_head("200 OK", FLASK_HEADERS, [b""], False, "HTTP/1.1")
+    print()
+    print(head.decode("latin-1"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Отдача больших файлов: wsgi.file_wrapper + sendfile() против генератора чанков.
+
+    uv run -m benchmarks.sendfile --size-mb 100
+"""
+
+import argparse
+import os
+import socket
+import tempfile
+import time
+
+from flask import Flask, Response, send_file
+
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, cpu_seconds, running_server
+
+
+def create_app(path: str) -> Flask:
+    app = Flask("sendfile_bench")
+
+    @app.route("/sendfile")
+    def sendfile():
+        # Flask использует environ["wsgi.file_wrapper"] - сервер отправит файл через sendfile()
+        return send_file(path, mimetype="application/octet-stream")
+
+    @app.route("/generator")
+    def generator():
+        def chunks():
+            with open(path, "rb") as f:
+                while chunk := f.read(8192):
+                    yield chunk
+
+        headers = {"Content-Length": str(os.path.getsize(path))}
+        return Response(chunks(), mimetype="application/octet-stream", headers=headers)
+
+    return app
+
+
+def download(path: str, range_header: str | None = None) -> tuple[int, int]:
+    """Скачивает ответ целиком, возвращает (статус, длина тела)."""
+    with socket.create_connection((HOST, PORT)) as sock:
+        request = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+        if range_header:
+            request += f"Range: {range_header}\r\n"
+        sock.sendall((request + "\r\n").encode("ascii"))
+
+        head = b""
+        while b"\r\n\r\n" not in head:
+            head += sock.recv(4096)
+        head, _, body_start = head.partition(b"\r\n\r\n")
+        status = int(head.split()[1])
+        content_length = next(
+            int(line.split(b":", 1)[1])
+            for line in head.split(b"\r\n")
+            if line.lower().startswith(b"content-length:")
+        )
+
+        # Тело читаем в один переиспользуемый буфер, чтобы клиент не был узким местом
+        view = memoryview(bytearray(1024 * 1024))
+        received = len(body_start)
+        while received < content_length:
+            n = sock.recv_into(view, min(len(view), content_length - received))
+            if not n:
+                break
+            received += n
+    return status, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(os.urandom(1024 * 1024) * args.size_mb)
+        f.flush()
+        size = os.path.getsize(f.name)
+
+        with running_server(WSGIServer, HOST, PORT, create_app(f.name)) as server:
+            # Проверка Range: середина файла через 206 Partial Content
+            status, length = download("/sendfile", "bytes=1000-1999")
+            print(f"Range bytes=1000-1999: статус {status}, тело {length} байт")
+
+            for path in ("/generator", "/sendfile"):
+                download(path)  # прогрев page cache
+                start = time.perf_counter()
+                # CPU сервера: sendfile() не копирует файл через user space
+                cpu_start = cpu_seconds(server.pid)
+                for _ in range(args.repeat):
+                    status, length = download(path)
+                    assert status == 200 and length == size, (status, length)
+                elapsed = (time.perf_counter() - start) / args.repeat
+                cpu = (cpu_seconds(server.pid) - cpu_start) / args.repeat
+                print(
+                    f"{path:12s} {elapsed * 1000:8.1f} ms на файл, "
+                    f"{size / elapsed / 1024 / 1024:8.1f} MiB/s, "
+                    f"CPU сервера {cpu * 1000:7.1f} ms на файл"
+                )
+
+
+if __name__ == "__main__":
+    main()
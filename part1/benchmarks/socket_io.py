@@ -0,0 +1,143 @@
+"""
+Микро-бенчмарк SocketIO: буфер на recv_into() против исходной реализации на bytearray-срезах.
+
+    uv run -m benchmarks.socket_io
+"""
+
+import argparse
+import io
+import socket
+import threading
+import time
+from threading import Event
+
+from final_tcp_server.socket_io import SocketIO
+
+
+class BaselineSocketIO(io.RawIOBase):
+    """Исходный алгоритм SocketIO: recv() чанками по 1024 байта и срезы bytearray."""
+
+    def __init__(self, sock: socket.socket, recv_chunk_size: int = 1024):
+        self.socket = sock
+        self.recv_chunk_size = recv_chunk_size
+        self.buffer = bytearray()
+
+    def _recv(self, chunk_size: int) -> bytes:
+        return self.socket.recv(chunk_size)
+
+    def read(self, size=-1) -> bytes:
+        while len(self.buffer) < size:
+            chunk = self._recv(self.recv_chunk_size)
+            if not chunk:
+                break
+            self.buffer.extend(chunk)
+        to_return = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return bytes(to_return)
+
+    def readinto(self, b: bytearray) -> int:
+        data = self.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def readline(self, size=-1) -> bytes:
+        while True:
+            newline_pos = self.buffer.find(b"\n")
+            if newline_pos != -1:
+                end = newline_pos + 1
+                line = bytes(self.buffer[:end])
+                self.buffer = self.buffer[end:]
+                return line
+            chunk = self._recv(self.recv_chunk_size)
+            if not chunk:
+                line = bytes(self.buffer)
+                self.buffer = bytearray()
+                return line
+            self.buffer.extend(chunk)
+
+
+def _feed(sock: socket.socket, payload: bytes):
+    with sock:
+        sock.sendall(payload)
+
+
+def _run(factory, payload: bytes, consume) -> float:
+    """Отправляет payload через socketpair и замеряет время, за которое consume его вычитает."""
+    writer, reader = socket.socketpair()
+    feeder = threading.Thread(target=_feed, args=(writer, payload))
+    start = time.perf_counter()
+    feeder.start()
+    with reader:
+        consumed = consume(factory(reader))
+    elapsed = time.perf_counter() - start
+    feeder.join()
+    assert consumed == len(payload), (consumed, len(payload))
+    return elapsed
+
+
+def consume_lines(sio) -> int:
+    total = 0
+    while line := sio.readline():
+        total += len(line)
+    return total
+
+
+def consume_read(size: int):
+    def consume(sio) -> int:
+        total = 0
+        while data := sio.read(size):
+            total += len(data)
+        return total
+
+    return consume
+
+
+def consume_readinto(size: int):
+    def consume(sio) -> int:
+        buf = bytearray(size)
+        total = 0
+        while n := sio.readinto(buf):
+            total += n
+        return total
+
+    return consume
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--body-mb", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    head = (
+        b"GET /page?x=1 HTTP/1.1\r\nHost: localhost:9999\r\n"
+        b"User-Agent: Mozilla/5.0 (X11; Linux)\r\n"
+        b"Accept: text/html,application/xhtml+xml\r\nAccept-Language: ru,en;q=0.9\r\n"
+        b"Accept-Encoding: gzip, deflate, br\r\nConnection: keep-alive\r\n"
+        b"Cookie: session=0123456789abcdef0123456789abcdef\r\n\r\n"
+    )
+    headers_payload = head * args.requests
+    body_payload = bytes(args.body_mb * 1024 * 1024)
+
+    implementations = {
+        "baseline": BaselineSocketIO,
+        "recv_into": lambda sock: SocketIO(sock, Event()),
+    }
+    scenarios = {
+        f"readline, {args.requests} запросов": (headers_payload, consume_lines),
+        f"read(8 KiB), {args.body_mb} MiB": (body_payload, consume_read(8192)),
+        f"readinto(64 KiB), {args.body_mb} MiB": (body_payload, consume_readinto(65536)),
+        f"read({args.body_mb} MiB) одним вызовом": (body_payload, consume_read(len(body_payload))),
+    }
+
+    for name, (payload, consume) in scenarios.items():
+        print(f"{name}:")
+        for impl_name, factory in implementations.items():
+            elapsed = _run(factory, payload, consume)
+            throughput = len(payload) / elapsed / 1024 / 1024
+            print(f"  {impl_name:10s} {elapsed * 1000:9.1f} ms  {throughput:8.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
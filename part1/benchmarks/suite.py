@@ -0,0 +1,214 @@
+"""
+Набор бенчмарков для всех версий сервера из part1: каждая версия запускается на localhost,
+на неё подаётся нагрузка по сценариям, результаты (RPS, p50/p99/p99.9, RSS сервера)
+печатаются и сохраняются в JSON для сравнения между коммитами.
+Ранние версии (simple_tcp_server ... final_tcp_server) - эхо-серверы, для них свои сценарии.
+
+    uv run -m benchmarks.suite
+    uv run -m benchmarks.suite --variants wsgi-threads wsgi-eventloop --scenarios ping sleep
+    uv run -m benchmarks.suite --output before.json
+    uv run -m benchmarks.suite --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import partial
+
+import final_tcp_server.server
+import simple_tcp_server.server
+import tcp_server_with_graceful_shutdown.server
+import tcp_server_with_idle_timeout.server
+from asgi.app import app as asgi_app
+from asgi.server import ASGIServer
+from wsgi.app import app as wsgi_app
+from wsgi.server import PreforkWSGIServer, WSGIServer
+
+from .harness import HOST, PORT, process_tree_rss, running_server
+from .load import run_load
+
+
+@dataclass(frozen=True)
+class Variant:
+    """Версия сервера: factory(HOST, PORT, *args) и протокол, который она понимает."""
+
+    factory: Callable
+    args: tuple
+    protocol: str
+
+
+@dataclass(frozen=True)
+class Scenario:
+    protocol: str
+    path: str = "/"
+    method: str = "GET"
+    body: bytes = b""
+    keep_alive: bool = True
+    pipeline: int = 1
+
+
+VARIANTS = {
+    "simple_tcp_server": Variant(
+        simple_tcp_server.server.TCPServer, (simple_tcp_server.server.TCPEchoHandler(),), "echo"
+    ),
+    "tcp_server_with_idle_timeout": Variant(
+        tcp_server_with_idle_timeout.server.TCPServer,
+        (tcp_server_with_idle_timeout.server.TCPEchoHandler(),),
+        "echo",
+    ),
+    "tcp_server_with_graceful_shutdown": Variant(
+        tcp_server_with_graceful_shutdown.server.TCPServer,
+        (tcp_server_with_graceful_shutdown.server.TCPEchoHandler(),),
+        "echo",
+    ),
+    "final_tcp_server": Variant(
+        partial(final_tcp_server.server.TCPServer, concurrency="threads"),
+        (final_tcp_server.server.TCPEchoHandler(),),
+        "echo",
+    ),
+    "wsgi-sync": Variant(WSGIServer, (wsgi_app,), "http"),
+    "wsgi-threads": Variant(partial(WSGIServer, concurrency="threads"), (wsgi_app,), "http"),
+    "wsgi-eventloop": Variant(partial(WSGIServer, concurrency="eventloop"), (wsgi_app,), "http"),
+    "wsgi-prefork": Variant(
+        partial(PreforkWSGIServer, processes=os.cpu_count() or 1, concurrency="threads"),
+        (wsgi_app,),
+        "http",
+    ),
+    "asgi": Variant(ASGIServer, (asgi_app,), "http"),
+}
+
+SCENARIOS = {
+    # Эхо-серверы отвечают построчно (final_tcp_server читает SocketIO по строкам)
+    "echo": Scenario("echo", body=b"ping\n"),
+    "echo-close": Scenario("echo", body=b"ping\n", keep_alive=False),
+    "echo-64k": Scenario("echo", body=b"x" * (64 * 1024 - 1) + b"\n"),
+    "ping": Scenario("http", "/ping"),
+    "ping-close": Scenario("http", "/ping", keep_alive=False),
+    "ping-pipelined": Scenario("http", "/ping", pipeline=16),
+    "sleep": Scenario("http", "/sleep"),
+    "post": Scenario("http", "/post", "POST", b'{"name": "benchmark"}'),
+    "large-response": Scenario("http", "/large"),
+    "large-upload": Scenario("http", "/upload", "POST", b"x" * (1024 * 1024)),
+}
+
+
+def run_benchmark(variant: Variant, scenario: Scenario, clients: int, duration: float) -> dict:
+    """Один прогон: сервер в отдельном процессе, нагрузка, RSS сервера под нагрузкой."""
+    with running_server(variant.factory, HOST, PORT, *variant.args) as process:
+        result = run_load(
+            HOST,
+            PORT,
+            scenario.path,
+            clients,
+            duration,
+            keep_alive=scenario.keep_alive,
+            method=scenario.method,
+            body=scenario.body,
+            pipeline=scenario.pipeline,
+            protocol=scenario.protocol,
+        )
+        # Сервер ещё работает: RSS - память после нагрузки, пик - максимум за прогон
+        rss, peak_rss = process_tree_rss(process.pid)
+    return {
+        **result.to_dict(),
+        "rss_mib": round(rss / 1024 / 1024, 1),
+        "peak_rss_mib": round(peak_rss / 1024 / 1024, 1),
+    }
+
+
+def environment() -> dict:
+    """Где и на каком коммите получены результаты."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: list[dict], baseline: list[dict]):
+    """Изменение RPS и p99 относительно сохранённого прогона."""
+    previous = {(item["variant"], item["scenario"]): item for item in baseline}
+    print()
+    print("Сравнение с базовым прогоном:")
+    for item in results:
+        old = previous.get((item["variant"], item["scenario"]))
+        if old is None:
+            continue
+        rps_change = (item["rps"] / old["rps"] - 1) * 100 if old["rps"] else 0.0
+        p99_change = (item["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0.0
+        print(
+            f"  {item['variant']:34s} {item['scenario']:15s} | "
+            f"rps {old['rps']:9.1f} -> {item['rps']:9.1f} ({rps_change:+6.1f}%) | "
+            f"p99 {old['p99_ms']:7.2f} -> {item['p99_ms']:7.2f} ms ({p99_change:+6.1f}%)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--output", help="сохранить результаты в JSON-файл")
+    parser.add_argument("--compare", help="JSON-файл прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    results = []
+    for variant_name in args.variants:
+        variant = VARIANTS[variant_name]
+        for scenario_name in args.scenarios:
+            scenario = SCENARIOS[scenario_name]
+            if scenario.protocol != variant.protocol:
+                continue
+            started = time.perf_counter()
+            result = run_benchmark(variant, scenario, args.clients, args.duration)
+            results.append({"variant": variant_name, "scenario": scenario_name, **result})
+            print(
+                f"{variant_name:34s} {scenario_name:15s} | {result['rps']:9.1f} rps | "
+                f"p50 {result['p50_ms']:7.2f} | p99 {result['p99_ms']:7.2f} | "
+                f"p99.9 {result['p999_ms']:7.2f} ms | ошибок: {result['errors']:4d} | "
+                f"RSS {result['rss_mib']:6.1f} MiB | {time.perf_counter() - started:4.1f} с"
+            )
+
+    if args.output:
+        report = {
+            "environment": environment(),
+            "parameters": {"clients": args.clients, "duration": args.duration},
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline)["results"])
+
+
+if __name__ == "__main__":
+    main()
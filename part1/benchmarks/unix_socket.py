@@ -0,0 +1,62 @@
+"""
+/ping через unix domain socket против TCP на loopback: unix-сокет не проходит через
+TCP/IP стек ядра (нет сегментов, контрольных сумм, handshake), поэтому за локальным
+прокси он дешевле и на запрос, и особенно на установку соединения.
+
+    uv run -m benchmarks.unix_socket
+    uv run -m benchmarks.unix_socket --concurrency eventloop --clients 16
+"""
+
+import argparse
+import os
+import tempfile
+from functools import partial
+
+from wsgi.app import app
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--path", default="/ping")
+    parser.add_argument("--concurrency", default="threads", choices=["threads", "eventloop"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    unix_path = os.path.join(tempfile.gettempdir(), f"benchmark-{os.getpid()}.sock")
+    listeners = (("tcp", f"tcp:{HOST}:{PORT}", None), ("unix", f"unix:{unix_path}", unix_path))
+    try:
+        for keep_alive in (True, False):
+            print(f"{args.path}, {'keep-alive' if keep_alive else 'соединение на запрос'}:")
+            for name, listener, unix_socket in listeners:
+                server_factory = partial(
+                    WSGIServer,
+                    concurrency=args.concurrency,
+                    workers=args.workers,
+                    listener=listener,
+                )
+                with running_server(server_factory, HOST, PORT, app, unix_socket=unix_socket):
+                    result = run_load(
+                        HOST,
+                        PORT,
+                        args.path,
+                        args.clients,
+                        args.duration,
+                        keep_alive=keep_alive,
+                        unix_socket=unix_socket,
+                    )
+                print(f"  {name:5s} | {result.summary()}")
+    finally:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+
+
+if __name__ == "__main__":
+    main()
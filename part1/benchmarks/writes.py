@@ -0,0 +1,46 @@
+"""
+Маленькие ответы: заголовки и тело одним sendmsg() против sendall() на каждый чанк.
+
+    uv run -m benchmarks.writes
+    uv run -m benchmarks.writes --concurrency eventloop --clients 64
+"""
+
+import argparse
+from functools import partial
+
+from wsgi.app import app
+from wsgi.server import WSGIServer
+
+from .harness import HOST, PORT, running_server
+from .load import run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", nargs="+", default=["/ping", "/page"])
+    parser.add_argument("--concurrency", default="threads")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    variants = {
+        "sendall по чанкам": 0,
+        "sendmsg (64 KiB)": 64 * 1024,
+    }
+    for path in args.paths:
+        print(f"{path}:")
+        for name, threshold in variants.items():
+            server_factory = partial(
+                WSGIServer,
+                concurrency=args.concurrency,
+                workers=args.workers,
+                write_coalesce_threshold=threshold,
+            )
+            with running_server(server_factory, HOST, PORT, app):
+                result = run_load(HOST, PORT, path, args.clients, args.duration)
+            print(f"  {name:18s} | {result.summary()}")
+
+
+if __name__ == "__main__":
+    main()
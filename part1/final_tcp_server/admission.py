@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class AdmissionController:
+    """
+    Контроль допуска: сколько соединений сервер берёт в работу одновременно
+    (ждут воркера + обрабатываются). Соединения сверх лимита не копятся в очереди,
+    а сразу получают короткий отказ (у HTTP - 503 с Retry-After) и закрываются.
+
+    Лимит подстраивается по AIMD (как окно TCP) по времени ожидания в очереди -
+    той части задержки, которую создаёт сама перегрузка, а не приложение:
+    пока соединения ждут воркера меньше queue_wait_target, лимит растёт на 1 за "окно"
+    (на 1/limit за каждое соединение), как только ожидание превысило цель - лимит
+    уменьшается пропорционально превышению (градиент queue_wait_target / ожидание,
+    но не меньше чем вдвое и не слабее backoff). Как и TCP, уменьшаем не чаще раза за окно:
+    соединения, вставшие в очередь до прошлого уменьшения, отражают старый лимит.
+    Так очередь остаётся короткой, а p99 принятых запросов - близким к времени обработки.
+
+    Соединение, которое всё же прождало воркера дольше max_queue_wait (например, лимит
+    ещё не успел снизиться после всплеска), тоже получает отказ вместо обработки:
+    клиент, скорее всего, уже не ждёт ответа, а повторить запрос через Retry-After дешевле.
+
+    Все методы потокобезопасны. В pre-fork режиме у каждого воркера свой лимит.
+    """
+
+    def __init__(
+        self,
+        max_queue_wait: float = 1.0,
+        queue_wait_target: float = 0.05,
+        min_limit: int = 1,
+        max_limit: int | None = None,
+        initial_limit: int | None = None,
+        backoff: float = 0.9,
+        retry_after: int = 1,
+    ):
+        if min_limit < 1:
+            raise ValueError("min_limit должен быть >= 1")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff должен быть в интервале (0, 1)")
+        self.max_queue_wait = max_queue_wait
+        self.queue_wait_target = queue_wait_target
+        self.min_limit = min_limit
+        # None - ёмкость сервера (workers + accept_queue_size), её выставляет TCPServer
+        self.max_limit = max_limit
+        self.initial_limit = initial_limit
+        self.backoff = backoff
+        # Значение заголовка Retry-After в секундах
+        self.retry_after = retry_after
+
+        self.limit = float(initial_limit or max_limit or min_limit)
+        self.in_flight = 0
+        self.rejected = 0
+        self.decreased_at = 0.0
+        self.lock = threading.Lock()
+
+    def set_capacity(self, capacity: int):
+        """Верхняя граница лимита по умолчанию - сколько соединений сервер держит в работе."""
+        if self.max_limit is None:
+            self.max_limit = capacity
+        self.max_limit = max(self.max_limit, self.min_limit)
+        self.limit = float(
+            min(max(self.initial_limit or self.max_limit, self.min_limit), self.max_limit)
+        )
+
+    def try_admit(self) -> bool:
+        """Берёт соединение в работу, если лимит позволяет. False - соединению нужно отказать."""
+        with self.lock:
+            # Дробная часть - накопленный аддитивный рост: новое место появляется,
+            # только когда лимит дорос до следующего целого
+            if self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def start(self, queue_wait: float) -> bool:
+        """
+        Воркер взял соединение: учитываем, сколько оно ждало.
+        False - ждало дольше max_queue_wait, обрабатывать его не нужно.
+        """
+        with self.lock:
+            if queue_wait > self.queue_wait_target:
+                now = time.monotonic()
+                if now - queue_wait >= self.decreased_at:
+                    factor = max(0.5, min(self.backoff, self.queue_wait_target / queue_wait))
+                    self.limit = max(self.min_limit, self.limit * factor)
+                    self.decreased_at = now
+            elif self.max_limit is None or self.limit < self.max_limit:
+                self.limit += 1 / self.limit
+                if self.max_limit is not None and self.limit > self.max_limit:
+                    self.limit = float(self.max_limit)
+            if queue_wait > self.max_queue_wait:
+                self.rejected += 1
+                return False
+            return True
+
+    def release(self):
+        """Соединение обработано (или отклонено после try_admit)."""
+        with self.lock:
+            self.in_flight -= 1
@@ -0,0 +1,148 @@
+import logging
+import queue
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from .admission import AdmissionController
+from .interface import DispatcherI
+
+RequestHandler = Callable[[socket.socket, tuple], None]
+
+
+class SyncDispatcher(DispatcherI):
+    """Обрабатывает соединения прямо в потоке, который их принял."""
+
+    multithread = False
+
+    def __init__(
+        self,
+        handle: RequestHandler,
+        workers: int = 1,
+        queue_size: int = 0,
+        admission: AdmissionController | None = None,
+        reject: RequestHandler | None = None,
+    ):
+        # Очереди нет, поэтому и контроль допуска не нужен: accept() и есть обработка
+        self.handle = handle
+
+    def start(self):
+        pass
+
+    def acquire_slot(self, timeout: float | None) -> bool:
+        return True
+
+    def release_slot(self):
+        pass
+
+    def saturated(self) -> bool:
+        return False
+
+    def submit(self, client_socket: socket.socket, addr, queued_at: float | None = None):
+        self.handle(client_socket, addr)
+
+    def shutdown(self):
+        pass
+
+
+class ThreadPoolDispatcher(DispatcherI):
+    """
+    Ограниченный пул потоков.
+    Принятые сокеты попадают в очередь, откуда их забирают воркеры.
+    Общее число соединений "в работе" (обрабатываются + ждут в очереди)
+    ограничено workers + queue_size: когда слотов нет, сервер перестаёт вызывать accept(),
+    и новые соединения ждут в backlog ядра.
+    С admission воркер сообщает контроллеру, сколько соединение ждало в очереди,
+    и слишком долго ждавшее передаёт в reject вместо handle.
+    """
+
+    multithread = True
+
+    def __init__(
+        self,
+        handle: RequestHandler,
+        workers: int = 8,
+        queue_size: int = 16,
+        admission: AdmissionController | None = None,
+        reject: RequestHandler | None = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers должен быть >= 1")
+        self.handle = handle
+        self.workers = workers
+        self.admission = admission
+        self.reject = reject
+        # (сокет, адрес, момент постановки в очередь по time.monotonic())
+        self.queue: queue.SimpleQueue[tuple[socket.socket, tuple, float] | None] = (
+            queue.SimpleQueue()
+        )
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.threads: list[threading.Thread] = []
+        # Сколько воркеров ждут соединения в queue.get()
+        self.idle_workers = 0
+        self.idle_lock = threading.Lock()
+
+    def start(self):
+        # Потоки стартуем только в serve_forever, а не в __init__,
+        # чтобы сервер можно было безопасно форкать до запуска
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"worker-{i}")
+            thread.start()
+            self.threads.append(thread)
+
+    def acquire_slot(self, timeout: float | None) -> bool:
+        return self.slots.acquire(timeout=timeout)
+
+    def release_slot(self):
+        self.slots.release()
+
+    def saturated(self) -> bool:
+        # Просто непустая очередь - ещё не перегрузка: только что поставленное соединение
+        # может быть не забрано свободным воркером
+        return self.queue.qsize() > self.idle_workers
+
+    def submit(self, client_socket: socket.socket, addr, queued_at: float | None = None):
+        self.queue.put((client_socket, addr, time.monotonic() if queued_at is None else queued_at))
+
+    def _worker(self):
+        admission = self.admission
+        while True:
+            with self.idle_lock:
+                self.idle_workers += 1
+            item = self.queue.get()
+            with self.idle_lock:
+                self.idle_workers -= 1
+            if item is None:
+                break
+            client_socket, addr, queued_at = item
+            try:
+                if admission is None or admission.start(time.monotonic() - queued_at):
+                    self.handle(client_socket, addr)
+                else:
+                    self.reject(client_socket, addr)
+            finally:
+                if admission is not None:
+                    admission.release()
+                self.release_slot()
+
+    def shutdown(self):
+        """
+        Дожидаемся обработки всех принятых соединений.
+        Стоп-маркеры встают в очередь после уже принятых сокетов,
+        поэтому воркеры сначала разберут очередь, а потом завершатся.
+        """
+        logging.info(f"Python: ожидаю завершения {len(self.threads)} воркеров")
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads.clear()
+
+
+DISPATCHERS: dict[str, type[DispatcherI]] = {
+    "sync": SyncDispatcher,
+    "threads": ThreadPoolDispatcher,
+    # Event loop принимает соединения сам, а обработчики запускает в пуле потоков
+    "eventloop": ThreadPoolDispatcher,
+}
@@ -0,0 +1,334 @@
+import contextlib
+import logging
+import selectors
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .socket_io import ConnectionParkedError, SocketIO
+from .timer_wheel import Timer
+
+if TYPE_CHECKING:
+    from .server import TCPServer
+
+
+@dataclass(eq=False)
+class Connection:
+    socket: socket.socket
+    addr: tuple
+    socket_io: SocketIO
+    # Таймаут простоя в колесе таймеров сервера
+    idle_timer: Timer | None = None
+    # Соединение ждёт данных в event loop (а не обрабатывается воркером)
+    idle: bool = True
+    # Соединение уже обслужило запрос и ждёт следующего (keep-alive)
+    keepalive: bool = False
+    # С какого момента соединение с пришедшими данными ждёт воркера
+    queued_at: float = 0.0
+
+
+class EventLoop:
+    """
+    Неблокирующий цикл событий на selectors (epoll в Linux).
+
+    Один поток мультиплексирует слушающий сокет и все простаивающие соединения.
+    Как только в соединении появляются данные, оно передаётся в пул потоков,
+    где обработчик TCPHandlerI работает как обычно.
+    Когда обработчик дочитал всё, что прислал клиент, и ждёт следующего сообщения,
+    SocketIO "паркует" соединение - оно возвращается в цикл и не занимает поток.
+
+    Таймауты простоя стоят в общем колесе таймеров сервера (постановка и отмена - O(1)):
+    сработавший таймер будит цикл через waker, сам цикл таймауты не отсчитывает.
+
+    Простаивающие keep-alive соединения дополнительно хранятся в порядке LRU: когда их больше
+    max_keepalive_connections, первыми закрываются те, что простаивают дольше всех.
+    Так число открытых дескрипторов остаётся ограниченным при любом числе клиентов.
+
+    При max_connections открытых соединений новому клиенту уступает место самое давно
+    простаивающее keep-alive соединение; если таких нет, цикл снимает слушающий сокет
+    с опроса, пока какое-нибудь соединение не закроется или не начнёт простаивать.
+    С контролем допуска (AdmissionController) соединение с пришедшими данными сверх лимита
+    и соединение, прождавшее воркера дольше max_queue_wait, получают отказ (503) прямо из цикла.
+    """
+
+    def __init__(self, server: "TCPServer"):
+        self.server = server
+        # Selector и waker создаются в run(): в pre-fork режиме цикл запускается в воркере,
+        # а epoll, созданный до fork, был бы общим для всех воркеров
+        self.selector: selectors.BaseSelector | None = None
+        self.connections: dict[int, Connection] = {}
+        # Соединения, вернувшиеся от воркеров, и соединения, которым не хватило воркера
+        self.returned: deque[Connection] = deque()
+        # Цикл завершается: воркеры больше не возвращают соединения, а закрывают их сами
+        self.closing = False
+        self.returned_lock = threading.Lock()
+        # Соединения, чей таймаут простоя сработал в потоке колеса таймеров
+        self.expired: deque[Connection] = deque()
+        self.pending: deque[Connection] = deque()
+        # Простаивающие keep-alive соединения, от давно простаивающих к недавним
+        self.keepalive_idle: OrderedDict[Connection, None] = OrderedDict()
+        # Слушающий сокет зарегистрирован в selector (снимается при max_connections)
+        self.accepting = True
+        self.waker_r: socket.socket | None = None
+        self.waker_w: socket.socket | None = None
+
+    def run(self):
+        self.selector = selectors.DefaultSelector()
+        self.waker_r, self.waker_w = socket.socketpair()
+        server_socket = self.server.server_socket
+        server_socket.setblocking(False)
+        self.waker_r.setblocking(False)
+        self.waker_w.setblocking(False)
+        self.selector.register(server_socket, selectors.EVENT_READ, None)
+        self.selector.register(self.waker_r, selectors.EVENT_READ, None)
+
+        # Сигнал завершения пишет байт в waker - select() просыпается сразу
+        try:
+            old_wakeup_fd = signal.set_wakeup_fd(self.waker_w.fileno())
+            max_timeout = None
+        except ValueError:
+            # Не главный поток: сигналы нас не разбудят, проверяем флаг периодически
+            old_wakeup_fd = None
+            max_timeout = self.server.poll_interval
+
+        try:
+            while not self.server.shutdown_event.is_set():
+                timeout = self._next_timeout()
+                if max_timeout is not None:
+                    timeout = max_timeout if timeout is None else min(timeout, max_timeout)
+
+                for key, _ in self.selector.select(timeout):
+                    if key.fileobj is server_socket:
+                        self._accept(server_socket)
+                    elif key.fileobj is self.waker_r:
+                        self._drain_waker()
+                    else:
+                        self._dispatch(key.data)
+
+                self._process_returned()
+                self._process_pending()
+                self._shed_pending()
+                self._process_expired()
+                self._resume_accept()
+                self.server._check_restart()
+        finally:
+            if old_wakeup_fd is not None:
+                signal.set_wakeup_fd(old_wakeup_fd)
+            self._close_idle()
+
+    def serve_connection(self, client_socket: socket.socket, _addr):
+        """Выполняется в потоке-воркере: запускает обработчик на соединении."""
+        conn = self.connections[client_socket.fileno()]
+        socket_io = conn.socket_io
+        try:
+            data = self.server.handler.handle(socket_io)
+            self.server.send_to_client(conn.socket, self._mark_boundaries(data, socket_io))
+        except ConnectionParkedError:
+            pass
+        except Exception:
+            self.server.handle_error(conn.socket, conn.addr)
+            socket_io.parked = False
+
+        with self.returned_lock:
+            park = socket_io.parked and not self.closing and not self.server.shutdown_event.is_set()
+            if park:
+                self.returned.append(conn)
+        if not park:
+            self._forget(conn)
+            self.server.shutdown_request(conn.socket)
+        self._wake()
+
+    def reject_connection(self, client_socket: socket.socket, addr):
+        """Выполняется в потоке-воркере: соединение слишком долго ждало в очереди пула."""
+        self._forget(self.connections[client_socket.fileno()])
+        self.server.reject_connection(client_socket, addr)
+        self._wake()
+
+    def _mark_boundaries(self, data: Iterator, socket_io: SocketIO) -> Iterator:
+        """После отправки каждого чанка ответа соединение можно парковать."""
+        for chunk in data:
+            yield chunk
+            socket_io.at_boundary = True
+
+    def _accept(self, server_socket: socket.socket):
+        # За одно пробуждение принимаем все соединения из очереди ядра
+        while True:
+            at_limit = not self.server.below_connection_limit()
+            if at_limit and not self.keepalive_idle:
+                # Остальные подождут в backlog ядра, пока какое-нибудь соединение
+                # не закроется или не начнёт простаивать
+                self.selector.unregister(server_socket)
+                self.accepting = False
+                return
+            try:
+                client_socket, addr = server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            if at_limit:
+                # Клиент действительно ждал: место ему уступает самое давно простаивающее
+                conn, _ = self.keepalive_idle.popitem(last=False)
+                logging.debug(f"Python: лимит соединений, закрываю простаивающее {conn.addr}")
+                self._close(conn)
+            if self.server.tcp_nodelay:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.server._count_accept()
+            socket_io = self.server._create_socket_io(client_socket, park_when_idle=True)
+            conn = Connection(client_socket, addr, socket_io)
+            self.connections[client_socket.fileno()] = conn
+            self._watch(conn, self.server.client_idle_timeout)
+
+    def _resume_accept(self):
+        if not self.accepting and (self.keepalive_idle or self.server.below_connection_limit()):
+            self.selector.register(self.server.server_socket, selectors.EVENT_READ, None)
+            self.accepting = True
+
+    def _watch(self, conn: Connection, timeout: float):
+        """Переводит соединение в режим ожидания данных в цикле."""
+        conn.idle = True
+        conn.idle_timer = self.server.timers.schedule(timeout, self._on_idle_timeout, conn)
+        self.selector.register(conn.socket, selectors.EVENT_READ, conn)
+        if conn.keepalive:
+            self.keepalive_idle[conn] = None
+
+    def _dispatch(self, conn: Connection):
+        """В соединении появились данные - отдаём его воркеру."""
+        self.selector.unregister(conn.socket)
+        conn.idle = False
+        self.server.timers.cancel(conn.idle_timer)
+        self.keepalive_idle.pop(conn, None)
+        admission = self.server.admission
+        if admission is not None and not admission.try_admit():
+            self._forget(conn)
+            self.server.reject_connection(conn.socket, conn.addr)
+            return
+        conn.queued_at = time.monotonic()
+        if self.server.dispatcher.acquire_slot(0):
+            self._submit(conn)
+        else:
+            # Все воркеры заняты: соединение подождёт свободного без опроса сокета
+            self.pending.append(conn)
+
+    def _submit(self, conn: Connection):
+        conn.socket_io.resume()
+        self.server.dispatcher.submit(conn.socket, conn.addr, conn.queued_at)
+
+    def _process_returned(self):
+        while self.returned:
+            conn = self.returned.popleft()
+            # Если в буфере начало следующего сообщения, клиент его ещё досылает - это не простой
+            conn.keepalive = not conn.socket_io.buffered
+            if conn.keepalive:
+                self._watch(conn, self.server.keepalive_timeout)
+            else:
+                self._watch(conn, self.server.client_idle_timeout)
+        self._limit_keepalive()
+
+    def _limit_keepalive(self):
+        """Закрывает самые давно простаивающие keep-alive соединения сверх лимита."""
+        limit = self.server.max_keepalive_connections
+        if limit is None:
+            return
+        while len(self.keepalive_idle) > limit:
+            conn, _ = self.keepalive_idle.popitem(last=False)
+            logging.debug(f"Python: лимит keep-alive соединений, закрываю {conn.addr}")
+            self._close(conn)
+
+    def _process_pending(self):
+        while self.pending and self.server.dispatcher.acquire_slot(0):
+            self._submit(self.pending.popleft())
+
+    def _shed_pending(self):
+        """Отказывает соединениям, которые ждут свободного воркера дольше max_queue_wait."""
+        admission = self.server.admission
+        if admission is None:
+            return
+        now = time.monotonic()
+        # Очередь в порядке поступления: достаточно смотреть на начало
+        while self.pending and now - self.pending[0].queued_at >= admission.max_queue_wait:
+            conn = self.pending.popleft()
+            admission.start(now - conn.queued_at)
+            admission.release()
+            self._forget(conn)
+            self.server.reject_connection(conn.socket, conn.addr)
+
+    def _next_timeout(self) -> float | None:
+        admission = self.server.admission
+        if not self.pending or admission is None:
+            return None
+        # Проснуться, чтобы отказать первому в очереди, даже если воркеры так и не освободятся
+        shed_at = self.pending[0].queued_at + admission.max_queue_wait
+        return max(0.0, shed_at - time.monotonic())
+
+    def _on_idle_timeout(self, conn: Connection):
+        """Колбэк колеса таймеров (в его потоке): закрывать соединение будет сам цикл."""
+        self.expired.append(conn)
+        self._wake()
+
+    def _process_expired(self):
+        while self.expired:
+            conn = self.expired.popleft()
+            # Таймер устарел: пока он срабатывал, соединение успело уйти воркеру
+            # (и, возможно, снова вернуться в цикл с новым таймером) или закрыться
+            if not conn.idle or not conn.idle_timer.expired:
+                continue
+            if conn.socket_io.buffered:
+                # Клиент начал запрос и замолчал: как и в режимах sync и threads,
+                # ответ (408) отправляет обработчик в воркере
+                conn.socket_io.expire()
+                self._dispatch(conn)
+                continue
+            logging.debug(f"Python: закрываю простаивающее соединение {conn.addr}")
+            self.keepalive_idle.pop(conn, None)
+            self._close(conn)
+
+    def _close(self, conn: Connection):
+        """Закрывает соединение, ждущее данных в цикле."""
+        conn.idle = False
+        self.server.timers.cancel(conn.idle_timer)
+        self.selector.unregister(conn.socket)
+        self._forget(conn)
+        self.server.shutdown_request(conn.socket)
+
+    def _close_idle(self):
+        """
+        Graceful shutdown: перестаём принимать соединения и закрываем простаивающие.
+        Соединения, которые обрабатываются воркерами, закроются после ответа.
+        Ожидающие свободного воркера всё же обрабатываются - запрос от них уже пришёл.
+        """
+        if self.accepting:
+            self.selector.unregister(self.server.server_socket)
+        # Соединения, вернувшиеся от воркеров после последнего прохода цикла
+        with self.returned_lock:
+            self.closing = True
+        while self.returned:
+            conn = self.returned.popleft()
+            self._forget(conn)
+            self.server.shutdown_request(conn.socket)
+        for key in list(self.selector.get_map().values()):
+            conn = key.data
+            if isinstance(conn, Connection):
+                self._close(conn)
+        self.keepalive_idle.clear()
+        while self.pending:
+            self.server.dispatcher.acquire_slot(None)
+            self._submit(self.pending.popleft())
+
+    def _forget(self, conn: Connection):
+        self.connections.pop(conn.socket.fileno(), None)
+
+    def _wake(self):
+        # Буфер полон - цикл и так проснётся
+        with contextlib.suppress(OSError):
+            self.waker_w.send(b"\0")
+
+    def _drain_waker(self):
+        try:
+            while self.waker_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
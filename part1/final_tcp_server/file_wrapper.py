@@ -0,0 +1,68 @@
+import os
+
+
+class FileWrapper:
+    """
+    Файл (или его диапазон) как элемент ответа.
+    TCPServer.send_to_client отправляет его через socket.sendfile(): данные идут
+    из page cache ядра прямо в сокет, не копируясь в память процесса.
+    Для клиентов, которые просто итерируются по ответу, ведёт себя как обычный
+    итератор чанков по blksize байт (интерфейс wsgi.file_wrapper из PEP 3333).
+    """
+
+    def __init__(self, filelike, blksize: int = 8192):
+        self.filelike = filelike
+        self.blksize = blksize
+        # Отправляемый диапазон: count=None - до конца файла
+        self.offset = 0
+        self.count: int | None = None
+        # Текущая позиция при отдаче файла итерацией
+        self.position: int | None = None
+        if hasattr(filelike, "close"):
+            self.close = filelike.close
+
+    def size(self) -> int | None:
+        """Размер отправляемых данных, если файл обычный и его длину можно узнать."""
+        try:
+            file_size = os.fstat(self.filelike.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            return None
+        remaining = max(0, file_size - self.offset)
+        return remaining if self.count is None else min(self.count, remaining)
+
+    def set_range(self, offset: int, count: int | None):
+        self.offset = offset
+        self.count = count
+        self.position = None
+
+    # Совместимость с werkzeug: при Range-запросе он позиционирует файл через seek()
+    def seekable(self) -> bool:
+        return hasattr(self.filelike, "seek")
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.offset = self.filelike.seek(offset, whence)
+        self.position = None
+        return self.offset
+
+    def tell(self) -> int:
+        return self.offset if self.position is None else self.position
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        if self.position is None:
+            self.position = self.offset
+            if self.offset:
+                self.filelike.seek(self.offset)
+
+        size = self.blksize
+        if self.count is not None:
+            size = min(size, self.offset + self.count - self.position)
+            if size <= 0:
+                raise StopIteration
+        data = self.filelike.read(size)
+        if not data:
+            raise StopIteration
+        self.position += len(data)
+        return data
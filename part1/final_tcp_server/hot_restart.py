@@ -0,0 +1,78 @@
+import contextlib
+import logging
+import os
+import select
+import socket
+import subprocess
+import sys
+
+from .listeners import format_address
+
+# Номер унаследованного дескриптора слушающего сокета
+LISTEN_FD_ENV = "PYTHON_SERVER_LISTEN_FD"
+# Дескриптор pipe, в который новое поколение сообщает о готовности
+READY_FD_ENV = "PYTHON_SERVER_READY_FD"
+
+
+def inherited_socket() -> socket.socket | None:
+    """Слушающий сокет, полученный от предыдущего поколения (None - запуск с нуля)."""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is None:
+        return None
+    # Семейство и тип socket() определит по самому дескриптору
+    server_socket = socket.socket(fileno=int(fd))
+    logging.info(f"Python: унаследован слушающий сокет fd={fd} {format_address(server_socket)}")
+    return server_socket
+
+
+def notify_ready():
+    """Сообщает предыдущему поколению, что новое принимает соединения."""
+    fd = os.environ.pop(READY_FD_ENV, None)
+    if fd is None:
+        return
+    # Старое поколение может уже не ждать
+    with contextlib.suppress(OSError):
+        os.write(int(fd), b"1")
+    os.close(int(fd))
+
+
+def spawn_generation(server_socket: socket.socket, timeout: float) -> bool:
+    """
+    Перезапуск без простоя: запускает ту же команду (sys.orig_argv) заново и передаёт ей
+    слушающий сокет через pass_fds, номер дескриптора - в переменной окружения.
+    Новое поколение не делает bind(), а берёт готовый сокет: соединения, пришедшие
+    во время перезапуска, ждут в общем backlog ядра, и отказов в подключении нет.
+    Ждём, пока новое поколение напишет байт в pipe готовности (не дольше timeout секунд).
+    False - новое поколение не поднялось (например, ошибка в новом коде): оно остановлено,
+    а старое продолжает работать.
+    """
+    ready_r, ready_w = os.pipe()
+    listen_fd = server_socket.fileno()
+    env = {**os.environ, LISTEN_FD_ENV: str(listen_fd), READY_FD_ENV: str(ready_w)}
+    command = [sys.executable, *sys.orig_argv[1:]]
+    try:
+        process = subprocess.Popen(command, env=env, pass_fds=(listen_fd, ready_w))
+    except OSError:
+        logging.exception("Python: не удалось запустить новое поколение сервера")
+        os.close(ready_r)
+        os.close(ready_w)
+        return False
+    # Наша копия конца для записи не нужна: если новое поколение умрёт, read() вернёт EOF
+    os.close(ready_w)
+    logging.info(f"Python: запущено новое поколение сервера (pid={process.pid}), жду готовности")
+
+    try:
+        ready, _, _ = select.select([ready_r], [], [], timeout)
+        if ready and os.read(ready_r, 1) == b"1":
+            logging.info(f"Python: новое поколение (pid={process.pid}) принимает соединения")
+            return True
+    finally:
+        os.close(ready_r)
+
+    logging.error(
+        f"Python: новое поколение (pid={process.pid}) не поднялось за {timeout} с, "
+        f"продолжаю работать"
+    )
+    process.terminate()
+    process.wait()
+    return False
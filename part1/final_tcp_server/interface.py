@@ -1,13 +1,26 @@
+import socket
 from collections.abc import Iterator
 from typing import Protocol
 
+from .file_wrapper import FileWrapper
 from .socket_io import SocketIO
 
 
 class TCPHandlerI(Protocol):
-    def handle(self, data: SocketIO) -> Iterator[bytes]:
+    def handle(self, data: SocketIO) -> Iterator[bytes | list[bytes] | FileWrapper]:
+        """
+        Элементы ответа: bytes, список буферов (отправляется одним sendmsg())
+        или FileWrapper (отправляется через sendfile()).
+        """
         raise NotImplementedError()
 
+    def overload_response(self, retry_after: int) -> bytes:
+        """
+        Ответ клиенту, которому сервер отказал из-за перегрузки (у HTTP - 503).
+        retry_after - через сколько секунд стоит повторить запрос. b"" - просто закрыть.
+        """
+        return b""
+
 
 class TCPServerI(Protocol):
     def __init__(
@@ -21,3 +34,36 @@ class TCPServerI(Protocol):
     def serve_forever(self):
         """Запуск сервера."""
         raise NotImplementedError()
+
+
+class DispatcherI(Protocol):
+    """Стратегия распределения принятых соединений по обработчикам."""
+
+    multithread: bool
+
+    def start(self):
+        """Запуск воркеров (вызывается из serve_forever)."""
+        raise NotImplementedError()
+
+    def acquire_slot(self, timeout: float | None) -> bool:
+        """Резервирует место под новое соединение. False - все воркеры заняты."""
+        raise NotImplementedError()
+
+    def release_slot(self):
+        """Возвращает зарезервированное место, если соединение так и не было принято."""
+        raise NotImplementedError()
+
+    def saturated(self) -> bool:
+        """Принятых соединений в очереди больше, чем свободных воркеров."""
+        raise NotImplementedError()
+
+    def submit(self, client_socket: socket.socket, addr, queued_at: float | None = None):
+        """
+        Передаёт принятое соединение на обработку.
+        queued_at - с какого момента (time.monotonic()) соединение ждёт воркера, None - сейчас.
+        """
+        raise NotImplementedError()
+
+    def shutdown(self):
+        """Дожидается обработки всех принятых соединений."""
+        raise NotImplementedError()
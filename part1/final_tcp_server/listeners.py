@@ -0,0 +1,107 @@
+import logging
+import os
+import socket
+import stat
+
+# systemd передаёт сокеты, начиная с этого дескриптора (sd_listen_fds(3))
+SD_LISTEN_FDS_START = 3
+
+
+def create_listener(spec: str, reuse_port: bool = False) -> socket.socket:
+    """
+    Слушающий сокет по описанию:
+    tcp:host:port - TCP (IPv6-адрес - в квадратных скобках: tcp:[::1]:8000),
+    unix:/path - unix domain socket: без TCP/IP стека ядра, быстрее loopback за локальным прокси,
+    systemd или systemd:имя - сокет, переданный через socket activation (LISTEN_FDS).
+    """
+    kind, _, address = spec.partition(":")
+    if kind == "tcp":
+        host, _, port = address.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Ожидается tcp:host:port, получено {spec!r}")
+        return _tcp_listener(host.strip("[]"), int(port), reuse_port)
+    if reuse_port:
+        raise ValueError("reuse_port поддерживается только для tcp-сокетов")
+    if kind == "unix":
+        if not address:
+            raise ValueError(f"Ожидается unix:/путь, получено {spec!r}")
+        return _unix_listener(address)
+    if kind == "systemd":
+        return systemd_listener(address or None)
+    raise ValueError(f"Неизвестный тип слушающего сокета: {spec!r}")
+
+
+def is_tcp(sock: socket.socket) -> bool:
+    """TCP-опции (TCP_NODELAY, SO_REUSEPORT) имеют смысл только для AF_INET/AF_INET6."""
+    return sock.family in (socket.AF_INET, socket.AF_INET6)
+
+
+def format_address(sock: socket.socket) -> str:
+    address = sock.getsockname()
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return f"unix:{address}"
+
+
+def _tcp_listener(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    server_socket = socket.socket(family=family, type=socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # Несколько сокетов могут слушать один порт, ядро распределяет между ними соединения
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    server_socket.bind((host, port))
+    return server_socket
+
+
+def _unix_listener(path: str) -> socket.socket:
+    # Файл сокета остаётся после остановки сервера. Удаляем его, только если
+    # никто не принимает на нём соединения - иначе путь занят работающим сервером
+    try:
+        is_socket = stat.S_ISSOCK(os.stat(path).st_mode)
+    except FileNotFoundError:
+        is_socket = False
+    if is_socket:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+        else:
+            raise OSError(f"Сокет {path} уже занят работающим сервером")
+        finally:
+            probe.close()
+
+    server_socket = socket.socket(family=socket.AF_UNIX, type=socket.SOCK_STREAM)
+    server_socket.bind(path)
+    return server_socket
+
+
+def systemd_listener(name: str | None = None) -> socket.socket:
+    """
+    Сокет, открытый systemd (socket activation): порт привязывает systemd, и соединения
+    копятся в backlog, даже пока сервис перезапускается. name выбирает сокет
+    по LISTEN_FDNAMES (FileDescriptorName= в .socket-юните), None - первый.
+    Переменные окружения удаляются, чтобы их не унаследовали дочерние процессы.
+    """
+    listen_pid = os.environ.pop("LISTEN_PID", None)
+    count = int(os.environ.pop("LISTEN_FDS", "0"))
+    names = os.environ.pop("LISTEN_FDNAMES", "").split(":")
+    if listen_pid is not None and int(listen_pid) != os.getpid():
+        # Переменные предназначены другому процессу (например, нашему родителю)
+        count = 0
+    if not count:
+        raise ValueError("systemd не передал сокеты (LISTEN_FDS)")
+
+    fds = range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + count)
+    if name is None:
+        fd = fds[0]
+    elif name in names[:count]:
+        fd = fds[names.index(name)]
+    else:
+        raise ValueError(f"Среди сокетов systemd нет {name!r}: {names[:count]}")
+
+    # systemd может передать и TCP-, и unix-сокет: socket(fileno=...) узнаёт это у ядра
+    server_socket = socket.socket(fileno=fd)
+    logging.info(f"Python: сокет от systemd fd={fd} {format_address(server_socket)}")
+    return server_socket
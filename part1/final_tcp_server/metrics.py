@@ -0,0 +1,246 @@
+import threading
+import time
+from collections.abc import Iterable
+
+# Фазы обработки запроса: разбор заголовков и тела, приложение, формирование и отправка ответа
+PHASES = ("parse", "app", "write")
+
+# Гистограмма задержек в стиле HDR: на каждую степень двойки микросекунд приходится
+# 2**SUB_BUCKET_BITS линейных корзин, относительная погрешность - не больше 1/8 (12.5%)
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Значения больше 2**MAX_VALUE_BITS мкс (~71 минута) попадают в последнюю корзину
+MAX_VALUE_BITS = 32
+BUCKETS = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+# Границы le для Prometheus - степени двойки микросекунд (от 16 мкс до ~33 с):
+# они совпадают с границами корзин, поэтому кумулятивные счётчики точные
+EXPORTED_EXPONENTS = range(4, 26)
+
+
+def _bucket_index(value: int) -> int:
+    """Номер корзины для значения в микросекундах."""
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+    return index if index < BUCKETS else BUCKETS - 1
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """Верхняя (не включительная) граница корзины в микросекундах."""
+    if index < SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    Лог-линейная гистограмма задержек (как HdrHistogram): запись - одно вычисление индекса
+    и инкремент элемента списка, без аллокаций и сортировок. Квантили считаются по корзинам.
+    """
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        # Сумма значений в секундах
+        self.sum = 0.0
+
+    def record(self, seconds: float):
+        # _bucket_index(), развёрнутый вручную: запись идёт на каждый запрос
+        value = int(seconds * 1_000_000)
+        if value < SUB_BUCKETS:
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+            if index >= BUCKETS:
+                index = BUCKETS - 1
+        self.counts[index] += 1
+        self.sum += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def merge(self, other: "LatencyHistogram"):
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q, в секундах."""
+        total = self.count
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return _bucket_upper_bound(index) / 1_000_000
+        return _bucket_upper_bound(BUCKETS - 1) / 1_000_000
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Кумулятивные счётчики (граница le в секундах, число значений не больше неё)."""
+        result = []
+        seen = 0
+        index = 0
+        for exponent in EXPORTED_EXPONENTS:
+            edge = _bucket_index(1 << exponent)
+            seen += sum(self.counts[index:edge])
+            index = edge
+            result.append(((1 << exponent) / 1_000_000, seen))
+        return result
+
+
+class MetricsShard:
+    """
+    Счётчики одного потока. Каждый поток пишет только в свой шард, поэтому обновление -
+    обычный инкремент атрибута без блокировок; шарды суммируются при чтении метрик.
+    """
+
+    def __init__(self):
+        self.connections_accepted = 0
+        self.connections_closed = 0
+        # Отказы из-за перегрузки (контроль допуска)
+        self.connections_rejected = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        # Число ответов по коду статуса: {"200": 10}
+        self.requests: dict[str, int] = {}
+        self.parse = LatencyHistogram()
+        self.app = LatencyHistogram()
+        self.write = LatencyHistogram()
+
+    def count_request(self, status: str):
+        code = status[:3]
+        requests = self.requests
+        requests[code] = requests.get(code, 0) + 1
+
+    def record_request(self, status: str, parse: float, app: float, write: float):
+        """Ответ на запрос и длительности его фаз в секундах."""
+        code = status[:3]
+        requests = self.requests
+        requests[code] = requests.get(code, 0) + 1
+        self.parse.record(parse)
+        self.app.record(app)
+        self.write.record(write)
+
+    def merge(self, other: "MetricsShard"):
+        self.connections_accepted += other.connections_accepted
+        self.connections_closed += other.connections_closed
+        self.connections_rejected += other.connections_rejected
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        # copy() - атомарный снимок: поток-владелец может добавлять коды прямо сейчас
+        for code, count in other.requests.copy().items():
+            self.requests[code] = self.requests.get(code, 0) + count
+        for phase in PHASES:
+            getattr(self, phase).merge(getattr(other, phase))
+
+
+class ServerMetrics:
+    """
+    Метрики сервера: соединения, байты, ответы по кодам и гистограммы фаз запроса.
+    Запись идёт в шард текущего потока (threading.local), чтение собирает все шарды.
+    В pre-fork режиме у каждого процесса-воркера свои метрики.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.local = threading.local()
+        self.shards: list[MetricsShard] = []
+        self.lock = threading.Lock()
+
+    def shard(self) -> MetricsShard:
+        """Шард текущего потока (создаётся при первом обращении)."""
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = MetricsShard()
+            with self.lock:
+                self.shards.append(shard)
+            return shard
+
+    def snapshot(self) -> MetricsShard:
+        """Сумма всех шардов."""
+        total = MetricsShard()
+        with self.lock:
+            shards = list(self.shards)
+        for shard in shards:
+            total.merge(shard)
+        return total
+
+    def render(self) -> list[str]:
+        """Метрики в текстовом формате Prometheus (строки без завершающего \\n)."""
+        total = self.snapshot()
+        lines = [
+            *format_metric(
+                "server_connections_accepted_total",
+                "counter",
+                "Принятые соединения",
+                [("", total.connections_accepted)],
+            ),
+            *format_metric(
+                "server_connections_active",
+                "gauge",
+                "Открытые соединения",
+                [("", total.connections_accepted - total.connections_closed)],
+            ),
+            *format_metric(
+                "server_connections_rejected_total",
+                "counter",
+                "Соединения, получившие отказ из-за перегрузки",
+                [("", total.connections_rejected)],
+            ),
+            *format_metric(
+                "server_received_bytes_total",
+                "counter",
+                "Байт получено от клиентов",
+                [("", total.bytes_in)],
+            ),
+            *format_metric(
+                "server_sent_bytes_total",
+                "counter",
+                "Байт отправлено клиентам",
+                [("", total.bytes_out)],
+            ),
+            *format_metric(
+                "server_start_time_seconds",
+                "gauge",
+                "Время запуска сервера (unix time)",
+                [("", self.started)],
+            ),
+            *format_metric(
+                "http_requests_total",
+                "counter",
+                "Ответы по коду статуса",
+                [(f'code="{code}"', count) for code, count in sorted(total.requests.items())],
+            ),
+        ]
+
+        name = "http_request_phase_seconds"
+        lines.append(f"# HELP {name} Длительность фаз обработки запроса: parse, app, write")
+        lines.append(f"# TYPE {name} histogram")
+        for phase in PHASES:
+            histogram = getattr(total, phase)
+            for edge, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{edge}"}} {count}')
+            lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+        return lines
+
+
+def format_metric(
+    name: str, kind: str, help_text: str, samples: Iterable[tuple[str, float]]
+) -> list[str]:
+    """Строки одной метрики в формате Prometheus; samples - пары (метки, значение)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return lines
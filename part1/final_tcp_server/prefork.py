@@ -0,0 +1,156 @@
+import contextlib
+import logging
+import os
+import signal
+import time
+import traceback
+from multiprocessing.sharedctypes import RawArray
+
+from .hot_restart import notify_ready
+from .interface import TCPHandlerI
+from .listeners import create_listener, format_address
+from .server import TCPServer
+
+
+class PreforkTCPServer(TCPServer):
+    """
+    Pre-fork модель: мастер один раз открывает слушающий сокет и форкает processes воркеров,
+    каждый из которых вызывает accept() на общем сокете.
+    Мастер следит за воркерами: перезапускает упавших и рассылает им сигнал завершения.
+
+    С reuse_port=True общий сокет не используется: каждый воркер открывает свой
+    SO_REUSEPORT-сокет, и ядро само балансирует соединения между их очередями accept.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        handler: TCPHandlerI,
+        processes: int = 4,
+        stats_interval: float = 10,
+        **kwargs,
+    ):
+        if processes < 1:
+            raise ValueError("processes должен быть >= 1")
+        super().__init__(host, port, handler, **kwargs)
+        self.processes = processes
+        # pid воркера -> его порядковый номер
+        self.workers_pids: dict[int, int] = {}
+        self.worker_id: int | None = None
+
+        # Счётчики принятых соединений по воркерам в разделяемой памяти (переживает fork)
+        self.stats_interval = stats_interval
+        self.accept_stats = RawArray("Q", processes)
+
+    def serve_forever(self):
+        """Цикл мастера: форкаем воркеров и перезапускаем их, пока не придёт сигнал завершения."""
+        # В режиме reuse_port мастер только держит порт занятым, но не слушает его,
+        # иначе ядро отдавало бы часть соединений в очередь, которую никто не разбирает
+        if not self.reuse_port:
+            self.listen()
+        logging.info(
+            f"Python: мастер (pid={os.getpid()}) слушает {format_address(self.server_socket)}, "
+            f"воркеров: {self.processes}, reuse_port={self.reuse_port}"
+        )
+        self.shutdown_event.clear()
+
+        with self.server_socket:
+            for worker_id in range(self.processes):
+                self._spawn_worker(worker_id)
+            notify_ready()
+
+            next_stats_at = time.monotonic() + self.stats_interval
+            while not self.shutdown_event.is_set():
+                self._check_restart()
+                self._reap_workers()
+                if time.monotonic() >= next_stats_at:
+                    self.log_accept_stats()
+                    next_stats_at = time.monotonic() + self.stats_interval
+                self.shutdown_event.wait(self.poll_interval)
+
+            self._stop_workers()
+            self.log_accept_stats()
+
+    def _spawn_worker(self, worker_id: int):
+        pid = os.fork()
+        if pid:
+            self.workers_pids[pid] = worker_id
+            logging.info(f"Python: запущен воркер #{worker_id} (pid={pid})")
+            return
+
+        # Дочерний процесс: обработчики сигналов унаследованы от мастера
+        # и выставляют shutdown_event уже в копии воркера
+        if self.hot_restart:
+            # Перезапуском занимается мастер: сигнал, отправленный всей группе процессов,
+            # не должен запускать поколение из каждого воркера
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+        self.worker_id = worker_id
+        self.workers_pids.clear()
+        exit_code = 0
+        try:
+            self._run_worker()
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            # os._exit, чтобы не выполнять код мастера (finally/atexit) в дочернем процессе
+            os._exit(exit_code)
+
+    def _run_worker(self):
+        """Тело воркера - обычный цикл TCPServer на унаследованном или собственном сокете."""
+        if self.reuse_port:
+            # Адрес берём у сокета мастера: при port=0 порт выбрало ядро, и воркеры
+            # должны слушать именно его, а не каждый свой случайный
+            host, port = self.server_socket.getsockname()[:2]
+            self.server_socket.close()
+            self.server_socket = create_listener(f"tcp:[{host}]:{port}", reuse_port=True)
+        super().serve_forever()
+
+    def _count_accept(self):
+        super()._count_accept()
+        # Слот пишет только свой воркер, поэтому блокировка не нужна
+        self.accept_stats[self.worker_id] += 1
+
+    def log_accept_stats(self):
+        """Лог-строка с числом принятых соединений по воркерам - для проверки балансировки."""
+        counts = list(self.accept_stats)
+        total = sum(counts)
+        per_worker = " ".join(f"#{i}={count}" for i, count in enumerate(counts))
+        spread = f"{max(counts) / min(counts):.2f}" if min(counts) else "-"
+        logging.info(
+            f"Python: принято соединений: {total} ({per_worker}), разброс max/min: {spread}"
+        )
+
+    def _reap_workers(self):
+        """Собирает завершившихся воркеров и запускает им замену."""
+        while self.workers_pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            worker_id = self.workers_pids.pop(pid, None)
+            if worker_id is not None and not self.shutdown_event.is_set():
+                logging.warning(
+                    f"Python: воркер #{worker_id} (pid={pid}) завершился "
+                    f"с кодом {os.waitstatus_to_exitcode(status)}, перезапускаю"
+                )
+                self._spawn_worker(worker_id)
+
+    def _stop_workers(self):
+        """Пересылает SIGTERM воркерам и ждёт, пока они обработают активные запросы."""
+        for pid in self.workers_pids:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+        # Воркеры сами ограничивают завершение через shutdown_timeout
+        while self.workers_pids:
+            pid, _ = os.waitpid(-1, 0)
+            worker_id = self.workers_pids.pop(pid, None)
+            if worker_id is not None:
+                logging.info(f"Python: воркер #{worker_id} (pid={pid}) остановлен")
+        logging.info("Python: все воркеры остановлены")
@@ -1,13 +1,30 @@
+import contextlib
 import logging
+import os
 import select
 import signal
 import socket
+import time
 import traceback
 from collections.abc import Iterator
-from threading import Event
+from threading import Condition, Event, Thread
 
+from .admission import AdmissionController
+from .concurrency import DISPATCHERS
+from .event_loop import EventLoop
+from .file_wrapper import FileWrapper
+from .hot_restart import inherited_socket, notify_ready, spawn_generation
 from .interface import TCPHandlerI, TCPServerI
-from .socket_io import SocketIO
+from .listeners import create_listener, format_address, is_tcp
+from .metrics import ServerMetrics
+from .socket_io import IdleWaiters, SocketIO
+from .timer_wheel import TimerWheel
+
+# Максимальное число буферов в одном sendmsg() (ограничение ядра на длину iovec)
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
 
 
 class TCPServer(TCPServerI):
@@ -19,45 +36,338 @@ class TCPServer(TCPServerI):
         poll_interval: float = 0.5,
         client_idle_timeout: float = 5,
         shutdown_timeout: float = 10,
+        concurrency: str = "sync",
+        workers: int = 8,
+        accept_queue_size: int = 16,
+        reuse_port: bool = False,
+        keepalive_timeout: float | None = None,
+        max_keepalive_connections: int | None = None,
+        metrics: ServerMetrics | None = None,
+        backlog: int | None = None,
+        max_connections: int | None = None,
+        admission: AdmissionController | None = None,
+        hot_restart: bool = False,
+        ready_timeout: float = 30,
+        listener: str | None = None,
+        send_timeout: float | None = None,
     ):
         self.address = (host, port)
-        self.server_socket = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind(self.address)
+        self.reuse_port = reuse_port
+        # Где слушать: tcp:host:port, unix:/path или systemd (см. create_listener).
+        # По умолчанию - TCP на host:port
+        if listener is None:
+            listener = f"tcp:[{host}]:{port}" if ":" in host else f"tcp:{host}:{port}"
+        self.listener = listener
+        # Длина очереди установленных соединений в ядре для listen() (None - по умолчанию
+        # Python, min(SOMAXCONN, 128)). Короткая очередь при перегрузке быстрее даёт отказ
+        # в подключении, чем таймаут у клиента
+        self.backlog = backlog
+        self.server_socket = self._create_server_socket()
+        # TCP_NODELAY выставляется только принятым TCP-соединениям: у unix-сокетов его нет
+        self.tcp_nodelay = is_tcp(self.server_socket)
+        self.accepted_connections = 0
+        # Сколько соединений открыто сейчас; при max_connections открытых (None - без ограничения)
+        # сервер перестаёт вызывать accept(), и новые соединения ждут в backlog ядра
+        self.open_connections = 0
+        self.max_connections = max_connections
+        self.connections_changed = Condition()
 
         self.poll_interval = poll_interval
         self.client_idle_timeout = client_idle_timeout
+        # Сколько keep-alive соединение может ждать следующего запроса (None - client_idle_timeout)
+        self.keepalive_timeout = (
+            client_idle_timeout if keepalive_timeout is None else keepalive_timeout
+        )
+        # Режим eventloop: сколько простаивающих keep-alive соединений держим открытыми,
+        # лишние закрываются, начиная с самых давно простаивающих (None - без ограничения)
+        self.max_keepalive_connections = max_keepalive_connections
         self.shutdown_timeout = shutdown_timeout
+        # Сколько ждём, пока клиент примет очередной чанк ответа (None - без ограничения:
+        # медленный клиент может долго скачивать большой файл)
+        self.send_timeout = send_timeout
         self.handler = handler
+        # Счётчики соединений и трафика (None - метрики не собираются)
+        self.metrics = metrics
+
+        # Стратегия обработки соединений: "sync" - в основном потоке,
+        # "threads" - в ограниченном пуле из workers потоков с очередью accept_queue_size,
+        # "eventloop" - простаивающие соединения ждут в selectors-цикле, запросы - в пуле потоков
+        try:
+            dispatcher_cls = DISPATCHERS[concurrency]
+        except KeyError:
+            raise ValueError(f"Неизвестный режим concurrency: {concurrency!r}")
+        self.concurrency = concurrency
+        self.event_loop = EventLoop(self) if concurrency == "eventloop" else None
+        handle = self.event_loop.serve_connection if self.event_loop else self._handle_request
+        # Контроль допуска: лимит соединений в работе и отказ (503) вместо долгой очереди.
+        # В режиме sync очереди нет, и ограничивать нечего
+        if admission is not None and concurrency == "sync":
+            raise ValueError("admission не поддерживается в режиме concurrency='sync'")
+        self.admission = admission
+        if self.admission is not None:
+            self.admission.set_capacity(workers + accept_queue_size)
+        reject = self.event_loop.reject_connection if self.event_loop else self.reject_connection
+        self.dispatcher = dispatcher_cls(
+            handle, workers, accept_queue_size, admission=self.admission, reject=reject
+        )
+        # Дедлайны всех соединений (ожидание данных, отправка, простой в event loop) -
+        # в одном колесе таймеров, его продвигает отдельный поток. Колесо, поток и pipe
+        # рассылки о завершении создаются в serve_forever: в pre-fork режиме - в каждом воркере
+        self.timers: TimerWheel | None = None
+        self.timers_thread: Thread | None = None
+        self.shutdown_r: int | None = None
+        self.shutdown_w: int | None = None
+        # Режим threads: соединения, которые ждут следующего запроса в потоках пула.
+        # В режиме eventloop простаивающие соединения потоков не занимают
+        self.idle_waiters: IdleWaiters | None = None
 
         self.shutdown_event = Event()
         signal.signal(signal.SIGTERM, self._on_shutdown)
         signal.signal(signal.SIGINT, self._on_shutdown)
 
+        # Перезапуск без простоя по SIGHUP/SIGUSR2: новое поколение наследует слушающий сокет,
+        # старое после его готовности (не дольше ready_timeout) завершается как по SIGTERM
+        self.hot_restart = hot_restart
+        self.ready_timeout = ready_timeout
+        self.restart_requested = False
+        self.restart_thread: Thread | None = None
+        if hot_restart:
+            signal.signal(signal.SIGHUP, self._on_hot_restart)
+            signal.signal(signal.SIGUSR2, self._on_hot_restart)
+
+    def _create_server_socket(self) -> socket.socket:
+        # Сокет от предыдущего поколения уже привязан к адресу и слушает
+        server_socket = inherited_socket()
+        if server_socket is not None:
+            return server_socket
+        return create_listener(self.listener, self.reuse_port)
+
+    def listen(self):
+        if self.backlog is None:
+            self.server_socket.listen()
+        else:
+            self.server_socket.listen(self.backlog)
+
     def _on_shutdown(self, signum, _):
         """Сигнальный обработчик - выставляет флаг завершения."""
         logging.warning("Python: получен сигнал завершения")
         logging.warning("Python: после обработки всех активных запросов сервер будет остановлен")
         self.shutdown_event.set()
+        self._broadcast_shutdown()
+
+    def _broadcast_shutdown(self):
+        """
+        Будит все соединения, ждущие данных: конец pipe для чтения есть в poll() каждого
+        SocketIO и после записи так и остаётся читаемым. Можно вызывать из обработчика сигнала.
+        """
+        if self.shutdown_w is None:
+            return
+        with contextlib.suppress(OSError):
+            os.write(self.shutdown_w, b"\0")
+
+    def _on_hot_restart(self, signum, _):
+        """
+        Сигнальный обработчик - только выставляет флаг: ждать готовности нового поколения
+        здесь нельзя, перезапуск запускает основной цикл (_check_restart).
+        """
+        logging.warning("Python: получен сигнал перезапуска")
+        self.restart_requested = True
+
+    def _check_restart(self):
+        if not self.restart_requested:
+            return
+        self.restart_requested = False
+        if self.restart_thread is not None and self.restart_thread.is_alive():
+            logging.warning("Python: перезапуск уже идёт")
+            return
+        self.restart_thread = Thread(target=self._restart, name="hot-restart")
+        self.restart_thread.start()
+
+    def _restart(self):
+        """Запускает новое поколение и, когда оно готово, завершает текущее через shutdown_event."""
+        if not spawn_generation(self.server_socket, self.ready_timeout):
+            return
+        logging.warning("Python: перестаю принимать соединения, завершаю активные запросы")
+        self.shutdown_event.set()
+        self._broadcast_shutdown()
+        if self.event_loop is not None:
+            self.event_loop._wake()
 
     def serve_forever(self):
         """Основной цикл сервера: опрашиваем сокет, принимаем и обрабатываем клиентов."""
-        self.server_socket.listen()
-        logging.info(f"Python: сервер запущен на прослушивание {self.address[0]}:{self.address[1]}")
+        self.listen()
+        logging.info(
+            f"Python: сервер запущен на прослушивание {format_address(self.server_socket)}"
+        )
         self.shutdown_event.clear()
+        self._start_timers()
+        self.dispatcher.start()
+        # Сокет слушает: если нас запустило предыдущее поколение, ему можно завершаться
+        notify_ready()
 
         with self.server_socket as server_socket:
-            while not self.shutdown_event.is_set():
-                ready, _, _ = select.select(
-                    [server_socket],
-                    [],
-                    [],
-                    self.poll_interval,
-                )
-                if ready:
-                    client_socket, addr = server_socket.accept()
-                    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-                    self._handle_request(client_socket, addr)
+            try:
+                if self.event_loop:
+                    self.event_loop.run()
+                else:
+                    self._accept_loop(server_socket)
+            finally:
+                # Graceful shutdown: дожидаемся обработки уже принятых соединений во всех воркерах
+                self.dispatcher.shutdown()
+                self._stop_timers()
+
+    def _start_timers(self):
+        self.timers = TimerWheel()
+        self.shutdown_r, self.shutdown_w = os.pipe()
+        self.timers_thread = Thread(target=self._run_timers, name="timers")
+        self.timers_thread.start()
+        if self.event_loop is None and self.dispatcher.multithread:
+            # Поток простаивающего соединения отдаём очереди не раньше, чем через poll_interval
+            # простоя - как и раньше, когда ожидающие проверяли загрузку пула раз в poll_interval
+            self.idle_waiters = IdleWaiters(
+                self.dispatcher.saturated, self.timers, self.poll_interval
+            )
+
+    def _stop_timers(self):
+        self.timers.close()
+        self.timers_thread.join()
+        shutdown_r, shutdown_w = self.shutdown_r, self.shutdown_w
+        self.shutdown_r = self.shutdown_w = None
+        os.close(shutdown_r)
+        os.close(shutdown_w)
+
+    def _run_timers(self):
+        """
+        Поток колеса таймеров. Завершение сервера - одна рассылка: колесо ограничивает
+        все дедлайны shutdown_timeout разом, а не каждое соединение следит за флагом.
+        Обработчику сигнала нельзя брать блокировку колеса, поэтому флаг завершения
+        проверяет этот поток - не реже раза в poll_interval, пока рассылки не было.
+        """
+        timers = self.timers
+        shortened = False
+        while timers.wait(None if shortened else self.poll_interval):
+            if not shortened and self.shutdown_event.is_set():
+                timers.shorten(self.shutdown_timeout)
+                shortened = True
+            timers.advance()
+
+    def _accept_loop(self, server_socket: socket.socket):
+        admission = self.admission
+        while not self.shutdown_event.is_set():
+            self._check_restart()
+            if not self._wait_connection_capacity(server_socket):
+                continue
+            # Backpressure: пока все воркеры заняты и очередь заполнена,
+            # accept() не вызываем - новые соединения ждут в backlog ядра.
+            # С контролем допуска соединения принимаются сразу: лишние получают отказ
+            if admission is None and not self.dispatcher.acquire_slot(self.poll_interval):
+                continue
+
+            ready, _, _ = select.select(
+                [server_socket],
+                [],
+                [],
+                self.poll_interval,
+            )
+            if not ready:
+                if admission is None:
+                    self.dispatcher.release_slot()
+                continue
+
+            client_socket, addr = server_socket.accept()
+            if self.tcp_nodelay:
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._count_accept()
+            queued_at = time.monotonic()
+            if admission is not None:
+                if not admission.try_admit():
+                    self.reject_connection(client_socket, addr)
+                    continue
+                if not self._acquire_admitted_slot(queued_at):
+                    # Слот так и не освободился: соединение прождало бы воркера
+                    # дольше max_queue_wait - отказываем сразу, не занимая очередь
+                    admission.start(time.monotonic() - queued_at)
+                    admission.release()
+                    self.reject_connection(client_socket, addr)
+                    continue
+            self.dispatcher.submit(client_socket, addr, queued_at)
+            if self.idle_waiters is not None:
+                # Соединение ждёт в очереди пула - отдаём ему поток самого давнего простаивающего
+                self.idle_waiters.release_oldest()
+
+    def _acquire_admitted_slot(self, queued_at: float) -> bool:
+        """
+        Слот для допущенного соединения. Допущенных не больше, чем слотов, но слот может
+        держать простаивающее keep-alive соединение - его поток освобождаем, а не ждём
+        keepalive_timeout. Ждём не дольше max_queue_wait с момента accept().
+        """
+        deadline = queued_at + self.admission.max_queue_wait
+        while True:
+            if self.dispatcher.acquire_slot(0):
+                return True
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return False
+            if self.idle_waiters is not None:
+                # Только что ответившее соединение освобождается не раньше, чем через min_idle
+                delay = self.idle_waiters.evict_oldest()
+                if delay is not None:
+                    timeout = min(timeout, delay)
+            if self.dispatcher.acquire_slot(timeout):
+                return True
+
+    def _wait_connection_capacity(self, server_socket: socket.socket) -> bool:
+        """
+        Ждёт (не дольше poll_interval), пока открытых соединений не станет меньше лимита.
+        Если лимит заняли простаивающие keep-alive соединения, а в backlog ждёт новый клиент,
+        место ему освобождает самое давно простаивающее из них.
+        """
+        if self.max_connections is None:
+            return True
+        timeout = self.poll_interval
+        idle_waiters = self.idle_waiters
+        if not self.below_connection_limit() and idle_waiters is not None and idle_waiters.waiters:
+            # Есть кого вытеснить: ждём не закрытия соединения, а нового клиента
+            if not select.select([server_socket], [], [], self.poll_interval)[0]:
+                return self.below_connection_limit()
+            delay = idle_waiters.evict_oldest()
+            if delay is not None:
+                timeout = min(timeout, delay)
+        with self.connections_changed:
+            return self.connections_changed.wait_for(self.below_connection_limit, timeout)
+
+    def below_connection_limit(self) -> bool:
+        return self.max_connections is None or self.open_connections < self.max_connections
+
+    def _count_accept(self):
+        self.accepted_connections += 1
+        with self.connections_changed:
+            self.open_connections += 1
+        if self.metrics is not None:
+            self.metrics.shard().connections_accepted += 1
+
+    def reject_connection(self, client_socket: socket.socket, addr):
+        """
+        Отказ из-за перегрузки: короткий ответ обработчика (у HTTP - 503 с Retry-After)
+        и закрытие соединения. Сокет переводится в неблокирующий режим - отказ не должен
+        ждать медленного клиента. Уже пришедший запрос вычитываем: если закрыть сокет
+        с непрочитанными данными, ядро отправит RST, и клиент может не увидеть ответ.
+        """
+        logging.debug(f"Python: сервер перегружен, отказываю клиенту {addr}")
+        if self.metrics is not None:
+            self.metrics.shard().connections_rejected += 1
+        retry_after = self.admission.retry_after if self.admission is not None else 1
+        response = self.handler.overload_response(retry_after)
+        try:
+            client_socket.setblocking(False)
+            if response:
+                client_socket.send(response)
+            while client_socket.recv(64 * 1024):
+                pass
+        except OSError:
+            # Буфер пуст (BlockingIOError) или клиент уже закрыл соединение
+            pass
+        self.shutdown_request(client_socket)
 
     def _handle_request(self, client_socket: socket.socket, addr):
         """
@@ -75,15 +385,22 @@ class TCPServer(TCPServerI):
         """
         Читает данные клиента и вызывает бизнес-логику из self.handler.
         """
-        socket_io = SocketIO(
+        socket_io = self._create_socket_io(client_socket)
+        processed_data = self.handler.handle(socket_io)
+        self.send_to_client(client_socket, processed_data)
+
+    def _create_socket_io(self, client_socket: socket.socket, park_when_idle=False) -> SocketIO:
+        return SocketIO(
             socket=client_socket,
             shutdown_event=self.shutdown_event,
-            poll_interval=self.poll_interval,
             idle_timeout=self.client_idle_timeout,
-            shutdown_timeout=self.shutdown_timeout,
+            park_when_idle=park_when_idle,
+            keepalive_timeout=self.keepalive_timeout,
+            idle_waiters=self.idle_waiters,
+            metrics=self.metrics,
+            timers=self.timers,
+            shutdown_fd=self.shutdown_r,
         )
-        processed_data = self.handler.handle(socket_io)
-        self.send_to_client(client_socket, processed_data)
 
     def shutdown_request(self, client_socket: socket.socket):
         """Закрытие соединения с клиентом, отправка FIN."""
@@ -94,16 +411,79 @@ class TCPServer(TCPServerI):
             # Если клиент уже закрыл соединение
             pass
         client_socket.close()
+        with self.connections_changed:
+            self.open_connections -= 1
+            if self.max_connections is not None:
+                self.connections_changed.notify()
+        if self.metrics is not None:
+            self.metrics.shard().connections_closed += 1
         logging.debug("Python: закрыл соединение с клиентом")
 
-    def send_to_client(self, client_socket: socket.socket, data: Iterator[bytes]):
-        """Отправляет данные клиенту."""
+    def send_to_client(
+        self, client_socket: socket.socket, data: Iterator[bytes | list[bytes] | FileWrapper]
+    ):
+        """
+        Отправляет данные клиенту. Файлы (FileWrapper) уходят через sendfile(),
+        список буферов - одним scatter-gather вызовом sendmsg().
+        """
         logging.debug("Python: отправляю ответ клиенту")
+        # Шард берём один раз: весь ответ отправляется из одного потока
+        shard = self.metrics.shard() if self.metrics is not None else None
+        send_timeout = self.send_timeout
+        timer = None
         for chunk in data:
+            if send_timeout is not None:
+                timer = self.timers.schedule(send_timeout, self._abort_send, client_socket)
             try:
-                client_socket.sendall(chunk)
+                if isinstance(chunk, FileWrapper):
+                    # Zero-copy: ядро копирует данные из page cache прямо в сокет.
+                    # Для объектов без fileno() socket.sendfile сам откатится на send()
+                    sent = 0
+                    if chunk.count != 0:
+                        sent = client_socket.sendfile(chunk.filelike, chunk.offset, chunk.count)
+                elif isinstance(chunk, list):
+                    sent = self._sendmsg_all(client_socket, chunk)
+                else:
+                    client_socket.sendall(chunk)
+                    sent = len(chunk)
             except OSError:
                 logging.debug("Python: клиент закрыл соединение до получения данных")
+                continue
+            finally:
+                if timer is not None:
+                    self.timers.cancel(timer)
+            if shard is not None:
+                shard.bytes_out += sent
+
+    def _abort_send(self, client_socket: socket.socket):
+        """
+        Колбэк колеса таймеров: клиент не принимает ответ дольше send_timeout.
+        shutdown() прерывает заблокированный send() - он завершится с EPIPE.
+        """
+        logging.warning("Python: timeout отправки ответа клиенту")
+        with contextlib.suppress(OSError):
+            client_socket.shutdown(socket.SHUT_RDWR)
+
+    def _sendmsg_all(self, client_socket: socket.socket, buffers: list[bytes]) -> int:
+        """
+        Аналог sendall() для нескольких буферов: заголовки и тело уходят одним
+        системным вызовом без склейки в промежуточный bytes.
+        sendmsg() может отправить только часть данных - тогда сдвигаемся
+        по memoryview и досылаем остаток. Возвращает число отправленных байт.
+        """
+        views = [memoryview(buffer).cast("B") for buffer in buffers if buffer]
+        total = 0
+        first = 0
+        while first < len(views):
+            sent = client_socket.sendmsg(views[first : first + IOV_MAX])
+            total += sent
+            # Пропускаем полностью отправленные буферы, недоотправленный обрезаем
+            while sent and sent >= len(views[first]):
+                sent -= len(views[first])
+                first += 1
+            if sent:
+                views[first] = views[first][sent:]
+        return total
 
     def handle_error(self, client_socket, addr):
         """Обработка ошибок во время выполнения запроса."""
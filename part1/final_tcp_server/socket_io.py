@@ -1,9 +1,94 @@
+import contextlib
 import io
 import logging
 import select
 import socket
 import time
-from threading import Event
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Event, Lock
+
+from .metrics import ServerMetrics
+from .timer_wheel import TimerWheel
+
+# Почему прервано ожидание данных (SocketIO.interrupt)
+TIMED_OUT = "timeout"
+RELEASED = "released"
+
+
+class ConnectionParkedError(ConnectionError):
+    """Клиент пока ничего не прислал - соединение возвращается в event loop."""
+
+
+class IdleWaiters:
+    """
+    Соединения, которые в потоках пула ждут следующего сообщения (keep-alive), от давно
+    ждущих к недавним. Ожидающие не проверяют загрузку пула сами: когда соединений в очереди
+    пула больше, чем свободных воркеров, освобождается поток самого давнего из них.
+    Только что ответившее соединение не трогаем min_idle секунд - его клиент, скорее всего,
+    уже отправляет следующий запрос; освобождение откладывается таймером в колесе.
+    """
+
+    def __init__(self, pressure: Callable[[], bool], timers: TimerWheel, min_idle: float):
+        self.pressure = pressure
+        self.timers = timers
+        self.min_idle = min_idle
+        self.lock = Lock()
+        # SocketIO -> с какого момента ждёт (time.monotonic())
+        self.waiters: OrderedDict[SocketIO, float] = OrderedDict()
+        self.retry_pending = False
+
+    def add(self, socket_io: "SocketIO"):
+        with self.lock:
+            self.waiters[socket_io] = time.monotonic()
+        # Пул мог быть перегружен ещё до того, как соединение начало ждать
+        self.release_oldest()
+
+    def remove(self, socket_io: "SocketIO") -> bool:
+        """False - поток соединения уже освобождён сервером."""
+        with self.lock:
+            if socket_io not in self.waiters:
+                return False
+            del self.waiters[socket_io]
+            return True
+
+    def release_oldest(self):
+        """Вызывается, когда пул может быть перегружен: после постановки соединения в очередь."""
+        with self.lock:
+            if not self.waiters or not self.pressure():
+                return
+            socket_io, since = next(iter(self.waiters.items()))
+            delay = since + self.min_idle - time.monotonic()
+            if delay <= 0:
+                del self.waiters[socket_io]
+                socket_io.interrupt(RELEASED)
+                return
+            if self.retry_pending:
+                return
+            self.retry_pending = True
+        # Таймер ставим вне своей блокировки: колбэки колеса выполняются под его блокировкой
+        self.timers.schedule(delay, self._retry)
+
+    def evict_oldest(self) -> float | None:
+        """
+        Лимит открытых соединений исчерпан, а новый клиент ждёт accept(): освобождает
+        самое давно ждущее соединение независимо от загрузки пула. Если оно ждёт меньше
+        min_idle, возвращает, через сколько секунд его можно будет освободить.
+        """
+        with self.lock:
+            if not self.waiters:
+                return None
+            socket_io, since = next(iter(self.waiters.items()))
+            delay = since + self.min_idle - time.monotonic()
+            if delay > 0:
+                return delay
+            del self.waiters[socket_io]
+            socket_io.interrupt(RELEASED)
+        return None
+
+    def _retry(self):
+        self.retry_pending = False
+        self.release_oldest()
 
 
 class SocketIO(io.RawIOBase):
@@ -11,92 +96,316 @@ class SocketIO(io.RawIOBase):
         self,
         socket: socket.socket,
         shutdown_event: Event,
-        poll_interval: float = 0.5,
         idle_timeout: float = 5,
-        shutdown_timeout: float = 10,
         recv_chunk_size: int = 1024,
+        park_when_idle: bool = False,
+        max_recv_chunk_size: int = 64 * 1024,
+        buffer_size: int = 8 * 1024,
+        keepalive_timeout: float | None = None,
+        idle_waiters: IdleWaiters | None = None,
+        metrics: ServerMetrics | None = None,
+        timers: TimerWheel | None = None,
+        shutdown_fd: int | None = None,
     ):
         self.socket = socket
-        self.poll_interval = poll_interval
+        # poll() вместо select(): нет ограничения FD_SETSIZE на номер дескриптора
+        self.poller = select.poll()
+        self.poller.register(socket, select.POLLIN)
+        # Рассылка о завершении сервера: конец pipe для чтения, который становится читаемым
+        # сразу у всех соединений. Простаивающее соединение при этом закрывается
+        self.shutdown_fd = shutdown_fd
+        if shutdown_fd is not None:
+            self.poller.register(shutdown_fd, select.POLLIN)
+        # idle_timeout - сколько ждём очередную порцию уже начатого сообщения,
+        # keepalive_timeout - сколько ждём начала следующего сообщения (см. expect_message)
         self.idle_timeout = idle_timeout
-        self.shutdown_timeout = shutdown_timeout
+        self.keepalive_timeout = idle_timeout if keepalive_timeout is None else keepalive_timeout
+        # Таймаут ожидания первого байта сообщения
+        self.boundary_timeout = idle_timeout
+        # Дедлайны ожидания стоят в общем колесе таймеров сервера: по таймауту оно прерывает
+        # ожидание (interrupt). Без колеса таймаут отсчитывает сам poll()
+        self.timers = timers
+        self.interrupted: str | None = None
+        # Сервер не справляется с нагрузкой (все воркеры заняты): поток соединения,
+        # ждущего следующего сообщения, сервер отдаёт соединениям из очереди
+        self.idle_waiters = idle_waiters
+        # Размер recv() подстраивается под поток данных: растёт, пока recv() заполняет
+        # весь запрошенный объём, и уменьшается на мелких сообщениях
+        self.min_recv_chunk_size = recv_chunk_size
+        self.max_recv_chunk_size = max(recv_chunk_size, max_recv_chunk_size)
         self.recv_chunk_size = recv_chunk_size
 
         # Внутренний буфер: recv() может вернуть больше данных, чем запросил read(size).
-        # Остаток сохраняется здесь до следующего вызова read().
-        self.buffer = bytearray()
+        # Буфер выделяется один раз и заполняется через recv_into() без промежуточных bytes;
+        # непрочитанные данные лежат в self.buf[self.start:self.end].
+        # Небольшой начальный размер - чтобы тысячи keep-alive соединений не съедали память,
+        # при потоковом чтении буфер вырастет вместе с recv_chunk_size.
+        self.buf = bytearray(buffer_size)
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
 
-        self.deadline = time.perf_counter() + self.idle_timeout
+        # Момент получения первого байта текущего сообщения - начало фазы разбора запроса
+        self.message_started = time.perf_counter()
         self.shutdown_event = shutdown_event
-        self.shutdown_deadline_set = False
+        self.shutting_down = False
 
         self.is_socket_end = False
 
-    def _recv(self, chunk_size: int) -> bytes:
+        # at_boundary - из текущего сообщения ещё ничего не прочитано: соединение простаивает
+        # между сообщениями. Выставляется обработчиком (expect_message) и event loop после
+        # отправки чанка, сбрасывается любым чтением данных.
+        # Режим event loop: если на границе в сокете пусто, вместо ожидания
+        # поднимаем ConnectionParkedError.
+        self.park_when_idle = park_when_idle
+        self.at_boundary = True
+        self.parked = False
+        # Счётчик полученных байт (None - метрики не собираются)
+        self.metrics = metrics
+        # Трассировка: сколько времени с начала текущего сообщения ушло на ожидание данных
+        # в poll() (включается обработчиком, если запросы трассируются)
+        self.trace_waits = False
+        self.recv_wait = 0.0
+
+    def resume(self):
+        """Соединение снова передано обработчику - сбрасываем состояние парковки и idle-таймаут."""
+        self.at_boundary = True
+        self.parked = False
+        self.boundary_timeout = self.idle_timeout
+
+    def expect_message(self):
+        """
+        Обработчик закончил с сообщением и ждёт следующее (keep-alive).
+        До его первого байта действует keepalive_timeout.
+        """
+        self.at_boundary = True
+        self.boundary_timeout = self.keepalive_timeout
+        # Следующий pipelined-запрос может быть уже в буфере; иначе отсчёт начнётся с recv()
+        self.message_started = time.perf_counter()
+        self.recv_wait = 0.0
+
+    def interrupt(self, reason: str):
+        """
+        Прерывает ожидание данных из другого потока (колесо таймеров, сервер).
+        shutdown(SHUT_RD) будит poll() и дальше recv() возвращает 0, а отправлять ответ
+        (например, 408) по-прежнему можно.
+        """
+        self.interrupted = reason
+        with contextlib.suppress(OSError):
+            self.socket.shutdown(socket.SHUT_RD)
+
+    def expire(self):
+        """
+        Режим event loop: таймаут сработал, пока соединение с начатым сообщением ждало в цикле.
+        Следующее чтение в воркере поднимет TimeoutError - обработчик ответит так же,
+        как на таймаут внутри воркера (у HTTP - 408).
+        """
+        self.interrupted = TIMED_OUT
+
+    def _wait_readable(self, timeout: float | None) -> bool:
+        """Ждёт данных в сокете (None - без таймаута). False - таймаут или рассылка о завершении."""
+        events = self.poller.poll(None if timeout is None else timeout * 1000)
+        if self.shutdown_fd is not None:
+            for fd, _ in events:
+                if fd == self.shutdown_fd:
+                    # pipe рассылки так и остаётся читаемым - больше его не опрашиваем
+                    self.poller.unregister(fd)
+                    self.shutdown_fd = None
+                    self.shutting_down = True
+                    return len(events) > 1
+        return bool(events)
+
+    def _wait_for_data(self) -> bool:
+        """
+        Ждёт данных без периодических пробуждений: дедлайн стоит в колесе таймеров, и поток
+        спит в poll(), пока не придут данные, не сработает таймер или не начнётся завершение.
+        False - простаивающее между сообщениями соединение закрывается.
+        """
+        timeout = self.boundary_timeout if self.at_boundary else self.idle_timeout
+        idle_waiters = self.idle_waiters if self.at_boundary else None
+        # Между сообщениями соединение можно закрыть в любой момент: при завершении
+        # сервера или нехватке воркеров не ждём таймаута - считаем, что клиент закрыл соединение
+        if self.at_boundary and self.shutting_down:
+            return False
+        if idle_waiters is not None:
+            idle_waiters.add(self)
+
+        timers = self.timers
+        timer = timers.schedule(timeout, self.interrupt, TIMED_OUT) if timers else None
+        try:
+            while True:
+                shutting_down = self.shutting_down
+                if self._wait_readable(None if timers else timeout):
+                    break
+                if self.shutting_down and not shutting_down:
+                    # Разбудила рассылка о завершении: начатое сообщение дочитываем
+                    if self.at_boundary:
+                        return False
+                elif not timers:
+                    self.interrupted = TIMED_OUT
+                    break
+        finally:
+            # После cancel() колбэк таймера уже не выполнится: сокет можно закрывать
+            if timers:
+                timers.cancel(timer)
+            if idle_waiters is not None and not idle_waiters.remove(self):
+                self.interrupted = RELEASED
+
+        if self.interrupted == RELEASED:
+            self.is_socket_end = True
+            return False
+        if self.interrupted == TIMED_OUT:
+            self.is_socket_end = True
+            logging.warning("Python: timeout ожидания клиента")
+            raise TimeoutError("Клиент слишком долго отправлял данные")
+        return True
+
+    def _recv_into(self, target: memoryview) -> int:
         """
         Низкоуровневое чтение из сокета с поддержкой таймаутов.
-        Возвращает до chunk_size байт или b"" если соединение закрыто.
+        Пишет до len(target) байт прямо в target и возвращает их количество, 0 - соединение закрыто.
         """
         if self.is_socket_end:
-            return b""
+            return 0
+        if self.interrupted == TIMED_OUT:
+            # Таймаут истёк в event loop (expire)
+            self.is_socket_end = True
+            raise TimeoutError("Клиент слишком долго отправлял данные")
 
-        while True:
-            # При получении сигнала завершения переключаемся на shutdown_timeout
-            if self.shutdown_event.is_set() and not self.shutdown_deadline_set:
-                self.deadline = time.perf_counter() + self.shutdown_timeout
-                self.shutdown_deadline_set = True
-
-            # Ждём готовности сокета не дольше poll_interval,
-            # чтобы периодически проверять таймауты и флаг завершения
-            ready, _, _ = select.select([self.socket], [], [], self.poll_interval)
-            if ready:
-                # Клиент прислал данные - сбрасываем idle-таймаут
-                if not self.shutdown_deadline_set:
-                    self.deadline = time.perf_counter() + self.idle_timeout
-
-                chunk = self.socket.recv(chunk_size)
-                if chunk:
-                    return chunk
+        # Данные уже в сокете - читаем сразу, без таймера
+        if not self._wait_readable(0):
+            if self.park_when_idle and self.at_boundary:
+                self.parked = True
+                raise ConnectionParkedError("Клиент ещё не прислал следующий запрос")
 
-                else:
-                    logging.debug("Python: клиент прислал (FIN).")
-                    self.is_socket_end = True
-                    return b""
+            if self.trace_waits:
+                wait_started = time.perf_counter()
+                readable = self._wait_for_data()
+                self.recv_wait += time.perf_counter() - wait_started
+            else:
+                readable = self._wait_for_data()
+            if not readable:
+                logging.debug("Python: закрываю простаивающее соединение")
+                return 0
+
+        n = self.socket.recv_into(target)
+        if n:
+            if self.metrics is not None:
+                self.metrics.shard().bytes_in += n
+            return n
+
+        logging.debug("Python: клиент прислал (FIN).")
+        self.is_socket_end = True
+        return 0
+
+    @property
+    def buffered(self) -> int:
+        return self.end - self.start
+
+    def _fill(self) -> int:
+        """Дочитывает очередную порцию данных из сокета в конец буфера."""
+        chunk_size = self.recv_chunk_size
+        # Первые байты нового сообщения: до них соединение простаивало
+        message_start = self.at_boundary and self.start == self.end
+        if len(self.buf) - self.end < chunk_size:
+            self._make_room(chunk_size)
+
+        n = self._recv_into(self.view[self.end : self.end + chunk_size])
+        self.end += n
+        if n and message_start:
+            self.message_started = time.perf_counter()
+            # Ожидание первого байта - простой между сообщениями, а не задержка запроса
+            self.recv_wait = 0.0
+
+        # Адаптивный размер чтения
+        if n == self.recv_chunk_size < self.max_recv_chunk_size:
+            self.recv_chunk_size *= 2
+        elif n < self.recv_chunk_size // 4 and self.recv_chunk_size > self.min_recv_chunk_size:
+            self.recv_chunk_size //= 2
+        return n
 
-            if time.perf_counter() > self.deadline:
-                logging.warning("Python: timeout ожидания клиента")
-                raise TimeoutError("Клиент слишком долго отправлял данные")
+    def _make_room(self, size: int):
+        """Освобождает место под size байт в хвосте буфера: сдвигаем данные в начало или растём."""
+        buffered = self.buffered
+        if len(self.buf) - buffered < size:
+            # Данных больше, чем помещается, - увеличиваем буфер (например, длинная строка)
+            new_buf = bytearray(max(len(self.buf) * 2, buffered + size))
+            new_buf[:buffered] = self.view[self.start : self.end]
+            self.buf = new_buf
+            self.view = memoryview(new_buf)
+        elif self.start:
+            # Компакция: копируем только непрочитанный остаток
+            self.buf[:buffered] = self.buf[self.start : self.end]
+        self.start, self.end = 0, buffered
+
+    def _take(self, size: int) -> bytes:
+        """Забирает size байт из начала буфера."""
+        data = self.view[self.start : self.start + size].tobytes()
+        self._consume(size)
+        return data
+
+    def _consume(self, size: int):
+        if size:
+            self.at_boundary = False
+        self.start += size
+        if self.start == self.end:
+            # Буфер опустел - следующий recv_into() снова пишет в начало, без компакции
+            self.start = self.end = 0
+
+    def peek(self) -> memoryview:
+        """Непрочитанные данные буфера без копирования (действительны до следующего чтения)."""
+        return self.view[self.start : self.end]
+
+    def find(self, sub: bytes) -> int:
+        """Позиция sub в непрочитанных данных буфера (-1 - не найдено), без чтения из сокета."""
+        pos = self.buf.find(sub, self.start, self.end)
+        return pos if pos == -1 else pos - self.start
 
     def read(self, size=-1) -> bytes:
         """
         Возвращает ровно size байт из сокета (или меньше, если соединение закрыто).
         При size < 0 читает всё до конца соединения.
         """
-
         if size < 0:
             # Режим "читаем всё": забираем буфер и дочитываем сокет до конца
-            chunks = [bytes(self.buffer)]
-            self.buffer = bytearray()
-            while chunk := self._recv(self.recv_chunk_size):
-                chunks.append(chunk)
+            chunks = [self._take(self.buffered)]
+            self.at_boundary = False
+            while self._fill():
+                chunks.append(self._take(self.buffered))
             return b"".join(chunks)
-        else:
-            # Режим "читаем ровно size байт": дочитываем в буфер, пока не наберём нужное количество
-            while len(self.buffer) < size:
-                chunk = self._recv(self.recv_chunk_size)
-                if not chunk:
-                    break
-                self.buffer.extend(chunk)
 
-            to_return = self.buffer[:size]
-            self.buffer = self.buffer[size:]
-            return bytes(to_return)
+        if size > len(self.buf):
+            # Большое чтение: не раздуваем буфер, а читаем сразу в итоговый массив
+            result = bytearray(size)
+            n = self.readinto(result)
+            del result[n:]
+            return bytes(result)
 
-    def readinto(self, b: bytearray) -> int:
-        """Записывает данные из сокета в байтовый буфер b."""
-        data = self.read(len(b))
-        n = len(data)
-        b[:n] = data
+        # Режим "читаем ровно size байт": дочитываем в буфер, пока не наберём нужное количество
+        while self.buffered < size:
+            if not self._fill():
+                break
+        return self._take(min(size, self.buffered))
+
+    def readinto(self, b) -> int:
+        """
+        Записывает данные из сокета в байтовый буфер b.
+        Сначала отдаём то, что уже в буфере, остальное recv_into() пишет прямо в b -
+        одно копирование из ядра без промежуточных объектов.
+        """
+        target = memoryview(b).cast("B")
+        size = len(target)
+
+        n = min(size, self.buffered)
+        target[:n] = self.view[self.start : self.start + n]
+        self._consume(n)
+
+        while n < size:
+            received = self._recv_into(target[n:])
+            if not received:
+                break
+            self.at_boundary = False
+            n += received
         return n
 
     def readline(self, size=-1) -> bytes:
@@ -104,32 +413,79 @@ class SocketIO(io.RawIOBase):
         Читает одну строку (до символа \\n включительно).
         Сначала ищем \\n в буфере, если не нашли - дочитываем из сокета чанками.
         """
+        # Уже просмотренную часть буфера повторно не сканируем.
+        # Горячий путь (строки заголовков): атрибуты читаем в локальные переменные
+        # и _take() разворачиваем вручную - атрибуты io.RawIOBase заметно медленнее обычных
+        scanned = 0
         while True:
+            start, end = self.start, self.end
             # Ищем конец строки в том, что уже есть в буфере
-            newline_pos = self.buffer.find(b"\n")
+            newline_pos = self.buf.find(b"\n", start + scanned, end)
             if newline_pos != -1:
                 # Нашли \n - отдаём строку включая \n, остаток остаётся в буфере
-                end = newline_pos + 1
-                if size >= 0:
-                    end = min(end, size)
-                line = bytes(self.buffer[:end])
-                self.buffer = self.buffer[end:]
+                line_end = newline_pos + 1
+                if 0 <= size < line_end - start:
+                    line_end = start + size
+                line = self.view[start:line_end].tobytes()
+                self.at_boundary = False
+                if line_end == end:
+                    self.start = self.end = 0
+                else:
+                    self.start = line_end
                 return line
 
             # Если достигли лимита size - отдаём что есть
-            if size >= 0 and len(self.buffer) >= size:
-                line = bytes(self.buffer[:size])
-                self.buffer = self.buffer[size:]
-                return line
+            if 0 <= size <= end - start:
+                return self._take(size)
 
             # \n не найден - дочитываем из сокета
-            chunk = self._recv(self.recv_chunk_size)
-            if not chunk:
+            scanned = end - start
+            if not self._fill():
                 # Соединение закрыто - отдаём остаток буфера
-                line = bytes(self.buffer)
-                self.buffer = bytearray()
-                return line
-            self.buffer.extend(chunk)
+                return self._take(self.buffered)
+
+    def read_until(
+        self,
+        separator: bytes | Callable[[bytearray, int, int], int],
+        limit: int,
+        overlap: int | None = None,
+    ) -> bytes:
+        """
+        Читает данные до separator включительно (например, весь блок заголовков HTTP)
+        одним поиском по буферу. Разделитель - байты или функция find(buf, start, stop),
+        возвращающая позицию сразу за разделителем в buf[start:stop] или -1.
+        Данные могут приходить по частям: уже просмотренная часть буфера повторно
+        не сканируется, кроме последних overlap байт, где мог начаться не пришедший
+        целиком разделитель (для bytes - len(separator) - 1).
+        Если separator не найден в первых limit байтах, возвращает limit байт без него,
+        если соединение закрылось раньше - остаток буфера.
+        """
+        if isinstance(separator, bytes):
+            find = None
+            if overlap is None:
+                overlap = len(separator) - 1
+        else:
+            find = separator
+            if overlap is None:
+                raise ValueError("Для функции поиска нужен overlap")
+        scanned = 0
+        while True:
+            start, end = self.start, self.end
+            stop = min(end, start + limit)
+            if find is None:
+                pos = self.buf.find(separator, start + scanned, stop)
+                if pos != -1:
+                    return self._take(pos + len(separator) - start)
+            else:
+                pos = find(self.buf, start + scanned, stop)
+                if pos != -1:
+                    return self._take(pos - start)
+            if end - start >= limit:
+                return self._take(limit)
+
+            scanned = max(0, end - start - overlap)
+            if not self._fill():
+                return self._take(self.buffered)
 
     def readlines(self, hint=-1) -> list[bytes]:
         """Возвращает строки, лимит количества прочитанных байт задаётся через hint."""
@@ -0,0 +1,160 @@
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+
+
+class Timer:
+    """Отложенный вызов в колесе таймеров. Отменяется через TimerWheel.cancel()."""
+
+    __slots__ = ("deadline", "tick", "callback", "args", "bucket", "expired")
+
+    def __init__(self, deadline: float, tick: int, callback: Callable, args: tuple):
+        self.deadline = deadline
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        # Ячейка колеса, в которой лежит таймер (None - сработал или отменён)
+        self.bucket: set[Timer] | None = None
+        self.expired = False
+
+
+class TimerWheel:
+    """
+    Хешированное колесо таймеров: время делится на тики по resolution секунд, таймер
+    лежит в ячейке tick % slots. Добавление и отмена - O(1) (множество в ячейке),
+    продвижение на тик просматривает одну ячейку. Таймеры дальше одного оборота колеса
+    лежат в той же ячейке и дожидаются своего тика.
+
+    Одно колесо обслуживает дедлайны всех соединений сервера, а продвигает его один поток
+    (wait/advance): соединения не просыпаются сами, чтобы проверить свой таймаут.
+    Таймер срабатывает не раньше дедлайна и не позже чем через тик после него.
+    Колбэки вызываются в потоке колеса под его блокировкой (колбэк может ставить новые таймеры),
+    поэтому они должны быть короткими; зато после cancel() колбэк уже точно не выполняется.
+    """
+
+    def __init__(self, resolution: float = 0.1, slots: int = 512):
+        self.resolution = resolution
+        self.slots = slots
+        self.buckets: list[set[Timer]] = [set() for _ in range(slots)]
+        # Последний обработанный тик
+        self.current_tick = self._tick(time.monotonic())
+        self.count = 0
+        # Общий предельный дедлайн (см. shorten): после него срабатывают все таймеры
+        self.cap: float | None = None
+        self.changed = threading.Condition(threading.RLock())
+        # Тик, к которому проснётся поток колеса (None - спит до нового таймера)
+        self.wake_tick: int | None = None
+        self.closed = False
+
+    def _tick(self, moment: float) -> int:
+        return int(moment / self.resolution)
+
+    def schedule(self, delay: float, callback: Callable, *args) -> Timer:
+        """Вызовет callback(*args) через delay секунд."""
+        now = time.monotonic()
+        deadline = now + delay
+        with self.changed:
+            if self.cap is not None and self.cap > now:
+                deadline = min(deadline, self.cap)
+            # Округляем вверх: таймер не должен сработать раньше дедлайна
+            tick = max(math.ceil(deadline / self.resolution), self.current_tick + 1)
+            timer = Timer(deadline, tick, callback, args)
+            bucket = self.buckets[tick % self.slots]
+            bucket.add(timer)
+            timer.bucket = bucket
+            self.count += 1
+            # Поток колеса спит дольше, чем нужно новому таймеру
+            if self.wake_tick is None or tick < self.wake_tick:
+                self.changed.notify()
+        return timer
+
+    def cancel(self, timer: Timer | None):
+        with self.changed:
+            if timer is not None and timer.bucket is not None:
+                timer.bucket.discard(timer)
+                timer.bucket = None
+                self.count -= 1
+
+    def shorten(self, max_delay: float):
+        """
+        Рассылка всем таймерам разом: ни один дедлайн, включая поставленные до его наступления,
+        не наступит позже чем через max_delay секунд. O(1): отдельные таймеры не переставляются,
+        после общего дедлайна advance() один раз срабатывает всё колесо. Таймеры, поставленные
+        после этого (например, на отправку ответа 408 соединению, чьё ожидание прервано),
+        действуют как обычно.
+        """
+        with self.changed:
+            cap = time.monotonic() + max_delay
+            self.cap = cap if self.cap is None else min(self.cap, cap)
+            self.changed.notify()
+
+    def advance(self) -> int:
+        """Вызывает колбэки таймеров, чей тик наступил. Возвращает их количество."""
+        now = time.monotonic()
+        target = self._tick(now)
+        with self.changed:
+            expired: list[Timer] = []
+            if self.cap is not None and now >= self.cap:
+                for bucket in self.buckets:
+                    expired.extend(bucket)
+                    bucket.clear()
+                self.cap = None
+            else:
+                # После долгого сна хватает одного оборота: каждая ячейка просматривается один раз
+                steps = min(target - self.current_tick, self.slots)
+                for tick in range(target - steps + 1, target + 1):
+                    bucket = self.buckets[tick % self.slots]
+                    if bucket:
+                        due = [timer for timer in bucket if timer.tick <= target]
+                        bucket.difference_update(due)
+                        expired.extend(due)
+            self.current_tick = max(self.current_tick, target)
+            self.count -= len(expired)
+
+            for timer in expired:
+                timer.bucket = None
+                timer.expired = True
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    logging.exception("Python: ошибка в колбэке таймера")
+        return len(expired)
+
+    def wait(self, max_timeout: float | None = None) -> bool:
+        """
+        Для потока колеса: спит до ближайшего тика с таймерами (не дольше max_timeout)
+        или до появления более раннего таймера. False - колесо закрыто.
+        """
+        with self.changed:
+            if self.closed:
+                return False
+            timeout = self._next_timeout()
+            if max_timeout is not None:
+                timeout = max_timeout if timeout is None else min(timeout, max_timeout)
+            self.changed.wait(timeout)
+            self.wake_tick = None
+            return not self.closed
+
+    def _next_timeout(self) -> float | None:
+        if not self.count:
+            self.wake_tick = None
+            return None
+        # Ближайшая непустая ячейка; если таймер в ней ждёт следующего оборота,
+        # проснёмся впустую и посмотрим дальше
+        for step in range(1, self.slots + 1):
+            tick = self.current_tick + step
+            if self.buckets[tick % self.slots]:
+                break
+        self.wake_tick = tick
+        deadline = tick * self.resolution
+        if self.cap is not None:
+            deadline = min(deadline, self.cap)
+        return max(0.0, deadline - time.monotonic())
+
+    def close(self):
+        """Останавливает поток колеса; несработавшие таймеры отбрасываются."""
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
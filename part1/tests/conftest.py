@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from threading import Event, Thread
+
+import pytest
+
+from final_tcp_server.socket_io import SocketIO
+from wsgi.server import WSGIServer
+
+REQUEST = b"GET /ping HTTP/1.1\r\nHost: test\r\n\r\n"
+
+
+def ping_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "4")])
+    return [b"pong"]
+
+
+def connect(address: tuple | str, timeout: float = 5) -> socket.socket:
+    """Соединение с сервером; адрес-строка - путь unix domain socket."""
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        return sock
+    return socket.create_connection(address, timeout=timeout)
+
+
+def read_response(sock: socket.socket, end: bytes = b"pong") -> bytes:
+    """Читает ответ до end; пустой bytes - сервер закрыл соединение раньше."""
+    data = b""
+    while not data.endswith(end):
+        chunk = sock.recv(65536)
+        if not chunk:
+            return data
+        data += chunk
+    return data
+
+
+def read_until_closed(sock: socket.socket) -> bytes:
+    data = b""
+    while chunk := sock.recv(65536):
+        data += chunk
+    return data
+
+
+def decode_chunked(body: bytes) -> bytes:
+    data = b""
+    while True:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            assert body == b"\r\n"
+            return data
+        data += body[:size]
+        assert body[size : size + 2] == b"\r\n"
+        body = body[size + 2 :]
+
+
+def wait_for_server(address: tuple | str):
+    for _ in range(100):
+        try:
+            connect(address).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.01)
+
+
+def fetch(
+    address: tuple | str,
+    path: str = "/",
+    method: str = "GET",
+    headers: dict[str, str] | None = None,
+    body: bytes = b"",
+) -> tuple[str, dict[str, str], bytes]:
+    """Один запрос с Connection: close - (строка статуса, заголовки в нижнем регистре, тело)."""
+    lines = [f"{method} {path} HTTP/1.1", "Host: test", "Connection: close"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    with connect(address) as sock:
+        sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        raw = read_until_closed(sock)
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status, *header_lines = head.decode("latin-1").split("\r\n")
+    response_headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        response_headers[name.lower()] = value.strip()
+    return status, response_headers, body
+
+
+@pytest.fixture
+def serve():
+    """
+    Запускает WSGIServer на свободном порту (или на listener из kwargs) в отдельном потоке,
+    возвращает его адрес.
+    """
+    servers = []
+
+    def start(app=ping_app, **kwargs) -> tuple | str:
+        server = WSGIServer("127.0.0.1", 0, app, poll_interval=0.1, **kwargs)
+        address = server.server_socket.getsockname()
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        wait_for_server(address)
+        return address
+
+    yield start
+
+    for server, thread in servers:
+        server.shutdown_event.set()
+        server._broadcast_shutdown()
+        if server.event_loop is not None:
+            server.event_loop._wake()
+        thread.join(10)
+
+
+@pytest.fixture
+def stream():
+    """SocketIO над socketpair: в writer пишет тест, из reader читает сервер."""
+    writer, reader = socket.socketpair()
+    yield writer, SocketIO(reader, Event(), idle_timeout=1)
+    writer.close()
+    reader.close()
+
+
+@pytest.fixture
+def serve_process():
+    """
+    Запускает уже созданный сервер в дочернем процессе: pre-fork сервер сам форкает воркеров
+    и останавливается по SIGTERM. Возвращает адрес и процесс.
+    """
+    processes = []
+
+    def start(server) -> tuple:
+        address = server.server_socket.getsockname()
+        process = multiprocessing.get_context("fork").Process(target=server.serve_forever)
+        process.start()
+        processes.append(process)
+        # Слушающий сокет остался у дочернего процесса
+        server.server_socket.close()
+        wait_for_server(address)
+        return address, process
+
+    yield start
+
+    for process in processes:
+        if process.is_alive():
+            os.kill(process.pid, signal.SIGTERM)
+            process.join(10)
+        if process.is_alive():
+            process.kill()
+            process.join()
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from conftest import REQUEST, connect, ping_app, read_response
+from final_tcp_server.admission import AdmissionController
+from wsgi.server import WSGIServer
+
+
+def open_idle(address, count: int) -> list:
+    sockets = []
+    for _ in range(count):
+        sock = connect(address)
+        sock.sendall(REQUEST)
+        assert read_response(sock).endswith(b"pong")
+        sockets.append(sock)
+        time.sleep(0.05)
+    return sockets
+
+
+def test_idle_keep_alive_gives_slot_to_admitted_connection(serve):
+    address = serve(
+        concurrency="threads",
+        workers=2,
+        accept_queue_size=0,
+        keepalive_timeout=30,
+        admission=AdmissionController(max_limit=8),
+    )
+    idle = open_idle(address, 2)
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    sock = connect(address)
+    sock.sendall(REQUEST)
+    assert read_response(sock).startswith(b"HTTP/1.1 200 OK\r\n")
+    assert time.monotonic() - started < 1
+    assert idle[0].recv(1) == b""
+
+
+def test_busy_slots_answer_503_after_max_queue_wait(serve):
+    def slow_app(environ, start_response):
+        time.sleep(1.5)
+        start_response("200 OK", [("Content-Length", "4")])
+        return [b"pong"]
+
+    address = serve(
+        slow_app,
+        concurrency="threads",
+        workers=1,
+        accept_queue_size=0,
+        admission=AdmissionController(max_limit=8, max_queue_wait=0.3),
+    )
+    busy = connect(address)
+    busy.sendall(REQUEST)
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    sock = connect(address)
+    sock.sendall(REQUEST)
+    response = read_response(sock, b"\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 503 Service Unavailable\r\n")
+    assert b"Retry-After: 1\r\n" in response
+    assert time.monotonic() - started < 1
+    assert read_response(busy).endswith(b"pong")
+
+
+def test_admission_requires_a_queue():
+    with pytest.raises(ValueError):
+        WSGIServer("127.0.0.1", 0, ping_app, admission=AdmissionController())
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from asgi.parser import END_OF_MESSAGE, Body, HTTPParser, ProtocolError, RequestHead
+from asgi.protocol import HTTPProtocol, ServerState
+
+
+async def pong(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"pong"})
+
+
+def events(parser: HTTPParser) -> list:
+    result = []
+    while (event := parser.next_event()) is not None:
+        result.append(event)
+    return result
+
+
+def run_server(app, client, idle_timeout: float = 5):
+    """Поднимает HTTPProtocol на свободном порту и выполняет client(reader, writer)."""
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(
+            lambda: HTTPProtocol(app, ServerState(), idle_timeout), "127.0.0.1", 0
+        )
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                return await asyncio.wait_for(client(reader, writer), 5)
+            finally:
+                writer.close()
+
+    return asyncio.run(main())
+
+
+def test_parser_content_length_body():
+    parser = HTTPParser()
+    parser.feed(b"POST /a HTTP/1.1\r\nContent-Length: 5\r\n\r\nhel")
+    parser.feed(b"lo")
+    head, *rest = events(parser)
+    assert isinstance(head, RequestHead)
+    assert (head.method, head.target, head.keep_alive) == ("POST", "/a", True)
+    assert b"".join(event.data for event in rest if isinstance(event, Body)) == b"hello"
+    assert rest[-1] is END_OF_MESSAGE
+
+
+def test_parser_chunked_body_and_pipelining():
+    parser = HTTPParser()
+    parser.feed(
+        b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"3\r\nabc\r\n2;ext=1\r\nde\r\n0\r\nX-Trailer: 1\r\n\r\n"
+        b"GET /next HTTP/1.1\r\nConnection: close\r\n\r\n"
+    )
+    first, *body, end, second, second_end = events(parser)
+    assert first.method == "POST"
+    assert b"".join(event.data for event in body) == b"abcde"
+    assert end is END_OF_MESSAGE
+    assert (second.target, second.keep_alive) == ("/next", False)
+    assert second_end is END_OF_MESSAGE
+
+
+def test_parser_rejects_transfer_encoding_with_content_length():
+    parser = HTTPParser()
+    with pytest.raises(ProtocolError):
+        parser.feed(b"POST / HTTP/1.1\r\nContent-Length: 3\r\nTransfer-Encoding: chunked\r\n\r\n")
+
+
+def test_parser_rejects_conflicting_content_length():
+    with pytest.raises(ProtocolError):
+        HTTPParser().feed(b"POST / HTTP/1.1\r\nContent-Length: 3\r\nContent-Length: 5\r\n\r\n")
+
+
+def test_parser_accepts_repeated_equal_content_length():
+    parser = HTTPParser()
+    parser.feed(b"POST / HTTP/1.1\r\nContent-Length: 3\r\nContent-Length: 3\r\n\r\nabc")
+    head, body, end = events(parser)
+    assert (body.data, end) == (b"abc", END_OF_MESSAGE)
+
+
+@pytest.mark.parametrize("size", [b"0x3", b"+3", b"-3", b"1_0", b"", b" "])
+def test_parser_rejects_non_hex_chunk_size(size):
+    with pytest.raises(ProtocolError):
+        HTTPParser().feed(
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n" + size + b"\r\nabc\r\n"
+        )
+
+
+def test_parser_rejects_unknown_transfer_encoding():
+    with pytest.raises(ProtocolError):
+        HTTPParser().feed(b"POST / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n")
+
+
+def test_smuggling_attempt_gets_400():
+    async def client(reader, writer):
+        writer.write(
+            b"POST / HTTP/1.1\r\nContent-Length: 4\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\n"
+        )
+        return await reader.read()
+
+    assert run_server(pong, client).startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+
+def test_pipelined_request_before_bad_one_is_answered():
+    async def client(reader, writer):
+        writer.write(b"GET /a HTTP/1.1\r\n\r\nGARBAGE\r\n\r\n")
+        return await reader.read()
+
+    response = run_server(pong, client)
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    _, _, second = response.partition(b"pong")
+    assert second.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+
+def test_bad_chunk_in_current_body_gets_400():
+    async def client(reader, writer):
+        writer.write(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n0x3\r\nabc\r\n")
+        return await reader.read()
+
+    assert run_server(pong, client).startswith(b"HTTP/1.1 400 Bad Request\r\n")
+
+
+def test_partial_head_times_out_with_408():
+    async def client(reader, writer):
+        writer.write(b"GET / HTTP/1.1\r\nHost: x")
+        return await reader.read()
+
+    response = run_server(pong, client, idle_timeout=0.2)
+    assert response.startswith(b"HTTP/1.1 408 Request Timeout\r\n")
+
+
+def test_trickled_head_extends_timeout():
+    async def client(reader, writer):
+        for byte in b"GET / HTTP/1.1\r\n\r\n":
+            writer.write(bytes([byte]))
+            await asyncio.sleep(0.02)
+        return await reader.readuntil(b"pong")
+
+    response = run_server(pong, client, idle_timeout=0.2)
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+
+
+def test_idle_keep_alive_closes_without_response():
+    async def client(reader, writer):
+        writer.write(b"GET / HTTP/1.1\r\n\r\n")
+        await reader.readuntil(b"pong")
+        return await reader.read()
+
+    assert run_server(pong, client, idle_timeout=0.2) == b""
+
+
+def test_nonstandard_status_has_empty_reason():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 599, "headers": []})
+        await send({"type": "http.response.body", "body": b"x"})
+
+    async def client(reader, writer):
+        writer.write(b"GET / HTTP/1.1\r\n\r\n")
+        return await reader.readuntil(b"\r\n")
+
+    assert run_server(app, client) == b"HTTP/1.1 599 \r\n"
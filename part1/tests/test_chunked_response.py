@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import connect, decode_chunked, fetch, read_response, read_until_closed
+
+
+def streaming_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    # Пустой кусок не должен превратиться в завершающий чанк 0
+    return iter([b"hello", b"", b", ", b"world"])
+
+
+@pytest.mark.parametrize("concurrency", ["sync", "eventloop"])
+def test_unknown_length_is_sent_chunked(serve, concurrency):
+    status, headers, body = fetch(serve(streaming_app, concurrency=concurrency))
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["transfer-encoding"] == "chunked"
+    assert "content-length" not in headers
+    assert decode_chunked(body) == b"hello, world"
+
+
+def test_chunked_response_keeps_connection_alive(serve):
+    address = serve(streaming_app)
+    with connect(address) as sock:
+        for _ in range(2):
+            sock.sendall(b"GET / HTTP/1.1\r\nHost: test\r\n\r\n")
+            response = read_response(sock, b"0\r\n\r\n")
+            assert decode_chunked(response.partition(b"\r\n\r\n")[2]) == b"hello, world"
+
+
+def test_http10_response_ends_with_close(serve):
+    address = serve(streaming_app)
+    with connect(address) as sock:
+        sock.sendall(b"GET / HTTP/1.0\r\n\r\n")
+        response = read_until_closed(sock)
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert b"transfer-encoding" not in head.lower()
+    assert body == b"hello, world"
+
+
+def test_head_response_has_no_body(serve):
+    status, headers, body = fetch(serve(streaming_app), method="HEAD")
+    assert status == "HTTP/1.1 200 OK"
+    assert body == b""
@@ -0,0 +1,127 @@
+import gzip
+import zlib
+
+import pytest
+
+from conftest import decode_chunked, fetch
+from final_tcp_server.metrics import ServerMetrics
+from wsgi.compression import ResponseCompressor, accepts_gzip
+
+TEXT = b"<p>hello, compression</p>\n" * 200
+
+
+def text_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/html"), ("Content-Length", str(len(TEXT)))])
+    return [TEXT]
+
+
+def streaming_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return iter([TEXT, b"", TEXT])
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, accepted",
+    [
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("x-gzip", True),
+        ("*", True),
+        ("gzip;q=0", False),
+        ("*, gzip;q=0", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip(accept_encoding, accepted):
+    assert accepts_gzip(accept_encoding) is accepted
+
+
+def test_negotiation(serve):
+    address = serve(text_app, compression=ResponseCompressor())
+    status, headers, body = fetch(address, headers={"Accept-Encoding": "gzip"})
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body) < len(TEXT)
+    assert gzip.decompress(body) == TEXT
+
+    # Без gzip в Accept-Encoding - исходное тело, но Vary всё равно нужен кэшам
+    status, headers, body = fetch(address, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert body == TEXT
+
+
+def test_small_and_binary_responses_are_not_compressed(serve):
+    def app(environ, start_response):
+        content_type = "image/png" if environ["PATH_INFO"] == "/png" else "text/plain"
+        start_response("200 OK", [("Content-Type", content_type)])
+        return [b"x" * 100 if environ["PATH_INFO"] == "/small" else TEXT]
+
+    address = serve(app, compression=ResponseCompressor(min_size=1024))
+    for path, body in (("/small", b"x" * 100), ("/png", TEXT)):
+        _, headers, received = fetch(address, path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in headers
+        assert received == body
+
+
+def test_streaming_body_is_compressed_by_chunks(serve):
+    address = serve(streaming_app, compression=ResponseCompressor())
+    status, headers, body = fetch(address, headers={"Accept-Encoding": "gzip"})
+    assert headers["content-encoding"] == "gzip"
+    assert headers["transfer-encoding"] == "chunked"
+    assert gzip.decompress(decode_chunked(body)) == TEXT * 2
+
+
+def test_sync_flush_lets_client_decode_each_chunk():
+    stream = ResponseCompressor().stream([b"first", b"second"])
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Каждый чанк распаковывается сразу, без конца потока
+    assert decompressor.decompress(next(stream)) == b"first"
+    assert decompressor.decompress(next(stream)) == b"second"
+    decompressor.decompress(next(stream))
+    assert decompressor.eof
+    assert list(stream) == []
+
+
+def test_list_body_over_max_body_size_is_streamed(serve):
+    address = serve(text_app, compression=ResponseCompressor(max_body_size=1024))
+    _, headers, body = fetch(address, headers={"Accept-Encoding": "gzip"})
+    assert headers["transfer-encoding"] == "chunked"
+    assert gzip.decompress(decode_chunked(body)) == TEXT
+
+
+def test_compressed_variant_cache():
+    compressor = ResponseCompressor()
+    key = ("test", "/")
+    compressed = compressor.compress(key, TEXT)
+    assert compressor.compress(key, bytes(TEXT)) is compressed
+    assert (compressor.hits, compressor.misses) == (1, 1)
+
+    # Тело по тому же URL изменилось - сжимаем заново
+    changed = TEXT + b"!"
+    assert gzip.decompress(compressor.compress(key, changed)) == changed
+    assert (compressor.hits, compressor.misses) == (1, 2)
+
+
+def test_compressed_variant_cache_eviction():
+    body = b"a" * 1000
+    # Помещается одна запись: исходное тело и сжатый вариант вместе
+    compressor = ResponseCompressor(max_size=1500)
+    compressor.compress(("test", "/a"), body)
+    compressor.compress(("test", "/b"), body)
+    assert list(compressor.cache.entries) == [("test", "/b")]
+    assert compressor.cache.size <= 1500
+
+
+def test_compression_metrics(serve):
+    compressor = ResponseCompressor()
+    address = serve(text_app, compression=compressor, metrics=ServerMetrics())
+    for _ in range(2):
+        fetch(address, headers={"Accept-Encoding": "gzip"})
+    _, _, body = fetch(address, "/metrics")
+    lines = body.decode().splitlines()
+    assert "http_compression_cache_hits_total 1" in lines
+    assert "http_compression_cache_misses_total 1" in lines
+    assert f"http_compression_cache_size_bytes {compressor.cache.size}" in lines
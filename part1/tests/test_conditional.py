@@ -0,0 +1,72 @@
+from conftest import fetch
+
+
+def static_app(headers: list[tuple[str, str]], body: bytes = b"hello world"):
+    def app(environ, start_response):
+        start_response("200 OK", [*headers, ("Content-Length", str(len(body)))])
+        return [body]
+
+    return app
+
+
+def test_server_computes_etag_and_answers_304(serve):
+    address = serve(static_app([("Content-Type", "text/plain")]), etag_max_size=1024)
+    status, headers, body = fetch(address)
+    assert status == "HTTP/1.1 200 OK"
+    etag = headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    status, headers, body = fetch(address, headers={"If-None-Match": etag})
+    assert (status, body) == ("HTTP/1.1 304 Not Modified", b"")
+    assert headers["etag"] == etag
+    assert "content-length" not in headers
+
+    assert fetch(address, headers={"If-None-Match": f'W/{etag}, "other"'})[0].endswith(
+        "304 Not Modified"
+    )
+    assert fetch(address, headers={"If-None-Match": '"other"'})[:3:2] == (
+        "HTTP/1.1 200 OK",
+        b"hello world",
+    )
+
+
+def test_large_streamed_response_gets_no_etag(serve):
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Length", "11")])
+        return iter([b"hello world"])
+
+    address = serve(app, etag_max_size=4)
+    status, headers, body = fetch(address)
+    assert (status, body) == ("HTTP/1.1 200 OK", b"hello world")
+    assert "etag" not in headers
+
+
+def test_large_list_response_gets_no_etag(serve):
+    body = b"x" * 100_000
+    address = serve(static_app([], body), etag_max_size=16)
+    status, headers, received = fetch(address)
+    assert (status, received) == ("HTTP/1.1 200 OK", body)
+    assert "etag" not in headers
+
+
+def test_etag_from_app(serve):
+    address = serve(static_app([("ETag", '"app"')]))
+    assert fetch(address, headers={"If-None-Match": '"app"'})[0] == "HTTP/1.1 304 Not Modified"
+    assert fetch(address, headers={"If-None-Match": "*"})[0] == "HTTP/1.1 304 Not Modified"
+    assert fetch(address, headers={"If-None-Match": '"new"'})[0] == "HTTP/1.1 200 OK"
+
+
+def test_last_modified_from_app(serve):
+    modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+    address = serve(static_app([("Last-Modified", modified)]))
+    assert fetch(address, headers={"If-Modified-Since": modified})[0].endswith("304 Not Modified")
+    earlier = "Tue, 20 Oct 2015 07:28:00 GMT"
+    assert fetch(address, headers={"If-Modified-Since": earlier})[0] == "HTTP/1.1 200 OK"
+
+
+def test_post_is_not_answered_with_304(serve):
+    address = serve(static_app([("ETag", '"app"')]))
+    status, _, _ = fetch(
+        address, method="POST", headers={"If-None-Match": '"app"', "Content-Length": "0"}
+    )
+    assert status != "HTTP/1.1 304 Not Modified"
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from conftest import REQUEST, connect, read_response
+
+
+@pytest.mark.parametrize("concurrency", ["threads", "eventloop"])
+def test_idle_keep_alive_evicted_at_max_connections(serve, concurrency):
+    address = serve(concurrency=concurrency, workers=4, max_connections=2, keepalive_timeout=30)
+    time.sleep(0.3)
+    idle = []
+    for _ in range(2):
+        sock = connect(address)
+        sock.sendall(REQUEST)
+        assert read_response(sock).endswith(b"pong")
+        idle.append(sock)
+        # Поток воркера начинает ждать уже после того, как клиент получил ответ:
+        # разносим соединения по времени, чтобы порядок простоя был однозначным
+        time.sleep(0.05)
+    # Простаивающее соединение отдают не сразу после ответа (poll_interval)
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    sock = connect(address)
+    sock.sendall(REQUEST)
+    assert read_response(sock).endswith(b"pong")
+    assert time.monotonic() - started < 1
+
+    # Место уступило самое давно простаивающее соединение
+    assert idle[0].recv(1) == b""
+    idle[1].sendall(REQUEST)
+    assert read_response(idle[1]).endswith(b"pong")
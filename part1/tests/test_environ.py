@@ -0,0 +1,114 @@
+import sys
+from wsgiref.validate import validator
+
+import pytest
+
+from conftest import connect, fetch, read_response
+
+# Ключи environ, обязательные по PEP 3333
+REQUIRED_KEYS = {
+    "REQUEST_METHOD",
+    "SCRIPT_NAME",
+    "PATH_INFO",
+    "QUERY_STRING",
+    "SERVER_NAME",
+    "SERVER_PORT",
+    "SERVER_PROTOCOL",
+    "wsgi.version",
+    "wsgi.url_scheme",
+    "wsgi.input",
+    "wsgi.errors",
+    "wsgi.multithread",
+    "wsgi.multiprocess",
+    "wsgi.run_once",
+}
+
+
+def recording_app(environs: list):
+    """Приложение запоминает environ каждого запроса и портит его, как может приложение."""
+
+    def app(environ, start_response):
+        environs.append(dict(environ))
+        body = environ["wsgi.input"].read()
+        environ["app.marker"] = True
+        environ["SERVER_NAME"] = "changed"
+        environ.pop("HTTP_X_FIRST", None)
+        start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "2")])
+        return [b"ok"] if body is not None else []
+
+    return app
+
+
+@pytest.mark.parametrize("concurrency", ["sync", "threads"])
+def test_required_keys(serve, concurrency):
+    environs = []
+    address = serve(recording_app(environs), concurrency=concurrency)
+    status, _, _ = fetch(
+        address,
+        "/a%20b/c?x=1&y=%20",
+        "POST",
+        {"Content-Type": "text/plain", "Content-Length": "0", "X-Custom": "1"},
+    )
+    assert status == "HTTP/1.1 200 OK"
+
+    environ = environs[0]
+    assert environ.keys() >= REQUIRED_KEYS
+    assert environ["REQUEST_METHOD"] == "POST"
+    assert environ["SCRIPT_NAME"] == ""
+    assert environ["PATH_INFO"] == "/a b/c"
+    assert environ["QUERY_STRING"] == "x=1&y=%20"
+    assert environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["SERVER_NAME"] == "127.0.0.1"
+    assert environ["SERVER_PORT"] == str(address[1])
+    assert environ["SERVER_PROTOCOL"] == "HTTP/1.1"
+    assert environ["HTTP_HOST"] == "test"
+    assert environ["HTTP_X_CUSTOM"] == "1"
+    # Content-Type и Content-Length не дублируются как HTTP_*
+    assert "HTTP_CONTENT_TYPE" not in environ and "HTTP_CONTENT_LENGTH" not in environ
+    assert environ["wsgi.version"] == (1, 0)
+    assert environ["wsgi.url_scheme"] == "http"
+    assert environ["wsgi.errors"] is sys.stderr
+    assert environ["wsgi.multithread"] is (concurrency == "threads")
+    assert environ["wsgi.multiprocess"] is False
+    assert environ["wsgi.run_once"] is False
+    for key, value in environ.items():
+        if key.isupper():
+            assert type(value) is str, key
+
+
+def test_path_info_is_latin1_of_raw_bytes(serve):
+    environs = []
+    address = serve(recording_app(environs))
+    fetch(address, "/%D0%BF%D1%83%D1%82%D1%8C")
+    assert environs[0]["PATH_INFO"].encode("latin-1").decode("utf-8") == "/путь"
+
+
+def test_environ_template_is_isolated_between_requests(serve):
+    environs = []
+    address = serve(recording_app(environs))
+    with connect(address) as sock:
+        sock.sendall(b"GET /first HTTP/1.1\r\nHost: test\r\nX-First: 1\r\n\r\n")
+        assert read_response(sock, b"ok").endswith(b"ok")
+        sock.sendall(b"GET /second HTTP/1.1\r\nHost: test\r\n\r\n")
+        assert read_response(sock, b"ok").endswith(b"ok")
+
+    first, second = environs
+    assert first["HTTP_X_FIRST"] == "1"
+    # Ни изменения приложения, ни заголовки прошлого запроса в шаблон не попадают
+    assert "HTTP_X_FIRST" not in second
+    assert "app.marker" not in second
+    assert second["SERVER_NAME"] == "127.0.0.1"
+    assert second["PATH_INFO"] == "/second"
+    assert second["CONTENT_LENGTH"] == ""
+    assert first["wsgi.input"] is not second["wsgi.input"]
+
+
+def test_passes_wsgiref_validator(serve):
+    def app(environ, start_response):
+        environ["wsgi.input"].read(int(environ["CONTENT_LENGTH"]))
+        start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "5")])
+        return [b"valid"]
+
+    address = serve(validator(app))
+    status, _, body = fetch(address, "/v?q=1", "POST", {"Content-Length": "3"}, b"abc")
+    assert (status, body) == ("HTTP/1.1 200 OK", b"valid")
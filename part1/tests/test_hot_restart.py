@@ -0,0 +1,78 @@
+import os
+import socket
+import sys
+from pathlib import Path
+
+from final_tcp_server.hot_restart import (
+    LISTEN_FD_ENV,
+    READY_FD_ENV,
+    inherited_socket,
+    notify_ready,
+    spawn_generation,
+)
+
+PART1 = str(Path(__file__).resolve().parents[1])
+
+# Новое поколение: берёт унаследованный сокет, сообщает о готовности и отвечает одному клиенту
+NEW_GENERATION = f"""
+import sys
+sys.path.insert(0, {PART1!r})
+from final_tcp_server.hot_restart import inherited_socket, notify_ready
+server_socket = inherited_socket()
+notify_ready()
+connection, _ = server_socket.accept()
+connection.sendall(b"new generation")
+connection.close()
+"""
+
+
+def listening_socket() -> socket.socket:
+    server_socket = socket.create_server(("127.0.0.1", 0))
+    server_socket.set_inheritable(False)
+    return server_socket
+
+
+def test_inherited_socket(monkeypatch):
+    with listening_socket() as server_socket:
+        monkeypatch.setenv(LISTEN_FD_ENV, str(os.dup(server_socket.fileno())))
+        with inherited_socket() as inherited:
+            assert inherited.getsockname() == server_socket.getsockname()
+            assert inherited.type == socket.SOCK_STREAM
+        # Переменная окружения не должна достаться следующему поколению
+        assert LISTEN_FD_ENV not in os.environ
+    assert inherited_socket() is None
+
+
+def test_notify_ready(monkeypatch):
+    ready_r, ready_w = os.pipe()
+    monkeypatch.setenv(READY_FD_ENV, str(ready_w))
+    notify_ready()
+    assert os.read(ready_r, 1) == b"1"
+    # Наш конец для записи закрыт - дальше EOF
+    assert os.read(ready_r, 1) == b""
+    os.close(ready_r)
+    # Повторный вызов (например, после перезапуска воркера) ничего не делает
+    notify_ready()
+
+
+def test_notify_ready_when_old_generation_is_gone(monkeypatch):
+    ready_r, ready_w = os.pipe()
+    os.close(ready_r)
+    monkeypatch.setenv(READY_FD_ENV, str(ready_w))
+    notify_ready()
+
+
+def test_spawn_generation_hands_over_the_socket(monkeypatch):
+    monkeypatch.setattr(sys, "orig_argv", [sys.executable, "-c", NEW_GENERATION])
+    with listening_socket() as server_socket:
+        assert spawn_generation(server_socket, timeout=10)
+        # Соединение на тот же адрес принимает уже новое поколение
+        with socket.create_connection(server_socket.getsockname(), timeout=5) as sock:
+            assert sock.recv(64) == b"new generation"
+
+
+def test_failed_generation_keeps_the_old_one(monkeypatch):
+    monkeypatch.setattr(sys, "orig_argv", [sys.executable, "-c", "raise SystemExit(1)"])
+    with listening_socket() as server_socket:
+        assert not spawn_generation(server_socket, timeout=10)
+        assert server_socket.fileno() != -1
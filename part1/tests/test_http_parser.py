@@ -0,0 +1,124 @@
+import time
+from threading import Thread
+
+import pytest
+
+from conftest import connect, read_response
+from wsgi.http_parser import (
+    HeadersTooLargeError,
+    HTTPLimits,
+    HTTPParseError,
+    RequestLineTooLongError,
+    VersionNotSupportedError,
+    parse_request_head,
+    read_request_head,
+)
+
+
+def test_head_with_crlf(stream):
+    writer, reader = stream
+    writer.sendall(b"GET /a?b=1 HTTP/1.1\r\nHost: x\r\nX-A: 1\r\nX-A: 2\r\n\r\nrest")
+    head = read_request_head(reader, HTTPLimits())
+    assert (head.method, head.target, head.protocol) == ("GET", "/a?b=1", "HTTP/1.1")
+    assert head.headers == {"host": "x", "x-a": "1, 2"}
+    # Тело и следующий запрос остаются в буфере
+    assert reader.read(4) == b"rest"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"GET / HTTP/1.1\nHost: x\n\n",
+        b"GET / HTTP/1.1\r\nHost: x\r\n\n",
+        b"GET / HTTP/1.1\nHost: x\n\r\n",
+    ],
+)
+def test_head_with_bare_lf(stream, raw):
+    writer, reader = stream
+    writer.sendall(raw + b"next")
+    head = read_request_head(reader, HTTPLimits())
+    assert head.target == "/"
+    assert head.headers == {"host": "x"}
+    assert reader.read(4) == b"next"
+
+
+@pytest.mark.parametrize(
+    "raw", [b"GET / HTTP/1.1\r\nHost: x\r\n\r\n", b"GET / HTTP/1.1\nHost: x\n\n"]
+)
+def test_head_arriving_byte_by_byte(stream, raw):
+    writer, reader = stream
+
+    def feed():
+        for byte in raw:
+            writer.send(bytes([byte]))
+            time.sleep(0.001)
+
+    feeder = Thread(target=feed)
+    feeder.start()
+    try:
+        assert read_request_head(reader, HTTPLimits()).headers == {"host": "x"}
+    finally:
+        feeder.join()
+
+
+def test_bare_lf_request_is_answered_at_once(serve):
+    address = serve(client_idle_timeout=5)
+    with connect(address) as sock:
+        started = time.monotonic()
+        sock.sendall(b"GET /ping HTTP/1.1\nHost: x\n\n")
+        assert read_response(sock).startswith(b"HTTP/1.1 200 OK\r\n")
+        assert time.monotonic() - started < 1
+
+
+def test_bare_cr_is_rejected():
+    with pytest.raises(HTTPParseError):
+        parse_request_head(b"GET / HTTP/1.1\r\nX-A: 1\rX-B: 2\r\n\r\n", HTTPLimits())
+
+
+@pytest.mark.parametrize("padding", [0, 8 * 1024])
+def test_header_without_colon_is_rejected(padding):
+    # padding делает блок длинным - строки режутся find(), а не split()
+    cookie = b"Cookie: " + b"a" * padding + b"\r\n"
+    with pytest.raises(HTTPParseError):
+        parse_request_head(b"GET / HTTP/1.1\r\n" + cookie + b"foo\r\nHost: x\r\n\r\n", HTTPLimits())
+
+
+@pytest.mark.parametrize("line_end", [b"\r\n", b"\n"])
+def test_long_header_line(stream, line_end):
+    writer, reader = stream
+    cookie = b"a=b; " * 8000 + b"z=1"
+    raw = line_end.join([b"GET / HTTP/1.1", b"Host: x", b"Cookie: " + cookie, b"X-A: 1", b"", b""])
+    writer.sendall(raw + b"next")
+    head = read_request_head(reader, HTTPLimits())
+    assert head.headers == {"host": "x", "cookie": cookie.decode(), "x-a": "1"}
+    assert reader.read(4) == b"next"
+
+
+def test_bare_lf_inside_long_head_is_rejected():
+    raw = b"GET / HTTP/1.1\r\nCookie: " + b"a" * 8192 + b"\nX-A: 1\r\n\r\n"
+    with pytest.raises(HTTPParseError):
+        parse_request_head(raw, HTTPLimits())
+
+
+def test_conflicting_content_length_is_rejected():
+    with pytest.raises(HTTPParseError):
+        parse_request_head(
+            b"POST / HTTP/1.1\r\nContent-Length: 1\r\nContent-Length: 2\r\n\r\n", HTTPLimits()
+        )
+
+
+def test_limits():
+    limits = HTTPLimits(max_request_line=16, max_headers=1)
+    with pytest.raises(RequestLineTooLongError):
+        parse_request_head(b"GET /" + b"a" * 32 + b" HTTP/1.1\r\n\r\n", limits)
+    with pytest.raises(HeadersTooLargeError):
+        parse_request_head(b"GET / HTTP/1.1\r\nA: 1\r\nB: 2\r\n\r\n", limits)
+    with pytest.raises(VersionNotSupportedError):
+        parse_request_head(b"GET / HTTP/2.0\r\n\r\n", limits)
+
+
+def test_head_larger_than_limit(stream):
+    writer, reader = stream
+    writer.sendall(b"GET / HTTP/1.1\r\nX: " + b"a" * 200 + b"\r\n\r\n")
+    with pytest.raises(HeadersTooLargeError):
+        read_request_head(reader, HTTPLimits(max_header_size=128))
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import signal
+import socket
+
+import pytest
+
+from conftest import fetch, ping_app, wait_for_server
+from final_tcp_server.listeners import SD_LISTEN_FDS_START, create_listener, systemd_listener
+from wsgi.server import WSGIServer
+
+
+def port_app(environ, start_response):
+    body = environ["SERVER_PORT"].encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def test_unix_listener(serve, tmp_path):
+    path = str(tmp_path / "server.sock")
+    address = serve(port_app, listener=f"unix:{path}")
+    assert address == path
+    # У unix-сокета нет порта - в SERVER_PORT остаётся переданный серверу
+    assert fetch(address)[::2] == ("HTTP/1.1 200 OK", b"0")
+
+
+def test_server_port_of_tcp_listener(serve):
+    address = serve(port_app)
+    assert fetch(address)[2] == str(address[1]).encode()
+
+
+def test_stale_unix_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "server.sock")
+    with create_listener(f"unix:{path}"):
+        pass
+    # Файл остался, но соединения никто не принимает - путь можно занять
+    with create_listener(f"unix:{path}") as listener:
+        listener.listen()
+        # Работающий сервер на этом пути не трогаем
+        with pytest.raises(OSError):
+            create_listener(f"unix:{path}")
+
+
+@pytest.mark.parametrize("spec", ["tcp:8000", "tcp:localhost:http", "unix:", "udp:x:1"])
+def test_invalid_listener_spec(spec):
+    with pytest.raises(ValueError):
+        create_listener(spec)
+
+
+def test_systemd_variables_for_another_process(monkeypatch):
+    monkeypatch.setenv("LISTEN_FDS", "1")
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid() + 1))
+    with pytest.raises(ValueError):
+        systemd_listener()
+    # Переменные удалены, чтобы их не унаследовали дочерние процессы
+    assert "LISTEN_FDS" not in os.environ
+
+
+def test_unknown_systemd_socket_name(monkeypatch):
+    monkeypatch.setenv("LISTEN_FDS", "1")
+    monkeypatch.setenv("LISTEN_PID", str(os.getpid()))
+    monkeypatch.setenv("LISTEN_FDNAMES", "http")
+    with pytest.raises(ValueError):
+        systemd_listener("admin")
+
+
+def serve_systemd_socket(fd: int):
+    """Дочерний процесс: сокет на месте, где его оставил бы systemd, и сервер на нём."""
+    os.dup2(fd, SD_LISTEN_FDS_START)
+    os.environ.update(LISTEN_FDS="2", LISTEN_PID=str(os.getpid()), LISTEN_FDNAMES="http:admin")
+    # Второй сокет (fd 4) не используется - сервер выбирает свой по имени
+    server = WSGIServer("127.0.0.1", 0, ping_app, listener="systemd:http", poll_interval=0.1)
+    server.serve_forever()
+
+
+def test_systemd_listener():
+    with socket.create_server(("127.0.0.1", 0)) as server_socket:
+        address = server_socket.getsockname()
+        process = multiprocessing.get_context("fork").Process(
+            target=serve_systemd_socket, args=(server_socket.fileno(),)
+        )
+        process.start()
+    try:
+        wait_for_server(address)
+        assert fetch(address, "/ping")[::2] == ("HTTP/1.1 200 OK", b"pong")
+    finally:
+        os.kill(process.pid, signal.SIGTERM)
+        process.join(10)
+        if process.is_alive():
+            process.kill()
+            process.join()
+    assert process.exitcode == 0
@@ -0,0 +1,70 @@
+from conftest import fetch
+from final_tcp_server.metrics import ServerMetrics
+from wsgi.server import PreforkWSGIServer, make_handler
+
+
+def counting_app(calls: list):
+    def app(environ, start_response):
+        calls.append(environ["PATH_INFO"])
+        status = "200 OK" if environ["PATH_INFO"] == "/ok" else "404 Not Found"
+        start_response(status, [("Content-Type", "text/plain"), ("Content-Length", "2")])
+        return [b"ok"]
+
+    return app
+
+
+def test_metrics_endpoint(serve):
+    calls = []
+    address = serve(counting_app(calls), metrics=ServerMetrics())
+    for path in ("/ok", "/ok", "/ok", "/missing"):
+        fetch(address, path)
+
+    status, headers, body = fetch(address, "/metrics")
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["content-type"].startswith("text/plain; version=0.0.4")
+    # Метрики отдаёт сервер, приложение на /metrics не вызывается
+    assert calls == ["/ok", "/ok", "/ok", "/missing"]
+
+    lines = body.decode().splitlines()
+    assert "# TYPE http_requests_total counter" in lines
+    assert 'http_requests_total{code="200"} 3' in lines
+    assert 'http_requests_total{code="404"} 1' in lines
+    assert 'http_request_phase_seconds_count{phase="app"} 4' in lines
+    assert 'http_request_phase_seconds_bucket{phase="app",le="+Inf"} 4' in lines
+    accepted = next(line for line in lines if line.startswith("server_connections_accepted_total"))
+    assert int(accepted.split()[1]) >= 5
+
+
+def test_metrics_endpoint_methods(serve):
+    address = serve(metrics=ServerMetrics())
+    status, headers, _ = fetch(address, "/metrics", method="POST", headers={"Content-Length": "0"})
+    assert status == "HTTP/1.1 405 Method Not Allowed"
+    assert headers["allow"] == "GET, HEAD"
+    status, _, body = fetch(address, "/metrics", method="HEAD")
+    assert (status, body) == ("HTTP/1.1 200 OK", b"")
+
+
+def test_metrics_path_goes_to_app_without_metrics(serve):
+    calls = []
+    address = serve(counting_app(calls))
+    assert fetch(address, "/metrics")[0] == "HTTP/1.1 404 Not Found"
+    assert calls == ["/metrics"]
+
+
+def test_make_handler_splits_options():
+    metrics = ServerMetrics()
+    handler, server_options = make_handler(
+        counting_app([]), "127.0.0.1", 8000, etag_max_size=64, metrics=metrics, poll_interval=0.1
+    )
+    assert (handler.etag_max_size, handler.metrics) == (64, metrics)
+    # metrics нужен и серверу: он считает соединения и байты
+    assert server_options == {"metrics": metrics, "poll_interval": 0.1}
+
+
+def test_prefork_server_shares_metrics_with_handler():
+    metrics = ServerMetrics()
+    server = PreforkWSGIServer("127.0.0.1", 0, counting_app([]), processes=1, metrics=metrics)
+    with server.server_socket:
+        assert server.metrics is metrics
+        assert server.handler.metrics is metrics
+        assert server.handler.multiprocess
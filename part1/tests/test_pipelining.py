@@ -0,0 +1,50 @@
+import pytest
+
+from conftest import connect, read_response, read_until_closed
+
+
+def path_app(environ, start_response):
+    body = environ["PATH_INFO"].encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+@pytest.mark.parametrize("concurrency", ["sync", "threads", "eventloop"])
+def test_pipelined_responses_keep_order(serve, concurrency):
+    address = serve(path_app, concurrency=concurrency)
+    requests = b"".join(b"GET /%d HTTP/1.1\r\nHost: test\r\n\r\n" % i for i in range(20))
+    with connect(address) as sock:
+        sock.sendall(requests)
+        response = read_response(sock, b"/19")
+    bodies = [part.rsplit(b"\r\n\r\n", 1)[-1] for part in response.split(b"HTTP/1.1 200 OK")[1:]]
+    assert bodies == [b"/%d" % i for i in range(20)]
+
+
+def test_pipelined_body_is_not_read_as_next_request(serve):
+    def echo_app(environ, start_response):
+        body = environ["wsgi.input"].read()
+        start_response("200 OK", [("Content-Length", str(len(body)))])
+        return [body]
+
+    address = serve(echo_app)
+    with connect(address) as sock:
+        sock.sendall(
+            b"POST / HTTP/1.1\r\nContent-Length: 19\r\n\r\nGET /x HTTP/1.1\r\n\r\n"
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+            b"3\r\nend\r\n0\r\n\r\n"
+        )
+        response = read_until_closed(sock)
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+    assert b"\r\n\r\nGET /x HTTP/1.1\r\n\r\n" in response
+    assert response.endswith(b"\r\n\r\nend")
+
+
+def test_pipeline_stops_after_connection_close(serve):
+    address = serve(path_app)
+    with connect(address) as sock:
+        sock.sendall(
+            b"GET /a HTTP/1.1\r\nConnection: close\r\n\r\nGET /b HTTP/1.1\r\nHost: test\r\n\r\n"
+        )
+        response = read_until_closed(sock)
+    assert response.endswith(b"/a")
+    assert response.count(b"HTTP/1.1") == 1
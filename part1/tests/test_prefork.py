@@ -0,0 +1,48 @@
+import os
+import signal
+
+from conftest import fetch
+from wsgi.server import PreforkWSGIServer
+
+
+def pid_app(environ, start_response):
+    body = f"{os.getpid()} {environ['wsgi.multiprocess']}".encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def worker_pid(address: tuple) -> int:
+    status, _, body = fetch(address)
+    assert status == "HTTP/1.1 200 OK"
+    pid, multiprocess = body.split()
+    assert multiprocess == b"True"
+    return int(pid)
+
+
+def test_workers_serve_requests(serve_process):
+    server = PreforkWSGIServer("127.0.0.1", 0, pid_app, processes=2, poll_interval=0.1)
+    address, master = serve_process(server)
+    pids = {worker_pid(address) for _ in range(10)}
+    assert pids.isdisjoint({os.getpid(), master.pid})
+    # Счётчики воркеров лежат в разделяемой памяти и видны из родителя
+    assert sum(server.accept_stats) >= 10
+
+
+def test_crashed_worker_is_replaced(serve_process):
+    server = PreforkWSGIServer("127.0.0.1", 0, pid_app, processes=1, poll_interval=0.1)
+    address, _ = serve_process(server)
+    crashed = worker_pid(address)
+    os.kill(crashed, signal.SIGKILL)
+    # Соединение ждёт в backlog общего сокета, пока мастер не запустит замену
+    assert worker_pid(address) != crashed
+
+
+def test_sigterm_stops_master_and_workers(serve_process):
+    server = PreforkWSGIServer("127.0.0.1", 0, pid_app, processes=2, poll_interval=0.1)
+    address, master = serve_process(server)
+    pids = {worker_pid(address) for _ in range(5)}
+    os.kill(master.pid, signal.SIGTERM)
+    master.join(15)
+    assert master.exitcode == 0
+    for pid in pids:
+        assert not os.path.exists(f"/proc/{pid}")
@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import fetch
+
+DATA = b"0123456789"
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(DATA)
+
+    def app(environ, start_response):
+        start_response(
+            "200 OK",
+            [
+                ("Content-Type", "application/octet-stream"),
+                ("Content-Length", str(len(DATA))),
+                ("ETag", '"v1"'),
+                ("Last-Modified", "Wed, 21 Oct 2015 07:28:00 GMT"),
+            ],
+        )
+        return environ["wsgi.file_wrapper"](open(path, "rb"))
+
+    return app
+
+
+def test_full_file_advertises_ranges(serve, file_app):
+    status, headers, body = fetch(serve(file_app))
+    assert (status, body) == ("HTTP/1.1 200 OK", DATA)
+    assert headers["accept-ranges"] == "bytes"
+
+
+@pytest.mark.parametrize(
+    ("range_header", "content_range", "body"),
+    [
+        ("bytes=2-5", "bytes 2-5/10", b"2345"),
+        ("bytes=7-", "bytes 7-9/10", b"789"),
+        ("bytes=-3", "bytes 7-9/10", b"789"),
+        ("bytes=8-100", "bytes 8-9/10", b"89"),
+    ],
+)
+def test_single_range(serve, file_app, range_header, content_range, body):
+    status, headers, response_body = fetch(serve(file_app), headers={"Range": range_header})
+    assert status == "HTTP/1.1 206 Partial Content"
+    assert headers["content-range"] == content_range
+    assert headers["content-length"] == str(len(body))
+    assert response_body == body
+
+
+def test_unsatisfiable_range(serve, file_app):
+    status, headers, body = fetch(serve(file_app), headers={"Range": "bytes=20-30"})
+    assert status == "HTTP/1.1 416 Range Not Satisfiable"
+    assert headers["content-range"] == "bytes */10"
+
+
+def test_invalid_range_is_ignored(serve, file_app):
+    status, _, body = fetch(serve(file_app), headers={"Range": "items=1-2"})
+    assert (status, body) == ("HTTP/1.1 200 OK", DATA)
+
+
+def test_if_range(serve, file_app):
+    address = serve(file_app)
+    matching = fetch(address, headers={"Range": "bytes=0-1", "If-Range": '"v1"'})
+    assert (matching[0], matching[2]) == ("HTTP/1.1 206 Partial Content", b"01")
+    # Файл изменился - клиент получает его целиком
+    changed = fetch(address, headers={"Range": "bytes=0-1", "If-Range": '"v2"'})
+    assert (changed[0], changed[2]) == ("HTTP/1.1 200 OK", DATA)
@@ -0,0 +1,101 @@
+import tempfile
+
+import pytest
+
+from conftest import connect, read_until_closed
+from wsgi import request_body
+from wsgi.request_body import (
+    BodyReader,
+    RequestBodyError,
+    RequestBodyTooLargeError,
+    read_chunked_body,
+)
+
+
+def echo_app(environ, start_response):
+    body = environ["wsgi.input"].read()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def test_body_reader_stops_at_content_length(stream):
+    writer, reader = stream
+    writer.sendall(b"hello\nworldGET / HTTP/1.1")
+    body = BodyReader(reader, 11)
+    assert body.readline() == b"hello\n"
+    assert body.read() == b"world"
+    assert body.read() == b""
+    # Следующий запрос остаётся в потоке
+    assert reader.read(3) == b"GET"
+
+
+def test_chunked_body(stream):
+    writer, reader = stream
+    writer.sendall(b"3\r\nabc\r\n4;name=value\r\ndefg\r\n0\r\nX-Trailer: 1\r\n\r\nnext")
+    body, size = read_chunked_body(reader, None, 1024)
+    assert (body.read(), size) == (b"abcdefg", 7)
+    assert reader.read(4) == b"next"
+
+
+def test_chunked_body_spools_to_disk(stream):
+    writer, reader = stream
+    writer.sendall(b"800\r\n" + b"x" * 0x800 + b"\r\n0\r\n\r\n")
+    body, size = read_chunked_body(reader, None, 1024)
+    assert size == 0x800
+    assert body._rolled
+    assert body.read() == b"x" * 0x800
+
+
+@pytest.mark.parametrize(
+    ("raw", "error"),
+    [
+        (b"zz\r\n", RequestBodyError),
+        (b"+5\r\nabcde\r\n0\r\n\r\n", RequestBodyError),
+        (b"3\r\nabcX\r\n0\r\n\r\n", RequestBodyError),
+        (b"10\r\n" + b"x" * 16 + b"\r\n0\r\n\r\n", RequestBodyTooLargeError),
+        (b"5\r\nab", ConnectionError),
+    ],
+)
+def test_chunked_body_errors_close_spool(stream, monkeypatch, raw, error):
+    spools = []
+    spooled_file = tempfile.SpooledTemporaryFile
+
+    def spool(*args, **kwargs):
+        spools.append(spooled_file(*args, **kwargs))
+        return spools[-1]
+
+    monkeypatch.setattr(request_body.tempfile, "SpooledTemporaryFile", spool)
+    writer, reader = stream
+    writer.sendall(raw)
+    writer.shutdown(2)
+    with pytest.raises(error):
+        read_chunked_body(reader, 8, 1024)
+    assert spools and spools[0].closed
+
+
+def test_chunked_request_is_echoed(serve):
+    address = serve(echo_app)
+    with connect(address) as sock:
+        sock.sendall(
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+            b"5\r\nhello\r\n0\r\n\r\n"
+        )
+        response = read_until_closed(sock)
+    assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert response.endswith(b"\r\n\r\nhello")
+
+
+@pytest.mark.parametrize(
+    ("headers", "status"),
+    [
+        (b"Transfer-Encoding: chunked\r\nContent-Length: 5\r\n", b"400"),
+        (b"Transfer-Encoding: gzip\r\n", b"400"),
+        (b"Content-Length: 100000\r\n", b"413"),
+    ],
+)
+def test_bad_body_framing(serve, headers, status):
+    address = serve(echo_app, max_body_size=1024)
+    with connect(address) as sock:
+        sock.sendall(b"POST / HTTP/1.1\r\n" + headers + b"\r\n5\r\nhello\r\n0\r\n\r\n")
+        response = read_until_closed(sock)
+    assert response.startswith(b"HTTP/1.1 " + status)
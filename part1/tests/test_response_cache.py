@@ -0,0 +1,78 @@
+from conftest import fetch
+from wsgi.response_cache import ResponseCache
+
+
+def counting_app(calls: list, headers: list[tuple[str, str]]):
+    def app(environ, start_response):
+        calls.append(environ["PATH_INFO"])
+        body = b"call %d" % len(calls)
+        start_response("200 OK", [*headers, ("Content-Length", str(len(body)))])
+        return [body]
+
+    return app
+
+
+def test_fresh_response_is_served_from_cache(serve):
+    calls = []
+    cache = ResponseCache()
+    address = serve(
+        counting_app(calls, [("Cache-Control", "max-age=60"), ("ETag", '"v1"')]),
+        response_cache=cache,
+    )
+    first = fetch(address, "/page")
+    second = fetch(address, "/page")
+    head = fetch(address, "/page", "HEAD")
+    assert calls == ["/page"]
+    assert first[2] == second[2] == b"call 1"
+    assert second[1]["age"].isdigit()
+    assert head[0] == "HTTP/1.1 200 OK" and head[2] == b""
+    assert head[1]["content-length"] == "6"
+
+    # Условный запрос к закэшированному ответу - 304 без вызова приложения
+    status, _, body = fetch(address, "/page", headers={"If-None-Match": '"v1"'})
+    assert (status, body) == ("HTTP/1.1 304 Not Modified", b"")
+    assert calls == ["/page"]
+
+    # Другой URL и запрос с no-cache идут в приложение
+    fetch(address, "/other")
+    fetch(address, "/page", headers={"Cache-Control": "no-cache"})
+    assert calls == ["/page", "/other", "/page"]
+    assert cache.stats()["hits"] == 3
+
+
+def test_uncacheable_responses_are_not_stored(serve):
+    for headers in (
+        [],
+        [("Cache-Control", "no-store, max-age=60")],
+        [("Cache-Control", "private, max-age=60")],
+        [("Cache-Control", "max-age=60"), ("Set-Cookie", "id=1")],
+    ):
+        calls = []
+        cache = ResponseCache()
+        address = serve(counting_app(calls, headers), response_cache=cache)
+        fetch(address, "/")
+        fetch(address, "/")
+        assert len(calls) == 2, headers
+        assert cache.stats()["entries"] == 0
+
+
+def test_authorized_request_bypasses_cache(serve):
+    calls = []
+    address = serve(
+        counting_app(calls, [("Cache-Control", "max-age=60")]), response_cache=ResponseCache()
+    )
+    fetch(address, "/", headers={"Authorization": "Bearer x"})
+    fetch(address, "/", headers={"Authorization": "Bearer x"})
+    assert len(calls) == 2
+
+
+def test_vary_keeps_separate_variants(serve):
+    calls = []
+    address = serve(
+        counting_app(calls, [("Cache-Control", "max-age=60"), ("Vary", "Accept-Language")]),
+        response_cache=ResponseCache(),
+    )
+    assert fetch(address, "/", headers={"Accept-Language": "ru"})[2] == b"call 1"
+    assert fetch(address, "/", headers={"Accept-Language": "en"})[2] == b"call 2"
+    assert fetch(address, "/", headers={"Accept-Language": "ru"})[2] == b"call 1"
+    assert len(calls) == 2
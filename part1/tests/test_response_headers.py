@@ -0,0 +1,64 @@
+import email.utils
+import time
+
+from conftest import connect, fetch, read_until_closed
+from wsgi import http_response
+from wsgi.http_response import status_line
+
+
+def own_headers_app(environ, start_response):
+    start_response(
+        "200 OK",
+        [("Server", "custom"), ("date", "Thu, 01 Jan 2026 00:00:00 GMT"), ("Content-Length", "2")],
+    )
+    return [b"ok"]
+
+
+def test_date_and_server_are_added(serve):
+    address = serve()
+    status, headers, body = fetch(address, "/ping")
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["server"] == "python-web-server"
+    # IMF-fixdate в GMT, с точностью до секунды
+    assert headers["date"].endswith(" GMT")
+    assert abs(email.utils.parsedate_to_datetime(headers["date"]).timestamp() - time.time()) < 2
+
+
+def test_app_headers_are_kept(serve):
+    address = serve(own_headers_app)
+    with connect(address) as sock:
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n")
+        head = read_until_closed(sock).partition(b"\r\n\r\n")[0].lower()
+    # Заголовки приложения не дублируются серверными
+    assert head.count(b"\r\nserver:") == 1
+    assert head.count(b"\r\ndate:") == 1
+    assert b"\r\nserver: custom" in head
+    assert b"\r\ndate: thu, 01 jan 2026 00:00:00 gmt" in head
+
+
+def test_date_header_is_cached_within_a_second(monkeypatch):
+    calls = []
+
+    def formatdate(*args, **kwargs):
+        calls.append(args)
+        return email.utils.formatdate(*args, **kwargs)
+
+    monkeypatch.setattr(http_response, "formatdate", formatdate)
+    monkeypatch.setattr(http_response, "_date_cache", (0.0, ""))
+    now = 1_800_000_000.25
+    monkeypatch.setattr(http_response.time, "time", lambda: now)
+    header = http_response.date_header()
+    assert header == "Date: Fri, 15 Jan 2027 08:00:00 GMT\r\n"
+    now += 0.5
+    assert http_response.date_header() == header
+    assert len(calls) == 1
+    # Новая секунда - новое значение
+    now += 0.5
+    assert http_response.date_header() == "Date: Fri, 15 Jan 2027 08:00:01 GMT\r\n"
+    assert len(calls) == 2
+
+
+def test_status_line():
+    assert status_line("404 Not Found") == "HTTP/1.1 404 Not Found\r\n"
+    # Нестандартный код форматируется на месте
+    assert status_line("299 Custom") == "HTTP/1.1 299 Custom\r\n"
@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+from conftest import REQUEST, connect, ping_app, read_response
+from wsgi.server import PreforkWSGIServer
+
+
+def test_connections_are_spread_between_worker_sockets(serve_process):
+    server = PreforkWSGIServer(
+        "127.0.0.1", 0, ping_app, processes=2, reuse_port=True, poll_interval=0.1
+    )
+    address, _ = serve_process(server)
+    deadline = time.monotonic() + 10
+    # Первые соединения могут прийти, пока второй воркер ещё не открыл свой сокет
+    while min(server.accept_stats) == 0 and time.monotonic() < deadline:
+        with connect(address) as sock:
+            sock.sendall(REQUEST)
+            assert read_response(sock).endswith(b"pong")
+    assert min(server.accept_stats) > 0
+
+
+def test_reuse_port_requires_tcp(tmp_path):
+    with pytest.raises(ValueError):
+        PreforkWSGIServer(
+            "127.0.0.1", 0, ping_app, reuse_port=True, listener=f"unix:{tmp_path}/s.sock"
+        )
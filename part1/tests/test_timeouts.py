@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+from conftest import REQUEST, connect, read_response, read_until_closed
+
+MODES = ["sync", "threads", "eventloop"]
+
+
+@pytest.mark.parametrize("concurrency", MODES)
+def test_partial_head_gets_408(serve, concurrency):
+    address = serve(concurrency=concurrency, client_idle_timeout=0.3)
+    with connect(address) as sock:
+        sock.sendall(b"GET /ping HTTP/1.1\r\nHost: x")
+        started = time.monotonic()
+        response = read_until_closed(sock)
+    assert response.startswith(b"HTTP/1.1 408 Request Timeout\r\n")
+    assert time.monotonic() - started < 2
+
+
+@pytest.mark.parametrize("concurrency", MODES)
+def test_idle_keep_alive_closes_silently(serve, concurrency):
+    address = serve(concurrency=concurrency, keepalive_timeout=0.3)
+    with connect(address) as sock:
+        sock.sendall(REQUEST)
+        assert read_response(sock).endswith(b"pong")
+        assert read_until_closed(sock) == b""
+
+
+@pytest.mark.parametrize("concurrency", MODES)
+def test_trickled_request_is_served(serve, concurrency):
+    address = serve(concurrency=concurrency, client_idle_timeout=0.5)
+    with connect(address) as sock:
+        for start in range(0, len(REQUEST), 4):
+            sock.sendall(REQUEST[start : start + 4])
+            time.sleep(0.02)
+        assert read_response(sock).startswith(b"HTTP/1.1 200 OK\r\n")
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import pytest
+
+from final_tcp_server import timer_wheel
+from final_tcp_server.timer_wheel import TimerWheel
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Подменяет time.monotonic в колесе таймеров: тест сам двигает время."""
+    now = [1000.0]
+    monkeypatch.setattr(timer_wheel, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_timer_fires_not_before_deadline(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    wheel.schedule(0.25, fired.append, "a")
+    clock[0] += 0.2
+    assert wheel.advance() == 0
+    clock[0] += 0.1
+    assert wheel.advance() == 1
+    assert fired == ["a"]
+    assert wheel.count == 0
+
+
+def test_timer_beyond_one_revolution_waits_for_its_tick(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    # 1.25 с - больше оборота колеса (0.8 с): таймер лежит в той же ячейке, что и ранние
+    wheel.schedule(1.25, fired.append, "late")
+    wheel.schedule(0.45, fired.append, "early")
+    for _ in range(10):
+        clock[0] += 0.1
+        wheel.advance()
+    assert fired == ["early"]
+    clock[0] += 0.3
+    wheel.advance()
+    assert fired == ["early", "late"]
+
+
+def test_long_sleep_processes_every_bucket_once(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    for delay in (0.1, 0.35, 0.7):
+        wheel.schedule(delay, fired.append, delay)
+    clock[0] += 100
+    assert wheel.advance() == 3
+    assert sorted(fired) == [0.1, 0.35, 0.7]
+
+
+def test_cancelled_timer_does_not_fire(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    timer = wheel.schedule(0.1, fired.append, "x")
+    wheel.cancel(timer)
+    wheel.cancel(timer)
+    wheel.cancel(None)
+    assert wheel.count == 0
+    clock[0] += 1
+    assert wheel.advance() == 0
+    assert fired == []
+    assert not timer.expired
+
+
+def test_shorten_fires_all_timers_at_cap(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    wheel.schedule(60, fired.append, "a")
+    wheel.schedule(5, fired.append, "b")
+    wheel.shorten(0.5)
+    # Таймер, поставленный до общего дедлайна, тоже его не переживёт
+    later = wheel.schedule(30, fired.append, "c")
+    assert later.deadline == pytest.approx(clock[0] + 0.5)
+    clock[0] += 0.4
+    assert wheel.advance() == 0
+    clock[0] += 0.1
+    assert wheel.advance() == 3
+    assert sorted(fired) == ["a", "b", "c"]
+    assert wheel.cap is None
+
+
+def test_callback_error_does_not_stop_other_timers(clock):
+    wheel = TimerWheel(resolution=0.1, slots=8)
+    fired = []
+    wheel.schedule(0.1, lambda: 1 / 0)
+    wheel.schedule(0.1, fired.append, "ok")
+    clock[0] += 0.2
+    assert wheel.advance() == 2
+    assert fired == ["ok"]
+
+
+def test_wait_returns_false_after_close():
+    wheel = TimerWheel()
+    assert wheel.wait(0) is True
+    wheel.close()
+    assert wheel.wait(10) is False
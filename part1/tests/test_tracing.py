@@ -0,0 +1,90 @@
+import cProfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import fetch
+from wsgi.tracing import RequestTracer
+
+
+def slow_app(environ, start_response):
+    time.sleep(0.2)
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", "4")])
+    return [b"slow"]
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracers = []
+
+    def make(**kwargs) -> RequestTracer:
+        tracer = RequestTracer(path=str(tmp_path / "slow.log"), **kwargs)
+        tracers.append(tracer)
+        return tracer
+
+    yield make
+    for tracer in tracers:
+        tracer.close()
+
+
+def test_slow_request_is_dumped(serve, tracer, tmp_path):
+    address = serve(slow_app, tracer=tracer(threshold=0.1))
+    fetch(address, "/ping")
+    log = (tmp_path / "slow.log").read_text(encoding="utf-8")
+    assert "медленный запрос" in log
+    assert "GET /ping HTTP/1.1 -> 200 OK" in log
+    assert "ответ приложения" in log
+    # Без выборки профиль не снимается
+    assert "function calls" not in log
+
+
+def test_fast_request_is_not_dumped(serve, tracer, tmp_path):
+    slow_requests = tracer(threshold=10)
+    fetch(serve(tracer=slow_requests), "/ping")
+    assert slow_requests.slow_requests == 0
+    assert not (tmp_path / "slow.log").exists()
+
+
+def test_profile_sampling(tracer):
+    sampled = tracer(profile_every=3)
+    profiles = []
+    for _ in range(6):
+        profiler = sampled.start_profile()
+        if profiler is not None:
+            sampled.stop_profile(profiler)
+        profiles.append(profiler is not None)
+    assert profiles == [False, False, True, False, False, True]
+    assert tracer().start_profile() is None
+
+
+def test_profile_is_skipped_while_another_is_active(tracer):
+    sampled = tracer(profile_every=1)
+    profiler = sampled.start_profile()
+    assert profiler is not None
+    # Второй профиль в процессе включить нельзя - запрос выполняется без него
+    assert sampled.start_profile() is None
+    sampled.stop_profile(profiler)
+    profiler = sampled.start_profile()
+    assert profiler is not None
+    sampled.stop_profile(profiler)
+
+
+def test_profiler_enabled_outside_the_server(tracer):
+    outside = cProfile.Profile()
+    outside.enable()
+    try:
+        assert tracer(profile_every=1).start_profile() is None
+    finally:
+        outside.disable()
+
+
+def test_concurrent_sampled_requests(serve, tracer, tmp_path):
+    sampled = tracer(threshold=0.1, profile_every=1)
+    address = serve(slow_app, concurrency="threads", workers=4, tracer=sampled)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: fetch(address, "/ping"), range(4)))
+    assert [(status, body) for status, _, body in results] == [("HTTP/1.1 200 OK", b"slow")] * 4
+    assert sampled.slow_requests == 4
+    # Профиль снят хотя бы у одного запроса из параллельных
+    assert "function calls" in (tmp_path / "slow.log").read_text(encoding="utf-8")
@@ -0,0 +1,63 @@
+import time
+
+from conftest import connect, read_until_closed
+from final_tcp_server import server
+from final_tcp_server.server import TCPServer
+
+
+class TrickleSocket:
+    """Сокет, который за один sendmsg() принимает не больше step байт."""
+
+    def __init__(self, step: int):
+        self.step = step
+        self.data = bytearray()
+        self.calls: list[int] = []
+
+    def sendmsg(self, buffers) -> int:
+        self.calls.append(len(buffers))
+        budget = self.step
+        for buffer in buffers:
+            taken = bytes(buffer[:budget])
+            self.data += taken
+            budget -= len(taken)
+            if not budget:
+                break
+        return self.step - budget
+
+
+def send(sock, buffers: list[bytes]) -> int:
+    # Метод не обращается к состоянию сервера
+    return TCPServer._sendmsg_all(None, sock, buffers)
+
+
+def test_partial_sendmsg_sends_the_rest():
+    buffers = [b"HTTP/1.1 200 OK\r\n\r\n", b"", b"first chunk", b"second"]
+    sock = TrickleSocket(step=4)
+    assert send(sock, buffers) == sum(map(len, buffers))
+    assert sock.data == b"".join(buffers)
+
+
+def test_buffers_are_batched_by_iov_max(monkeypatch):
+    monkeypatch.setattr(server, "IOV_MAX", 3)
+    buffers = [b"%d" % i for i in range(10)]
+    sock = TrickleSocket(step=100)
+    assert send(sock, buffers) == 10
+    assert sock.data == b"0123456789"
+    assert sock.calls == [3, 3, 3, 1]
+
+
+def test_large_coalesced_response_reaches_slow_client(serve):
+    chunks = [bytes([65 + i % 26]) * 4096 for i in range(1024)]
+
+    def app(environ, start_response):
+        size = str(sum(map(len, chunks)))
+        start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", size)])
+        return chunks
+
+    address = serve(app, write_coalesce_threshold=256 * 1024)
+    with connect(address) as sock:
+        sock.sendall(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        # Пока клиент не читает, 4 МБ ответа упираются в буферы сокетов
+        time.sleep(0.2)
+        response = read_until_closed(sock)
+    assert response.partition(b"\r\n\r\n")[2] == b"".join(chunks)
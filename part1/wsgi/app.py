@@ -3,14 +3,24 @@ import time
 
 from flask import Flask, jsonify, request
 
+from final_tcp_server.admission import AdmissionController
+from final_tcp_server.metrics import ServerMetrics
+
+from .compression import ResponseCompressor
+from .response_cache import ResponseCache
 from .server import WSGIServer
 
 app = Flask("app")
 
+# Статичные ответы можно отдавать из кэша сервера, не вызывая Flask
+CACHE_HEADERS = {"Cache-Control": "public, max-age=60"}
+# Большой ответ - для бенчмарков отдачи больших тел
+LARGE_BODY = b"x" * (1024 * 1024)
+
 
 @app.route("/ping")
 def ping():
-    return "pong"
+    return "pong", CACHE_HEADERS
 
 
 @app.route("/sleep")
@@ -26,9 +36,20 @@ def submit():
     return jsonify({"message": f"Hello, {name}!"})
 
 
+@app.route("/large")
+def large():
+    return LARGE_BODY, {"Content-Type": "application/octet-stream"}
+
+
+@app.route("/upload", methods=["POST"])
+def upload():
+    return jsonify({"received": len(request.get_data())})
+
+
 @app.route("/page")
 def page():
-    return """
+    return (
+        """
     <!DOCTYPE html>
     <html>
         <head>
@@ -39,11 +60,24 @@ def page():
             <p>This is a simple HTTP page from Flask.</p>
         </body>
     </html>
-    """
+    """,
+        CACHE_HEADERS,
+    )
 
 
 if __name__ == "__main__":
-    server = WSGIServer("0.0.0.0", 9999, app)
+    server = WSGIServer(
+        "0.0.0.0",
+        9999,
+        app,
+        concurrency="threads",
+        workers=8,
+        response_cache=ResponseCache(),
+        compression=ResponseCompressor(),
+        metrics=ServerMetrics(),
+        admission=AdmissionController(),
+        hot_restart=True,
+    )
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
     server.serve_forever()
@@ -0,0 +1,41 @@
+import threading
+from collections import OrderedDict
+
+
+class BodyCache:
+    """
+    Значения, вычисленные по телу ответа (ETag, сжатый вариант), по ключу (host, path).
+    Тело горячего статичного ответа от запроса к запросу не меняется: сравнить его
+    с запомненным (memcmp) в разы дешевле, чем вычислять значение заново.
+    Вытеснение - LRU по суммарному размеру, который задаёт put().
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # key -> (тело, значение, размер записи)
+        self.entries: OrderedDict[tuple[str, str], tuple[bytes, object, int]] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[str, str], body: bytes):
+        """Значение для key, если оно вычислено по такому же телу, иначе None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != body:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple[str, str], body: bytes, value, size: int):
+        """Запоминает value, посчитанное по body; запись больше max_size не сохраняется."""
+        if size > self.max_size:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            self.entries[key] = (body, value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, _, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
@@ -0,0 +1,134 @@
+import zlib
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor
+
+from .body_cache import BodyCache
+
+# Типы, которые хорошо сжимаются; картинки, архивы и видео уже сжаты
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/javascript",
+        "application/json",
+        "application/manifest+json",
+        "application/xml",
+        "application/xhtml+xml",
+        "image/svg+xml",
+    }
+)
+# wbits=31: формат gzip (заголовок и CRC32) поверх deflate
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Принимает ли клиент gzip: Accept-Encoding с учётом q-значений (RFC 9110, 12.5.3)."""
+    accepted = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        # Явно названный gzip важнее "*"
+        if coding != "*" or accepted is None:
+            accepted = quality > 0
+    return bool(accepted)
+
+
+def gzip_compress(body: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class GzipStream:
+    """
+    Итератор сжатых чанков поверх тела ответа приложения.
+    После каждого чанка - Z_SYNC_FLUSH: клиент может распаковать всё полученное, не дожидаясь
+    конца ответа (стриминг не задерживается), ценой чуть худшего сжатия.
+    close() закрывает и тело приложения, даже если итерация не начиналась.
+    """
+
+    def __init__(self, body_iterator: Iterable[bytes], level: int):
+        self.body_iterator = body_iterator
+        self.chunks = iter(body_iterator)
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+        self.finished = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self
+
+    def __next__(self) -> bytes:
+        if self.finished:
+            raise StopIteration
+        for chunk in self.chunks:
+            if chunk:
+                return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.finished = True
+        return self.compressor.flush()
+
+    def close(self):
+        if hasattr(self.body_iterator, "close"):
+            self.body_iterator.close()
+
+
+class ResponseCompressor:
+    """
+    Сжатие ответов gzip по Accept-Encoding.
+    Тело в памяти сжимается целиком; сжатые варианты запоминаются по URL (BodyCache),
+    и горячая страница сжимается один раз - повторное сжатие в сотни раз дороже сравнения тел.
+    Стриминговое тело сжимается по чанкам с Z_SYNC_FLUSH: каждый чанк уходит клиенту сразу.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        level: int = 6,
+        max_size: int = 16 * 1024 * 1024,
+        max_body_size: int = 4 * 1024 * 1024,
+        executor: Executor | None = None,
+        offload_size: int = 256 * 1024,
+    ):
+        # Маленькие ответы не сжимаем: выигрыш в байтах меньше заголовка gzip и затрат CPU
+        self.min_size = min_size
+        self.level = level
+        # Лимит кэша сжатых вариантов (исходные и сжатые тела вместе)
+        self.max_size = max_size
+        # Тела больше этого размера не собираются в память, а сжимаются потоком
+        self.max_body_size = max_body_size
+        # Тела от offload_size байт сжимаются в executor, а не в потоке запроса.
+        # zlib отпускает GIL, поэтому выигрыш не в параллелизме, а в ограничении числа
+        # одновременных сжатий числом воркеров executor
+        self.executor = executor
+        self.offload_size = offload_size
+        self.cache = BodyCache(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def compress(self, key: tuple[str, str], body: bytes) -> bytes:
+        """Сжатое тело ответа на URL key - из кэша, если тело не изменилось."""
+        compressed = self.cache.get(key, body)
+        if compressed is not None:
+            self.hits += 1
+            return compressed
+        self.misses += 1
+
+        if self.executor is not None and len(body) >= self.offload_size:
+            compressed = self.executor.submit(gzip_compress, body, self.level).result()
+        else:
+            compressed = gzip_compress(body, self.level)
+        self.cache.put(key, body, compressed, len(body) + len(compressed))
+        return compressed
+
+    def stream(self, body_iterator: Iterable[bytes]) -> GzipStream:
+        """Сжимает стриминговое тело по мере поступления чанков."""
+        return GzipStream(body_iterator, self.level)
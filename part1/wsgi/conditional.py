@@ -0,0 +1,58 @@
+import hashlib
+from email.utils import parsedate_to_datetime
+
+from .body_cache import BodyCache
+
+# Заголовки, которые переносятся из ответа 200 в ответ 304 (RFC 9110, 15.4.5)
+NOT_MODIFIED_HEADERS = frozenset(
+    {"cache-control", "content-location", "date", "etag", "expires", "last-modified", "vary"}
+)
+
+
+def compute_etag(body: bytes) -> str:
+    """Сильный ETag - хэш тела ответа."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Совпадает ли ETag с одним из перечисленных в If-None-Match.
+    If-None-Match сравнивается слабо (RFC 9110, 13.1.2): префикс W/ не учитывается.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(headers: dict[str, str], etag: str | None, last_modified: str | None) -> bool:
+    """
+    Можно ли ответить на GET/HEAD-запрос 304 Not Modified (RFC 9110, 13.2.2):
+    If-None-Match проверяется первым, If-Modified-Since - только без него.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # Некорректная дата - условие игнорируется
+        return False
+
+
+class ETagCache:
+    """ETag последних ответов по URL: тело, совпавшее с запомненным, заново не хэшируется."""
+
+    def __init__(self, max_size: int = 4 * 1024 * 1024):
+        self.cache = BodyCache(max_size)
+
+    def etag(self, key: tuple[str, str], body: bytes) -> str:
+        etag = self.cache.get(key, body)
+        if etag is None:
+            etag = compute_etag(body)
+            self.cache.put(key, body, etag, len(body))
+        return etag
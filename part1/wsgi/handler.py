@@ -1,162 +1,946 @@
-import io
+import cProfile
 import sys
-from collections.abc import Iterator
+import tempfile
+import time
+from collections.abc import Generator, Iterator
 from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import unquote_to_bytes, urlsplit
 
+from final_tcp_server.file_wrapper import FileWrapper
 from final_tcp_server.interface import TCPHandlerI
+from final_tcp_server.metrics import ServerMetrics, format_metric
 from final_tcp_server.socket_io import SocketIO
 
+from .compression import ResponseCompressor, accepts_gzip, is_compressible
+from .conditional import NOT_MODIFIED_HEADERS, ETagCache, not_modified
+from .http_parser import HEAD_END, HTTPLimits, read_request_head
+from .http_response import (
+    CHUNKED_HEADER,
+    CONNECTION_CLOSE_HEADER,
+    CONNECTION_KEEP_ALIVE_HEADER,
+    SERVER_HEADER,
+    STATUS_LINES,
+    date_header,
+    status_line,
+)
+from .request_body import BodyReader, RequestBodyError, RequestBodyTooLargeError, read_chunked_body
+from .response_cache import CachedResponse, ResponseCache
+from .tracing import RequestTrace, RequestTracer
+
+# Завершающий чанк нулевой длины (без trailer-заголовков)
+LAST_CHUNK = b"0\r\n\r\n"
+
+# Заголовки, которые PEP 3333 передаёт в environ без префикса HTTP_.
+# CONTENT_LENGTH берётся из фактической длины тела (у chunked-запроса заголовка нет)
+SPECIAL_ENVIRON_KEYS = {"content-type": "CONTENT_TYPE", "content-length": None}
+
 
 @dataclass
 class HTTPRequest:
     method: str
     path: str
     protocol: str
+    # Имена заголовков в нижнем регистре
     headers: dict[str, str]
-    body: io.BytesIO
+    body: BodyReader | tempfile.SpooledTemporaryFile
+    content_length: int
 
 
 class WSGIHandler(TCPHandlerI):
-    def __init__(self, app, host: str, port: int):
+    def __init__(
+        self,
+        app,
+        host: str,
+        port: int,
+        write_coalesce_threshold: int = 64 * 1024,
+        max_body_size: int | None = 16 * 1024 * 1024,
+        body_spool_threshold: int = 1024 * 1024,
+        limits: HTTPLimits | None = None,
+        pipeline_depth: int = 16,
+        max_requests_per_connection: int | None = 1000,
+        response_cache: ResponseCache | None = None,
+        etag_max_size: int = 0,
+        compression: ResponseCompressor | None = None,
+        metrics: ServerMetrics | None = None,
+        metrics_path: str = "/metrics",
+        tracer: RequestTracer | None = None,
+    ):
         self.app = app
         self.port = port
         self.host = host
+        # Сколько байт заголовков и тела можно собрать в один sendmsg(); 0 - без склейки
+        self.write_coalesce_threshold = write_coalesce_threshold
+        # Ограничение размера тела запроса (None - без ограничения), больше - 413
+        self.max_body_size = max_body_size
+        # chunked-тело больше этого размера буферизуется во временном файле, а не в памяти
+        self.body_spool_threshold = body_spool_threshold
+        # Ограничения на строку запроса и заголовки (431/414/400 при превышении)
+        self.limits = limits or HTTPLimits()
+        # Сколько ответов на pipelined-запросы можно придержать, чтобы отправить их одной пачкой
+        self.pipeline_depth = pipeline_depth
+        # После стольких запросов соединение закрывается (None - без ограничения):
+        # клиенты переподключаются, и нагрузка перераспределяется между воркерами
+        self.max_requests_per_connection = max_requests_per_connection
+        # Кэш ответов на GET-запросы (None - приложение вызывается на каждый запрос)
+        self.response_cache = response_cache
+        # Ответам до стольких байт без своего ETag сервер вычисляет его сам (0 - не вычислять)
+        self.etag_max_size = etag_max_size
+        self.etag_cache = ETagCache() if etag_max_size else None
+        # gzip-сжатие ответов по Accept-Encoding (None - ответы не сжимаются)
+        self.compression = compression
+        # Ответы по кодам и длительности фаз запроса (None - метрики не собираются).
+        # На metrics_path метрики отдаются в формате Prometheus, приложение не вызывается
+        self.metrics = metrics
+        self.metrics_path = metrics_path if metrics is not None else None
+        # Трассировка фаз и профилирование медленных запросов (None - выключена)
+        self.tracer = tracer
+        # Неизменная часть environ собирается один раз, на запрос - только копия шаблона.
+        # wsgi.multithread и wsgi.multiprocess выставляются сервером в зависимости
+        # от модели обработки соединений (свойства multithread и multiprocess)
+        self.base_environ = {
+            "SCRIPT_NAME": "",
+            "CONTENT_TYPE": "",
+            "CONTENT_LENGTH": "",
+            "SERVER_NAME": host,
+            "SERVER_PORT": str(port),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            # Конец wsgi.input - конец тела, его можно читать без оглядки на CONTENT_LENGTH
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": False,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "wsgi.file_wrapper": FileWrapper,
+        }
 
-    def handle(self, data: SocketIO) -> Iterator[bytes]:
+    def handle(self, data: SocketIO) -> Iterator[bytes | list[bytes] | FileWrapper]:
+        # Ответы на pipelined-запросы, ещё не отправленные клиенту
+        pending: list[bytes] = []
+        pipelined = 0
+        requests_served = 0
+        metrics = self.metrics
+        tracer = self.tracer
+        # Отметки времени фаз нужны и метрикам, и трассировке
+        timed = metrics is not None or tracer is not None
+        if tracer is not None:
+            data.trace_waits = True
 
         while True:
             try:
                 http_request = self._parse_http_request(data)
             except ConnectionError:
                 break
-            except Exception:
-                status, headers_list = (
-                    "400 Bad Request",
-                    [("Content-Type", "text/plain")],
-                )
-                body_iterator = [b"400 Bad Request"]
+            except Exception as exc:
+                if isinstance(exc, TimeoutError) and data.at_boundary and not data.buffered:
+                    # Клиент так и не начал следующий запрос - просто закрываем соединение
+                    break
+                # 408 - клиент не дослал запрос, 413 - слишком большое тело, 431/414 - заголовки,
+                # 400 - остальные ошибки разбора
+                if isinstance(exc, TimeoutError):
+                    status = "408 Request Timeout"
+                else:
+                    status = getattr(exc, "status", "400 Bad Request")
+                headers_list = [("Content-Type", "text/plain")]
+                body_iterator = [status.encode("ascii")]
                 response = self._generate_http_response(
                     status,
                     headers_list,
                     body_iterator,
                     connection_close=True,
+                    pending=pending,
                 )
+                if metrics is not None:
+                    metrics.shard().count_request(status)
                 yield from response
                 break
 
-            environ = self._generate_environ(http_request)
-            response_headers = []
+            if timed:
+                parsed_at = time.perf_counter()
+            requests_served += 1
+            keep_alive = self._keep_alive(http_request, requests_served, data)
 
-            def start_response(status, headers_list):
-                response_headers.extend([status, headers_list])
+            cached = None
+            profiler = None
+            if http_request.path == self.metrics_path:
+                status, headers_list, body_iterator = self._metrics_response(http_request)
+            else:
+                if self.response_cache is not None:
+                    cached = self.response_cache.lookup(
+                        http_request.method, http_request.path, http_request.headers
+                    )
+                if cached is None:
+                    if tracer is not None:
+                        profiler = tracer.start_profile()
+                    try:
+                        status, headers_list, body_iterator = self._call_app(http_request)
+                    finally:
+                        if profiler is not None:
+                            tracer.stop_profile(profiler)
+                elif not_modified(http_request.headers, cached.etag, cached.last_modified):
+                    status = "304 Not Modified"
+                else:
+                    status = cached.status
+            if timed:
+                app_done_at = time.perf_counter()
 
-            # Вызываем WSGI-приложение
-            try:
-                body_iterator = self.app(environ, start_response)
-                status, headers_list = response_headers
-            except Exception:
-                status, headers_list = (
-                    "500 Internal Server Error",
-                    [("Content-Type", "text/plain")],
+            # Pipelining: если следующий запрос уже целиком в буфере, ответ не отправляем сразу,
+            # а копим - ответы на несколько запросов уйдут одной пачкой. Тело текущего запроса
+            # должно быть дочитано, иначе HEAD_END может найтись в нём, а не в следующем запросе.
+            # pipeline_depth ограничивает число придержанных ответов
+            hold = (
+                pipelined < self.pipeline_depth
+                and self._body_consumed(http_request.body)
+                and data.find(HEAD_END) != -1
+            )
+            pipelined = pipelined + 1 if hold else 0
+
+            if cached is not None:
+                response = self._cached_response(
+                    cached,
+                    status,
+                    http_request,
+                    connection_close=not keep_alive,
+                    pending=pending,
+                    hold=hold,
+                )
+            else:
+                response = self._generate_http_response(
+                    status,
+                    headers_list,
+                    body_iterator,
+                    connection_close=not keep_alive,
+                    protocol=http_request.protocol,
+                    pending=pending,
+                    hold=hold,
+                    method=http_request.method,
                 )
-                body_iterator = [b"Internal Server Error"]
+            connection_close = yield from response
+            if timed:
+                # Придержанный pipelined-ответ уходит позже, вместе со следующим:
+                # его фаза write - только формирование
+                written_at = time.perf_counter()
+                if metrics is not None:
+                    metrics.shard().record_request(
+                        status,
+                        parsed_at - data.message_started,
+                        app_done_at - parsed_at,
+                        written_at - app_done_at,
+                    )
+                if tracer is not None and written_at - data.message_started >= tracer.threshold:
+                    self._trace_slow_request(
+                        tracer,
+                        data,
+                        http_request,
+                        status,
+                        cached is not None,
+                        parsed_at,
+                        app_done_at,
+                        written_at,
+                        profiler,
+                    )
+            if not self._finish_body(http_request.body) or connection_close:
+                break
+            data.expect_message()
 
-            response = self._generate_http_response(
-                status,
-                headers_list,
-                body_iterator,
-            )
-            yield from response
+        if pending:
+            yield pending
 
-    def _parse_http_request(self, request: SocketIO) -> HTTPRequest:
-        """Упрощенный парсинг http-запроса."""
-        # Парсим request line
-        request_line = request.readline()
-        if not request_line:
-            raise ConnectionError("Клиент закрыл соединение")
+    def overload_response(self, retry_after: int) -> bytes:
+        """503 для соединения, которому сервер отказал: клиент повторит запрос через retry_after."""
+        body = [b"Service Unavailable"]
+        head, _, _ = self._response_head(
+            "503 Service Unavailable",
+            [("Content-Type", "text/plain"), ("Retry-After", str(retry_after))],
+            body,
+            connection_close=True,
+            protocol="HTTP/1.1",
+        )
+        return head + body[0]
 
+    def _trace_slow_request(
+        self,
+        tracer: RequestTracer,
+        data: SocketIO,
+        http_request: HTTPRequest,
+        status: str,
+        cached: bool,
+        parsed_at: float,
+        app_done_at: float,
+        written_at: float,
+        profiler: cProfile.Profile | None,
+    ):
+        """Передаёт фазы медленного запроса (и профиль приложения, если он снимался) в tracer."""
         try:
-            method, path, protocol = request_line.decode("ascii").strip().split()
-        except ValueError:
-            raise ValueError("Invalid request line")
+            host, port = data.socket.getpeername()[:2]
+            peer = f"{host}:{port}"
+        except (OSError, ValueError):
+            peer = "-"
+        trace = RequestTrace(
+            request_line=f"{http_request.method} {http_request.path} {http_request.protocol}",
+            status=status,
+            peer=peer,
+            started=data.message_started,
+            parsed=parsed_at,
+            app_done=app_done_at,
+            written=written_at,
+            recv_wait=data.recv_wait,
+            cached=cached,
+        )
+        tracer.dump(trace, profiler)
 
-        # Парсим headers
-        headers: dict[str, str] = {}
-        while True:
-            line = request.readline()
-            if not line or line in (b"\r\n", b"\n"):
-                break
+    def _call_app(self, http_request: HTTPRequest) -> tuple[str, list[tuple[str, str]], Iterator]:
+        """Вызывает WSGI-приложение: статус, заголовки и тело ответа."""
+        environ = self._generate_environ(http_request)
+        response_headers = []
 
-            try:
-                name, value = line.decode("ascii").split(":", 1)
-            except ValueError:
-                raise ValueError(f"Invalid header line: {line!r}")
+        def start_response(status, headers_list):
+            response_headers.extend([status, headers_list])
+
+        try:
+            body_iterator = self.app(environ, start_response)
+            status, headers_list = response_headers
+            body_iterator = self._unwrap_file_wrapper(body_iterator)
+            if isinstance(body_iterator, FileWrapper):
+                status, headers_list = self._apply_range(
+                    http_request, status, headers_list, body_iterator
+                )
+            else:
+                if self.etag_cache is not None:
+                    headers_list, body_iterator = self._add_etag(
+                        http_request, status, headers_list, body_iterator
+                    )
+                if self.compression is not None:
+                    headers_list, body_iterator = self._compress(
+                        http_request, status, headers_list, body_iterator
+                    )
+                if self.response_cache is not None:
+                    body_iterator = self._store_in_cache(
+                        http_request, status, headers_list, body_iterator
+                    )
+                status, headers_list, body_iterator = self._check_preconditions(
+                    http_request, status, headers_list, body_iterator
+                )
+        except Exception:
+            status, headers_list = (
+                "500 Internal Server Error",
+                [("Content-Type", "text/plain")],
+            )
+            body_iterator = [b"Internal Server Error"]
+        return status, headers_list, body_iterator
+
+    def _metrics_response(
+        self, http_request: HTTPRequest
+    ) -> tuple[str, list[tuple[str, str]], list[bytes]]:
+        """Метрики сервера, кэша ответов и сжатия в текстовом формате Prometheus."""
+        if http_request.method not in ("GET", "HEAD"):
+            return (
+                "405 Method Not Allowed",
+                [("Allow", "GET, HEAD"), ("Content-Type", "text/plain")],
+                [b"Method Not Allowed"],
+            )
+        lines = self.metrics.render()
+        if self.response_cache is not None:
+            stats = self.response_cache.stats()
+            for name, key, kind, help_text in (
+                ("http_response_cache_hits_total", "hits", "counter", "Ответы из кэша"),
+                ("http_response_cache_misses_total", "misses", "counter", "Промахи кэша"),
+                ("http_response_cache_evictions_total", "evictions", "counter", "Вытеснения"),
+                ("http_response_cache_entries", "entries", "gauge", "URL в кэше"),
+                ("http_response_cache_size_bytes", "size", "gauge", "Байт в кэше"),
+            ):
+                lines += format_metric(name, kind, help_text, [("", stats[key])])
+        if self.compression is not None:
+            compression = self.compression
+            lines += format_metric(
+                "http_compression_cache_hits_total",
+                "counter",
+                "Сжатые ответы из кэша сжатых вариантов",
+                [("", compression.hits)],
+            )
+            lines += format_metric(
+                "http_compression_cache_misses_total",
+                "counter",
+                "Ответы, сжатые заново",
+                [("", compression.misses)],
+            )
+            lines += format_metric(
+                "http_compression_cache_size_bytes",
+                "gauge",
+                "Байт в кэше сжатых вариантов",
+                [("", compression.cache.size)],
+            )
+        lines.append("")
+        headers_list = [
+            ("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+            ("Cache-Control", "no-store"),
+        ]
+        return "200 OK", headers_list, ["\n".join(lines).encode()]
+
+    def _store_in_cache(
+        self,
+        http_request: HTTPRequest,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body_iterator: Iterator[bytes],
+    ) -> Iterator[bytes]:
+        """
+        Сохраняет кэшируемый ответ в response_cache. Тело приходится собрать целиком,
+        поэтому кэшируются только ответы с известной длиной не больше max_entry_size:
+        стриминговые ответы отдаются как обычно.
+        """
+        cache = self.response_cache
+        ttl = cache.freshness(http_request.method, http_request.headers, status, headers_list)
+        if ttl is None:
+            return body_iterator
+        body = self._materialize(headers_list, body_iterator, cache.max_entry_size)
+        if body is None:
+            return body_iterator
+        cache.store(http_request.path, http_request.headers, status, headers_list, body, ttl)
+        return [body]
+
+    def _add_etag(
+        self,
+        http_request: HTTPRequest,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body_iterator: Iterator[bytes],
+    ) -> tuple[list[tuple[str, str]], Iterator[bytes]]:
+        """
+        Добавляет сильный ETag к успешному ответу на GET/HEAD, если приложение его не выставило
+        и тело не больше etag_max_size: на повторный запрос с If-None-Match придёт 304 без тела.
+        """
+        if http_request.method not in ("GET", "HEAD") or not status.startswith("200"):
+            return headers_list, body_iterator
+        if any(name.lower() == "etag" for name, _ in headers_list):
+            return headers_list, body_iterator
+        body = self._materialize(headers_list, body_iterator, self.etag_max_size)
+        if body is None:
+            return headers_list, body_iterator
+        # Приложение могло не отдать тело на HEAD - хэш пустого тела был бы неверным ETag
+        if body or http_request.method == "GET":
+            key = (http_request.headers.get("host", ""), http_request.path)
+            headers_list = [*headers_list, ("ETag", self.etag_cache.etag(key, body))]
+        return headers_list, [body]
+
+    def _compress(
+        self,
+        http_request: HTTPRequest,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body_iterator: Iterator[bytes],
+    ) -> tuple[list[tuple[str, str]], Iterator[bytes]]:
+        """
+        Сжимает gzip успешный ответ на GET с текстовым Content-Type, если клиент принимает gzip.
+        Тело известной длины сжимается целиком (с кэшем сжатых вариантов), остальное - потоком.
+        У сжатого варианта свой ETag (суффикс -gzip): сильный ETag у разных представлений
+        не может совпадать.
+        """
+        if http_request.method not in ("GET", "HEAD") or not status.startswith("200"):
+            return headers_list, body_iterator
+        content_type = None
+        for name, value in headers_list:
+            name = name.lower()
+            if name == "content-type":
+                content_type = value
+            elif name == "content-encoding":
+                return headers_list, body_iterator
+        if content_type is None or not is_compressible(content_type):
+            return headers_list, body_iterator
+
+        # Ответ зависит от Accept-Encoding - кэши должны различать и несжатый вариант
+        headers_list = _add_vary(headers_list, "Accept-Encoding")
+        if http_request.method == "HEAD":
+            return headers_list, body_iterator
+        if not accepts_gzip(http_request.headers.get("accept-encoding", "")):
+            return headers_list, body_iterator
+
+        compression = self.compression
+        body = self._materialize(headers_list, body_iterator, compression.max_body_size)
+        if body is None:
+            body_iterator = compression.stream(body_iterator)
+        elif len(body) < compression.min_size:
+            return headers_list, [body]
+        else:
+            key = (http_request.headers.get("host", ""), http_request.path)
+            body_iterator = [compression.compress(key, body)]
 
-            headers[name.strip()] = value.strip()
+        compressed_headers = [("Content-Encoding", "gzip")]
+        for name, value in headers_list:
+            name_lower = name.lower()
+            if name_lower == "content-length":
+                # Длину сжатого тела посчитает _response_head, у потока её нет
+                continue
+            if name_lower == "etag" and value.endswith('"'):
+                value = f'{value[:-1]}-gzip"'
+            compressed_headers.append((name, value))
+        return compressed_headers, body_iterator
 
+    def _check_preconditions(
+        self,
+        http_request: HTTPRequest,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body_iterator: Iterator[bytes],
+    ) -> tuple[str, list[tuple[str, str]], Iterator[bytes]]:
+        """
+        If-None-Match/If-Modified-Since: если у клиента актуальная версия, вместо ответа
+        приложения отдаём 304 Not Modified без тела.
+        """
+        headers = http_request.headers
+        if "if-none-match" not in headers and "if-modified-since" not in headers:
+            return status, headers_list, body_iterator
+        if http_request.method not in ("GET", "HEAD") or not status.startswith("200"):
+            return status, headers_list, body_iterator
+
+        etag = last_modified = None
+        for name, value in headers_list:
+            name = name.lower()
+            if name == "etag":
+                etag = value
+            elif name == "last-modified":
+                last_modified = value
+        if not not_modified(headers, etag, last_modified):
+            return status, headers_list, body_iterator
+
+        if hasattr(body_iterator, "close"):
+            body_iterator.close()
+        headers_list = [
+            (name, value) for name, value in headers_list if name.lower() in NOT_MODIFIED_HEADERS
+        ]
+        return "304 Not Modified", headers_list, []
+
+    def _materialize(
+        self, headers_list: list[tuple[str, str]], body_iterator: Iterator[bytes], limit: int
+    ) -> bytes | None:
+        """
+        Собирает тело ответа в bytes, если его длина известна и не больше limit.
+        None - тело стриминговое или слишком большое, его нужно отдавать как есть.
+        """
+        if isinstance(body_iterator, (list, tuple)):
+            if sum(map(len, body_iterator)) > limit:
+                return None
+        else:
+            content_length = next(
+                (value for name, value in headers_list if name.lower() == "content-length"), None
+            )
+            if content_length is None or not content_length.isdigit():
+                return None
+            if int(content_length) > limit:
+                return None
+        try:
+            body = b"".join(body_iterator)
+        finally:
+            if hasattr(body_iterator, "close"):
+                body_iterator.close()
+        return body
+
+    def _cached_response(
+        self,
+        cached: CachedResponse,
+        status: str,
+        http_request: HTTPRequest,
+        connection_close: bool,
+        pending: list[bytes],
+        hold: bool,
+    ) -> Generator[list[bytes], None, bool]:
+        """
+        Ответ из кэша: сериализованные заголовки и тело уходят одной пачкой,
+        дописываются только Date, Age и Connection.
+        status "304 Not Modified" (условный запрос с актуальным ETag/датой) - готовый 304,
+        HEAD - только заголовки.
+        """
+        lines = [date_header(), f"Age: {int(time.time() - cached.stored)}\r\n"]
+        if connection_close:
+            lines.append(CONNECTION_CLOSE_HEADER)
+        elif http_request.protocol == "HTTP/1.0":
+            lines.append(CONNECTION_KEEP_ALIVE_HEADER)
+        lines.append("\r\n")
+        tail = "".join(lines).encode("latin-1")
+        if status.startswith("304"):
+            buffers = [cached.not_modified_head, tail]
+        elif http_request.method == "HEAD":
+            buffers = [cached.head, tail]
+        else:
+            buffers = [cached.head, tail, cached.body]
+        if hold and not connection_close:
+            pending.extend(buffers)
+        else:
+            yield [*pending, *buffers]
+            pending.clear()
+        return connection_close
+
+    def _keep_alive(self, http_request: HTTPRequest, requests_served: int, data: SocketIO) -> bool:
+        """
+        Можно ли оставить соединение открытым после ответа на этот запрос.
+        HTTP/1.1 - persistent по умолчанию, пока клиент не прислал Connection: close,
+        HTTP/1.0 - только с Connection: keep-alive.
+        """
+        tokens = {
+            token.strip().lower() for token in http_request.headers.get("connection", "").split(",")
+        }
+        if http_request.protocol == "HTTP/1.1":
+            keep_alive = "close" not in tokens
+        else:
+            keep_alive = "keep-alive" in tokens
+        if (
+            self.max_requests_per_connection is not None
+            and requests_served >= self.max_requests_per_connection
+        ):
+            keep_alive = False
+        # При завершении сервера новые запросы на соединении не принимаем
+        return keep_alive and not data.shutdown_event.is_set()
+
+    def _parse_http_request(self, request: SocketIO) -> HTTPRequest:
+        """Парсинг http-запроса: блок заголовков и тело."""
+        head = read_request_head(request, self.limits)
+        body, content_length = self._create_body(request, head.headers)
         return HTTPRequest(
-            method=method,
-            path=path,
-            protocol=protocol,
-            headers=headers,
-            # Оставшуюся часть запроса передаем как body
-            body=request,
+            method=head.method,
+            path=head.target,
+            protocol=head.protocol,
+            headers=head.headers,
+            body=body,
+            content_length=content_length,
         )
 
+    def _create_body(
+        self, request: SocketIO, headers: dict[str, str]
+    ) -> tuple[BodyReader | tempfile.SpooledTemporaryFile, int]:
+        """Тело запроса для wsgi.input: ограничено Content-Length или декодировано из chunked."""
+        transfer_encoding = headers.get("transfer-encoding")
+        content_length = headers.get("content-length")
+
+        if transfer_encoding is not None:
+            # Оба заголовка сразу - классический вектор request smuggling
+            if content_length is not None:
+                raise RequestBodyError("Transfer-Encoding вместе с Content-Length")
+            if transfer_encoding.lower() != "chunked":
+                raise RequestBodyError(f"Неподдерживаемый Transfer-Encoding: {transfer_encoding}")
+            return read_chunked_body(request, self.max_body_size, self.body_spool_threshold)
+
+        if content_length is None:
+            return BodyReader(request, 0), 0
+        if not content_length.isdigit():
+            raise RequestBodyError(f"Некорректный Content-Length: {content_length!r}")
+        length = int(content_length)
+        if self.max_body_size is not None and length > self.max_body_size:
+            raise RequestBodyTooLargeError(f"Тело запроса больше {self.max_body_size} байт")
+        return BodyReader(request, length), length
+
+    def _body_consumed(self, body: BodyReader | tempfile.SpooledTemporaryFile) -> bool:
+        """Тело запроса прочитано из сокета целиком (chunked-тело читается до вызова приложения)."""
+        return not isinstance(body, BodyReader) or body.remaining == 0
+
+    def _finish_body(self, body: BodyReader | tempfile.SpooledTemporaryFile) -> bool:
+        """
+        Дочитывает то, что приложение оставило от тела, чтобы следующий keep-alive запрос
+        читался с начала. False - соединение нужно закрыть.
+        """
+        if isinstance(body, BodyReader):
+            return body.discard()
+        body.close()
+        return True
+
+    @property
+    def multithread(self) -> bool:
+        return self.base_environ["wsgi.multithread"]
+
+    @multithread.setter
+    def multithread(self, value: bool):
+        self.base_environ["wsgi.multithread"] = value
+
+    @property
+    def multiprocess(self) -> bool:
+        return self.base_environ["wsgi.multiprocess"]
+
+    @multiprocess.setter
+    def multiprocess(self, value: bool):
+        self.base_environ["wsgi.multiprocess"] = value
+
     def _generate_environ(self, http_request: HTTPRequest) -> dict:
-        """Формируем environ для wsgi-приложения."""
+        """Формируем environ для wsgi-приложения: копия шаблона плюс данные запроса."""
+        environ = self.base_environ.copy()
         path, _, query_string = http_request.path.partition("?")
-        environ = {
-            "REQUEST_METHOD": http_request.method,
-            "SCRIPT_NAME": "",
-            "PATH_INFO": path,
-            "QUERY_STRING": query_string,
-            "CONTENT_TYPE": http_request.headers.get("Content-Type", ""),
-            "CONTENT_LENGTH": http_request.headers.get("Content-Length", ""),
-            "SERVER_NAME": self.host,
-            "SERVER_PORT": str(self.port),
-            "SERVER_PROTOCOL": http_request.protocol,
-            "wsgi.version": (1, 0),
-            "wsgi.url_scheme": "http",
-            "wsgi.input": http_request.body,
-            "wsgi.errors": sys.stderr,
-            "wsgi.multithread": False,
-            "wsgi.multiprocess": False,
-            "wsgi.run_once": False,
-        }
+        if not path.startswith("/"):
+            # absolute-form (RFC 9112, 3.2.2): "http://host/path" - приложению нужен только путь
+            path = urlsplit(path).path or "/"
+        # PEP 3333: PATH_INFO - декодированный путь, байты которого представлены строкой latin-1
+        if "%" in path:
+            path = unquote_to_bytes(path).decode("latin-1")
+        environ["REQUEST_METHOD"] = http_request.method
+        environ["PATH_INFO"] = path
+        environ["QUERY_STRING"] = query_string
+        environ["SERVER_PROTOCOL"] = http_request.protocol
+        environ["wsgi.input"] = http_request.body
+        if http_request.content_length:
+            environ["CONTENT_LENGTH"] = str(http_request.content_length)
         # Добавляем http-заголовки
-        for key, value in http_request.headers.items():
-            environ[f"HTTP_{key.upper().replace('-', '_')}"] = value
+        for name, value in http_request.headers.items():
+            key = _environ_key(name)
+            if key is not None:
+                environ[key] = value
         return environ
 
+    def _unwrap_file_wrapper(self, body_iterator):
+        """
+        При Range-запросе werkzeug сам вырезает диапазон, оборачивая wsgi.file_wrapper
+        в _RangeWrapper. Разворачиваем его обратно в FileWrapper с нужным диапазоном,
+        чтобы файл всё равно ушёл через sendfile().
+        """
+        inner = getattr(body_iterator, "iterable", None)
+        if isinstance(inner, FileWrapper) and hasattr(body_iterator, "start_byte"):
+            inner.set_range(body_iterator.start_byte, body_iterator.byte_range)
+            return inner
+        return body_iterator
+
+    def _apply_range(
+        self,
+        http_request: HTTPRequest,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        file_wrapper: FileWrapper,
+    ) -> tuple[str, list[tuple[str, str]]]:
+        """
+        Серверная поддержка Range для файловых ответов, если приложение само её не сделало:
+        200 + "Range: bytes=..." -> 206 Partial Content (или 416, если диапазон вне файла).
+        Поддерживается один диапазон; мультидиапазоны отдаются целым файлом.
+        """
+        headers = http_request.headers
+        response_headers = {k.lower(): v for k, v in headers_list}
+        size = file_wrapper.size()
+        if (
+            not status.startswith("200")
+            or size is None
+            or "content-encoding" in response_headers
+            or file_wrapper.offset
+            or file_wrapper.count is not None
+        ):
+            return status, headers_list
+        if "accept-ranges" not in response_headers:
+            headers_list = [*headers_list, ("Accept-Ranges", "bytes")]
+
+        range_header = headers.get("range", "")
+        if_range = headers.get("if-range")
+        validators = (response_headers.get("etag"), response_headers.get("last-modified"))
+        if not range_header.startswith("bytes=") or "," in range_header:
+            return status, headers_list
+        if if_range is not None and if_range not in validators:
+            return status, headers_list
+
+        first, _, last = range_header[len("bytes=") :].strip().partition("-")
+        try:
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                # bytes=-N - последние N байт
+                start = max(0, size - int(last))
+                end = size - 1
+        except ValueError:
+            return status, headers_list
+
+        headers_list = [(k, v) for k, v in headers_list if k.lower() != "content-length"]
+        if start > end or start >= size:
+            file_wrapper.set_range(0, 0)
+            return "416 Range Not Satisfiable", [
+                *headers_list,
+                ("Content-Range", f"bytes */{size}"),
+                ("Content-Length", "0"),
+            ]
+
+        file_wrapper.set_range(start, end - start + 1)
+        return "206 Partial Content", [
+            *headers_list,
+            ("Content-Range", f"bytes {start}-{end}/{size}"),
+            ("Content-Length", str(end - start + 1)),
+        ]
+
     def _generate_http_response(
         self,
         status: str,
         headers_list: list[tuple[str, str]],
-        body_iterator: Iterator[bytes],
+        body_iterator: Iterator[bytes] | FileWrapper,
         connection_close: bool = False,
-    ) -> Iterator[bytes]:
-        """Формируем HTTP-ответ."""
-        # Формируем заголовки
+        protocol: str = "HTTP/1.1",
+        pending: list[bytes] | None = None,
+        hold: bool = False,
+        method: str = "GET",
+    ) -> Generator[bytes | list[bytes] | FileWrapper, None, bool]:
+        """
+        Формируем HTTP-ответ.
+        pending - придержанные ответы на предыдущие pipelined-запросы: они уходят вместе с этим.
+        hold=True - этот ответ тоже придержать в pending, если он не стримится.
+        Возвращает True, если после ответа соединение нужно закрыть.
+        """
+        if pending is None:
+            pending = []
+        app_iterator = body_iterator
+        head, chunked, connection_close = self._response_head(
+            status, headers_list, body_iterator, connection_close, protocol, method
+        )
+        if method == "HEAD" or _bodyless_status(status):
+            # Заголовки - как у полного ответа, но тело не отправляется (RFC 9110, 9.3.2)
+            body_iterator = ()
+        # Стриминговый ответ и ответ перед закрытием соединения не придерживаем
+        hold = hold and not chunked and not connection_close
+        try:
+            if isinstance(body_iterator, FileWrapper):
+                # Файл отдаём целиком одним элементом - сервер отправит его через sendfile()
+                yield [*pending, head]
+                pending.clear()
+                yield body_iterator
+            elif self.write_coalesce_threshold:
+                yield from self._coalesce(head, body_iterator, chunked, pending, hold)
+            else:
+                yield head
+                for chunk in body_iterator:
+                    if not chunked:
+                        yield chunk
+                    elif chunk:
+                        yield b"%x\r\n%b\r\n" % (len(chunk), chunk)
+                if chunked:
+                    yield LAST_CHUNK
+        finally:
+            # PEP 3333: сервер обязан вызвать close() у результата приложения
+            if hasattr(app_iterator, "close"):
+                app_iterator.close()
+        return connection_close
+
+    def _response_head(
+        self,
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body_iterator: Iterator[bytes] | FileWrapper,
+        connection_close: bool,
+        protocol: str,
+        method: str = "GET",
+    ) -> tuple[bytes, bool, bool]:
+        """
+        Заголовок ответа: строка статуса, заголовки приложения, Date, Server и framing тела,
+        закодированные одним вызовом. Возвращает (заголовок, chunked, нужно ли закрыть соединение).
+        """
         content_length_is_set = False
-        response_lines = [f"HTTP/1.1 {status}"]
-        for k, v in headers_list:
-            response_lines.append(f"{k}: {v}")
-            if k.lower() == "content-length":
+        date_is_set = False
+        server_is_set = False
+        chunked = False
+        lines = [STATUS_LINES.get(status) or status_line(status)]
+        for name, value in headers_list:
+            lines.append(f"{name}: {value}\r\n")
+            # Длину имени сравниваем до lower() - на большинстве заголовков lower() не вызывается
+            name_length = len(name)
+            if name_length == 14 and name.lower() == "content-length":
                 content_length_is_set = True
-        if not content_length_is_set:
-            body_iterator = list(body_iterator)
-            content_length = sum(len(chunk) for chunk in body_iterator)
-            response_lines.append(f"Content-Length: {content_length}")
+            elif name_length == 4 and name.lower() == "date":
+                date_is_set = True
+            elif name_length == 6 and name.lower() == "server":
+                server_is_set = True
+        if not date_is_set:
+            lines.append(date_header())
+        if not server_is_set:
+            lines.append(SERVER_HEADER)
+
+        if not content_length_is_set and not _bodyless_status(status):
+            # Длину считаем, только если тело уже в памяти: буферизовать генератор ради
+            # Content-Length нельзя - это съедает память и задерживает первый байт ответа.
+            # На HEAD приложение может не отдать тело - тогда длина неизвестна, но и framing
+            # не нужен: тела за заголовками не будет
+            size = body_iterator.size() if isinstance(body_iterator, FileWrapper) else None
+            if size is not None:
+                lines.append(f"Content-Length: {size}\r\n")
+            elif isinstance(body_iterator, (list, tuple)) and (body_iterator or method != "HEAD"):
+                lines.append(f"Content-Length: {sum(map(len, body_iterator))}\r\n")
+            elif method == "HEAD":
+                pass
+            elif protocol == "HTTP/1.1":
+                chunked = True
+                lines.append(CHUNKED_HEADER)
+            else:
+                # HTTP/1.0 не знает chunked: конец тела обозначаем закрытием соединения
+                connection_close = True
 
         if connection_close:
-            response_lines.append("Connection: close")
+            lines.append(CONNECTION_CLOSE_HEADER)
+        elif protocol == "HTTP/1.0":
+            # Для HTTP/1.0 keep-alive нужно подтвердить явно
+            lines.append(CONNECTION_KEEP_ALIVE_HEADER)
+
+        # Пустая строка перед телом
+        lines.append("\r\n")
+        head = "".join(lines).encode("latin-1")
+        return head, chunked, connection_close
+
+    def _coalesce(
+        self, head: bytes, body_iterator, chunked: bool, pending: list[bytes], hold: bool
+    ) -> Iterator[list[bytes]]:
+        """
+        Группирует заголовки и чанки тела в пачки до write_coalesce_threshold байт:
+        каждая пачка уходит клиенту одним sendmsg(), маленький ответ - одним системным вызовом.
+        Заголовки отправляются вместе с первым непустым чанком (PEP 3333 это допускает).
+        Копить несколько чанков можно только у готового тела (list/tuple): следующий чанк
+        генератора может появиться нескоро, и ждать его - значит задерживать стриминг.
+        При chunked-кодировании размер и CRLF чанка идут отдельными буферами - тело не копируется.
+        Пачка начинается с придержанных pending-ответов; при hold неотправленный остаток
+        возвращается в pending.
+        """
+        threshold = self.write_coalesce_threshold
+        materialized = hold or isinstance(body_iterator, (list, tuple))
+        batch = [*pending, head]
+        batch_size = sum(map(len, batch))
+        pending.clear()
+        for chunk in body_iterator:
+            if not chunk:
+                continue
+            size = len(chunk)
+            if chunked:
+                chunk_size_line = b"%x\r\n" % size
+                size += len(chunk_size_line) + 2
+            if batch and batch_size + size > threshold:
+                yield batch
+                batch, batch_size = [], 0
+            if chunked:
+                batch += (chunk_size_line, chunk, b"\r\n")
+            else:
+                batch.append(chunk)
+            batch_size += size
+            if not materialized:
+                yield batch
+                batch, batch_size = [], 0
+        if chunked:
+            batch.append(LAST_CHUNK)
+        if hold:
+            pending.extend(batch)
+        elif batch:
+            yield batch
+
+
+@lru_cache(maxsize=512)
+def _environ_key(name: str) -> str | None:
+    """
+    Ключ environ для заголовка (имя в нижнем регистре): "accept-encoding" -> "HTTP_ACCEPT_ENCODING",
+    None - заголовок в environ не передаётся.
+    Имён заголовков в обиходе несколько десятков, так что кэш почти всегда попадает;
+    maxsize не даёт клиенту со случайными именами раздуть память.
+    """
+    if name in SPECIAL_ENVIRON_KEYS:
+        return SPECIAL_ENVIRON_KEYS[name]
+    return "HTTP_" + name.upper().replace("-", "_")
+
+
+def _bodyless_status(status: str) -> bool:
+    """Ответы 1xx, 204 и 304 никогда не содержат тела."""
+    return status[0] == "1" or status.startswith(("204", "304"))
 
-        # "\r\n\r\n" перед телом
-        response_lines.append("")
-        response_lines.append("")
 
-        # yield заголовков
-        yield ("\r\n".join(response_lines).encode("iso-8859-1"))
-        # yield тела
-        yield from body_iterator
+def _add_vary(headers_list: list[tuple[str, str]], header: str) -> list[tuple[str, str]]:
+    """Добавляет header в Vary ответа (или сам заголовок Vary)."""
+    for i, (name, value) in enumerate(headers_list):
+        if name.lower() == "vary":
+            tokens = {token.strip().lower() for token in value.split(",")}
+            if header.lower() in tokens or "*" in tokens:
+                return headers_list
+            headers_list = list(headers_list)
+            headers_list[i] = (name, f"{value}, {header}")
+            return headers_list
+    return [*headers_list, ("Vary", header)]
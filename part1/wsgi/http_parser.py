@@ -0,0 +1,189 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from final_tcp_server.socket_io import SocketIO
+
+HEAD_END = b"\r\n\r\n"
+# Конец заголовков - пустая строка с любым из окончаний строк: RFC 9112 (2.2) разрешает
+# принимать одиночный LF вместо CRLF
+HEAD_END_RE = re.compile(rb"\n\r?\n")
+BLANK_LINES = (b"\n\r\n", b"\n\n")
+# Сколько байт за раз просматривает HEAD_END_RE (см. find_head_end)
+HEAD_SCAN_WINDOW = 1024
+# Блок заголовков длиннее этого режется на строки через find(), а не split()
+LONG_HEAD = 4 * 1024
+
+# token из RFC 9110: метод и имя заголовка
+_TOKEN = r"[!#$%&'*+\-.^_`|~0-9A-Za-z]+"
+TOKEN_RE = re.compile(_TOKEN)
+REQUEST_LINE_RE = re.compile(rf"({_TOKEN}) ([^\x00-\x20\x7f]+) (HTTP/\d\.\d)")
+# Управляющие символы, запрещённые в заголовках (TAB разрешён, CR и LF проверяются отдельно).
+# bytes.translate() заменяет их на NUL за один проход по блоку, а поиск NUL - это memchr:
+# в разы быстрее, чем проверять каждый символ регуляркой
+CONTROL_CHARS = bytes([*range(0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+CONTROL_TO_NUL = bytes(0 if byte in CONTROL_CHARS else byte for byte in range(256))
+
+# Заголовки, которые не могут повторяться: разные значения - признак request smuggling
+SINGLETON_HEADERS = frozenset({"host", "content-length"})
+
+
+@dataclass(frozen=True)
+class HTTPLimits:
+    # Максимальная длина строки запроса (метод, URI, версия)
+    max_request_line: int = 8 * 1024
+    # Максимальный размер всего блока заголовков вместе со строкой запроса
+    max_header_size: int = 64 * 1024
+    # Максимальное количество строк заголовков
+    max_headers: int = 100
+
+
+class HTTPParseError(ValueError):
+    """Некорректный запрос."""
+
+    status = "400 Bad Request"
+
+
+class RequestLineTooLongError(HTTPParseError):
+    status = "414 URI Too Long"
+
+
+class HeadersTooLargeError(HTTPParseError):
+    status = "431 Request Header Fields Too Large"
+
+
+class VersionNotSupportedError(HTTPParseError):
+    status = "505 HTTP Version Not Supported"
+
+
+@dataclass
+class RequestHead:
+    method: str
+    target: str
+    protocol: str
+    # Имена приведены к нижнему регистру, повторяющиеся заголовки склеены в одно значение
+    headers: dict[str, str]
+
+
+def find_head_end(buf: bytearray, start: int, stop: int) -> int:
+    """
+    Позиция сразу за пустой строкой в buf[start:stop] или -1.
+    Регулярка проверяет каждый байт, а find(b"\n") - это memchr: заголовки обычной длины
+    просматриваются регуляркой окнами по HEAD_SCAN_WINDOW байт, а остаток длинной строки
+    (Cookie в десятки КиБ) перепрыгивается одним find() до её конца.
+    """
+    while True:
+        window_end = min(stop, start + HEAD_SCAN_WINDOW)
+        match = HEAD_END_RE.search(buf, start, window_end)
+        if match is not None:
+            return match.end()
+        if window_end == stop:
+            return -1
+        # Пустая строка, не поместившаяся в окно, начинается не раньше двух последних его байт
+        start = buf.find(b"\n", window_end - 2, stop)
+        if start == -1:
+            return -1
+
+
+def read_request_head(stream: SocketIO, limits: HTTPLimits) -> RequestHead:
+    """
+    Читает и разбирает блок заголовков запроса.
+    Вместо readline() на каждую строку блок целиком ищется в буфере SocketIO
+    и разбирается за один проход.
+    """
+    # Не пришедшая целиком пустая строка начинается не раньше двух последних байт
+    block = stream.read_until(find_head_end, limits.max_header_size, overlap=2)
+    if block.endswith(HEAD_END):
+        return parse_request_head(block, limits)
+    if block.endswith(BLANK_LINES):
+        # Строки, оканчивающиеся одиночным LF, приводим к CRLF. Одиночный CR
+        # остаётся одиночным, и разбор его отклонит
+        return parse_request_head(block.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n"), limits)
+    if len(block) >= limits.max_header_size:
+        raise HeadersTooLargeError(f"Заголовки больше {limits.max_header_size} байт")
+    raise ConnectionError("Клиент закрыл соединение")
+
+
+def parse_request_head(block: bytes, limits: HTTPLimits) -> RequestHead:
+    """Разбирает блок заголовков, заканчивающийся пустой строкой."""
+    # latin-1 декодирует любые байты, а PEP 3333 ждёт строки именно в latin-1.
+    # Пустые строки перед строкой запроса допускаются (RFC 9112, 2.2)
+    text = block[: -len(HEAD_END) + 2].decode("latin-1").lstrip("\r\n")
+    request_line, _, header_lines = text.partition("\r\n")
+
+    if len(request_line) > limits.max_request_line:
+        raise RequestLineTooLongError(f"Строка запроса длиннее {limits.max_request_line} байт")
+    match = REQUEST_LINE_RE.fullmatch(request_line)
+    if match is None:
+        raise HTTPParseError(f"Некорректная строка запроса: {request_line!r}")
+    method, target, protocol = match.groups()
+    if not protocol.startswith("HTTP/1."):
+        raise VersionNotSupportedError(f"Неподдерживаемая версия протокола: {protocol}")
+
+    headers: dict[str, str] = {}
+    if not header_lines:
+        return RequestHead(method, target, protocol, headers)
+    if b"\0" in block.translate(CONTROL_TO_NUL):
+        raise HTTPParseError("Управляющие символы в заголовках")
+
+    if len(header_lines) <= LONG_HEAD:
+        lines = header_lines[:-2].split("\r\n")
+    else:
+        lines = _split_long_lines(header_lines, limits.max_headers)
+    if len(lines) > limits.max_headers:
+        raise HeadersTooLargeError(f"Больше {limits.max_headers} заголовков")
+
+    name = None
+    for line in lines:
+        # Одиночные CR/LF внутри строки - признак попытки request smuggling
+        if not line or "\r" in line or "\n" in line:
+            raise HTTPParseError(f"Некорректный заголовок: {line!r}")
+        if line[0] in " \t":
+            # obs-fold устарел, но RFC 9112 разрешает заменить его пробелом
+            if name is None:
+                raise HTTPParseError(f"Некорректный заголовок: {line!r}")
+            headers[name] = f"{headers[name]} {line.strip(' \t')}"
+            continue
+
+        raw_name, colon, value = line.partition(":")
+        name = _header_name(raw_name) if colon else None
+        if name is None:
+            raise HTTPParseError(f"Некорректный заголовок: {line!r}")
+        value = value.strip(" \t")
+        if name not in headers:
+            headers[name] = value
+        elif name in SINGLETON_HEADERS:
+            if headers[name] != value:
+                raise HTTPParseError(f"Противоречивые заголовки {name}")
+        else:
+            # Повторяющиеся заголовки склеиваем через запятую (RFC 9110), Cookie - через "; "
+            separator = "; " if name == "cookie" else ", "
+            headers[name] = f"{headers[name]}{separator}{value}"
+
+    return RequestHead(method, target, protocol, headers)
+
+
+def _split_long_lines(header_lines: str, max_headers: int) -> list[str]:
+    """
+    split("\r\n") для большого блока: на 40 КиБ Cookie поиск двухсимвольного разделителя
+    занимает половину времени разбора, а find("\n") проходит ту же строку за один вызов.
+    Строк берём не больше max_headers + 1 - дальше разбор всё равно откажет.
+    """
+    lines = []
+    pos = 0
+    while pos < len(header_lines) and len(lines) <= max_headers:
+        end = header_lines.find("\n", pos)
+        if header_lines[end - 1] != "\r":
+            raise HTTPParseError(f"Некорректный заголовок: {header_lines[pos:end]!r}")
+        lines.append(header_lines[pos : end - 1])
+        pos = end + 1
+    return lines
+
+
+@lru_cache(maxsize=512)
+def _header_name(raw_name: str) -> str | None:
+    """
+    Проверенное имя заголовка в нижнем регистре, None - если имя не token.
+    Клиенты присылают одни и те же имена, поэтому проверку регуляркой кэшируем.
+    """
+    return raw_name.lower() if TOKEN_RE.fullmatch(raw_name) else None
@@ -0,0 +1,44 @@
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+
+# Части заголовка ответа заранее отформатированы строками: на ответ строки только склеиваются
+# и кодируются одним encode(). Склейка готовых bytes-частей в CPython оказалась медленнее
+# Строки статуса для всех известных кодов - на ответ один поиск в словаре вместо форматирования
+STATUS_LINES = {
+    f"{status.value} {status.phrase}": f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+    for status in HTTPStatus
+}
+
+SERVER_HEADER = "Server: python-web-server\r\n"
+CHUNKED_HEADER = "Transfer-Encoding: chunked\r\n"
+CONNECTION_CLOSE_HEADER = "Connection: close\r\n"
+CONNECTION_KEEP_ALIVE_HEADER = "Connection: keep-alive\r\n"
+
+# Момент, до которого заголовок Date актуален, и сам заголовок. Кортеж заменяется
+# одним присваиванием, поэтому потоки могут читать его без блокировки
+_date_cache: tuple[float, str] = (0.0, "")
+
+
+def status_line(status: str) -> str:
+    """Строка статуса ответа вместе с CRLF."""
+    line = STATUS_LINES.get(status)
+    if line is None:
+        # Нестандартная причина или код - форматируем на месте
+        line = f"HTTP/1.1 {status}\r\n"
+    return line
+
+
+def date_header() -> str:
+    """
+    Заголовок Date (RFC 9110, 6.6.1) с точностью до секунды.
+    formatdate() дорогой, поэтому значение пересчитывается не чаще раза в секунду.
+    """
+    global _date_cache
+    now = time.time()
+    expires, header = _date_cache
+    if now >= expires:
+        second = int(now)
+        header = f"Date: {formatdate(second, usegmt=True)}\r\n"
+        _date_cache = (second + 1, header)
+    return header
@@ -0,0 +1,148 @@
+import contextlib
+import tempfile
+
+from final_tcp_server.socket_io import SocketIO
+
+# Максимальная длина строки с размером чанка (вместе с расширениями) и trailer-заголовка
+MAX_CHUNK_LINE_SIZE = 8 * 1024
+# Сколько байт непрочитанного приложением тела сервер готов дочитать ради keep-alive
+MAX_DISCARD_SIZE = 64 * 1024
+# Размер порции при копировании тела
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class RequestBodyError(ValueError):
+    """Некорректное тело запроса или его framing."""
+
+    status = "400 Bad Request"
+
+
+class RequestBodyTooLargeError(RequestBodyError):
+    """Тело запроса больше max_body_size."""
+
+    status = "413 Content Too Large"
+
+
+class BodyReader:
+    """
+    wsgi.input: тело запроса, ограниченное Content-Length.
+    read() без аргумента читает только тело, а не сокет до закрытия соединения,
+    поэтому следующий keep-alive запрос не может быть прочитан как продолжение тела.
+    """
+
+    def __init__(self, stream: SocketIO, content_length: int):
+        self.stream = stream
+        self.remaining = content_length
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if not size:
+            return b""
+        # Тело - часть текущего запроса: парковать соединение посреди него нельзя
+        self.stream.at_boundary = False
+        data = self.stream.read(size)
+        self.remaining = self.remaining - len(data) if data else 0
+        return data
+
+    def readline(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if not size:
+            return b""
+        self.stream.at_boundary = False
+        line = self.stream.readline(size)
+        self.remaining = self.remaining - len(line) if line else 0
+        return line
+
+    def readlines(self, hint: int = -1) -> list[bytes]:
+        lines = []
+        total = 0
+        while line := self.readline():
+            lines.append(line)
+            total += len(line)
+            if 0 < hint <= total:
+                break
+        return lines
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def discard(self, limit: int = MAX_DISCARD_SIZE) -> bool:
+        """
+        Дочитывает и выбрасывает остаток тела, который не прочитало приложение.
+        False - остаток больше limit: дешевле закрыть соединение, чем принимать его целиком.
+        """
+        if self.remaining > limit:
+            return False
+        while self.read(COPY_CHUNK_SIZE):
+            pass
+        return True
+
+
+def read_chunked_body(
+    stream: SocketIO,
+    max_body_size: int | None,
+    spool_threshold: int,
+) -> tuple[tempfile.SpooledTemporaryFile, int]:
+    """
+    Декодирует тело с Transfer-Encoding: chunked целиком до вызова приложения:
+    WSGI-приложениям нужна длина тела, а chunked её заранее не сообщает.
+    Тело до spool_threshold байт остаётся в памяти, большее - уходит во временный файл,
+    поэтому память на запрос ограничена при любом размере загрузки.
+    Возвращает файл, спозиционированный на начало, и длину тела.
+    """
+    # При любой ошибке (в том числе таймауте посреди тела) файл закрывается,
+    # при успехе pop_all() передаёт его вызывающему
+    with contextlib.ExitStack() as cleanup:
+        body = cleanup.enter_context(tempfile.SpooledTemporaryFile(max_size=spool_threshold))
+        size = 0
+        while True:
+            chunk_size = _read_chunk_size(stream)
+            if chunk_size == 0:
+                break
+            size += chunk_size
+            if max_body_size is not None and size > max_body_size:
+                raise RequestBodyTooLargeError(f"Тело запроса больше {max_body_size} байт")
+
+            while chunk_size:
+                data = stream.read(min(chunk_size, COPY_CHUNK_SIZE))
+                if not data:
+                    raise ConnectionError("Клиент закрыл соединение посреди тела запроса")
+                body.write(data)
+                chunk_size -= len(data)
+            if stream.read(2) != b"\r\n":
+                raise RequestBodyError("Отсутствует CRLF после чанка")
+
+        # Trailer-заголовки пропускаем до пустой строки
+        while True:
+            line = _read_chunk_line(stream)
+            if line in (b"\r\n", b"\n"):
+                break
+        cleanup.pop_all()
+
+    body.seek(0)
+    return body, size
+
+
+def _read_chunk_line(stream: SocketIO) -> bytes:
+    line = stream.readline(MAX_CHUNK_LINE_SIZE)
+    if not line:
+        raise ConnectionError("Клиент закрыл соединение посреди тела запроса")
+    if not line.endswith(b"\n"):
+        raise RequestBodyError("Слишком длинная строка в chunked-теле")
+    return line
+
+
+def _read_chunk_size(stream: SocketIO) -> int:
+    size_line = _read_chunk_line(stream).split(b";", 1)[0].strip()
+    # int() допускает знак, пробелы и "_" - для размера чанка разрешены только hex-цифры
+    if not size_line or size_line.strip(b"0123456789abcdefABCDEF"):
+        raise RequestBodyError(f"Некорректный размер чанка: {size_line!r}")
+    return int(size_line, 16)
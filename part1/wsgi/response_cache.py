@@ -0,0 +1,254 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+from .conditional import NOT_MODIFIED_HEADERS
+from .http_response import SERVER_HEADER, status_line
+
+# Коды, ответы с которыми кэшируются (RFC 9111, 3 и RFC 9110, 15.1 - "heuristically cacheable");
+# кэшируем их только при явном сроке свежести от приложения
+CACHEABLE_STATUSES = frozenset({200, 203, 300, 301, 308, 404, 410})
+# Заголовки ответа, которые не сохраняются: Date и framing выставляются при каждой отдаче,
+# hop-by-hop заголовки относятся к конкретному соединению
+SKIPPED_HEADERS = frozenset(
+    {"date", "content-length", "transfer-encoding", "connection", "keep-alive"}
+)
+
+
+@dataclass
+class CachedResponse:
+    status: str
+    # Строка статуса и заголовки вместе с Content-Length - без Date, Age и Connection
+    head: bytes
+    body: bytes
+    stored: float
+    expires: float
+    # Валидаторы и готовый заголовок ответа 304 на условный запрос
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified_head: bytes = b""
+
+    @property
+    def size(self) -> int:
+        return len(self.head) + len(self.body)
+
+
+@dataclass
+class _Variants:
+    """Закэшированные варианты ответа на один URL, различающиеся заголовками из Vary."""
+
+    # Имена заголовков запроса из Vary (в нижнем регистре)
+    vary: tuple[str, ...]
+    responses: dict[tuple[str, ...], CachedResponse] = field(default_factory=dict)
+    size: int = 0
+
+
+class ResponseCache:
+    """
+    Кэш ответов на GET-запросы внутри сервера.
+    Ключ - Host, путь с query и значения заголовков запроса из Vary ответа.
+    HEAD-запросы обслуживаются закэшированным ответом на GET.
+    Сохраняются только ответы с явным сроком свежести (Cache-Control: max-age/s-maxage
+    или Expires) и без no-store/private/no-cache/Set-Cookie.
+    Ответ хранится уже сериализованным: при попадании приложение не вызывается, а заголовки
+    и тело уходят в сокет как есть - к ним дописываются только Date, Age и Connection.
+    Вытеснение - LRU по суммарному размеру в байтах.
+    """
+
+    def __init__(self, max_size: int = 32 * 1024 * 1024, max_entry_size: int = 1024 * 1024):
+        self.max_size = max_size
+        # Большие ответы не кэшируем: один такой ответ вытеснил бы много маленьких
+        self.max_entry_size = min(max_entry_size, max_size)
+        self.entries: OrderedDict[tuple[str, str], _Variants] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # В режиме threads кэш общий для всех воркеров
+        self.lock = threading.Lock()
+
+    def lookup(self, method: str, target: str, headers: dict[str, str]) -> CachedResponse | None:
+        """Свежий закэшированный ответ на запрос или None."""
+        if method == "HEAD":
+            method = "GET"
+        if not self._request_cacheable(method, headers):
+            return None
+        # Клиент просит ответ от приложения, а не из кэша
+        directives = _directives(headers.get("cache-control", ""))
+        if (
+            "no-cache" in directives
+            or "no-store" in directives
+            or directives.get("max-age") == "0"
+            or "no-cache" in headers.get("pragma", "")
+        ):
+            return None
+
+        key = (headers.get("host", ""), target)
+        now = time.time()
+        with self.lock:
+            variants = self.entries.get(key)
+            response = None
+            if variants is not None:
+                vary_values = tuple(headers.get(name, "") for name in variants.vary)
+                response = variants.responses.get(vary_values)
+                if response is not None and response.expires <= now:
+                    # Устаревший вариант удаляем сразу, не дожидаясь вытеснения
+                    del variants.responses[vary_values]
+                    variants.size -= response.size
+                    self.size -= response.size
+                    response = None
+                if response is not None:
+                    self.entries.move_to_end(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def freshness(
+        self, method: str, headers: dict[str, str], status: str, headers_list: list[tuple[str, str]]
+    ) -> float | None:
+        """Сколько секунд ответ можно отдавать из кэша, None - ответ не кэшируется."""
+        if not self._request_cacheable(method, headers):
+            return None
+        if "no-store" in _directives(headers.get("cache-control", "")):
+            return None
+        code = status[:3]
+        if not code.isdigit() or int(code) not in CACHEABLE_STATUSES:
+            return None
+
+        cache_control = expires = vary = None
+        for name, value in headers_list:
+            name = name.lower()
+            if name == "cache-control":
+                cache_control = value if cache_control is None else f"{cache_control}, {value}"
+            elif name == "expires":
+                expires = value
+            elif name == "vary":
+                vary = value
+            elif name == "set-cookie":
+                # Ответ с cookie персональный - отдать его другому клиенту нельзя
+                return None
+        if vary is not None and "*" in vary:
+            return None
+
+        directives = _directives(cache_control or "")
+        if directives.keys() & {"no-store", "no-cache", "private"}:
+            return None
+        # s-maxage адресован именно общим кэшам и важнее max-age (RFC 9111, 5.2.2.10)
+        for name in ("s-maxage", "max-age"):
+            if name in directives:
+                value = directives[name]
+                return int(value) if value.isdigit() and int(value) > 0 else None
+        if expires is not None:
+            try:
+                ttl = parsedate_to_datetime(expires).timestamp() - time.time()
+            except (TypeError, ValueError):
+                # Некорректный Expires означает "уже устарел" (RFC 9111, 5.3)
+                return None
+            return ttl if ttl > 0 else None
+        return None
+
+    def store(
+        self,
+        target: str,
+        headers: dict[str, str],
+        status: str,
+        headers_list: list[tuple[str, str]],
+        body: bytes,
+        ttl: float,
+    ):
+        """Сохраняет ответ, сериализуя его заголовки, и вытесняет давно не запрошенные URL."""
+        lines = [status_line(status)]
+        not_modified_lines = [status_line("304 Not Modified")]
+        vary: tuple[str, ...] = ()
+        etag = last_modified = None
+        server_is_set = False
+        for name, value in headers_list:
+            lower_name = name.lower()
+            if lower_name in SKIPPED_HEADERS:
+                continue
+            if lower_name == "vary":
+                vary += tuple(token.strip().lower() for token in value.split(",") if token.strip())
+            elif lower_name == "etag":
+                etag = value
+            elif lower_name == "last-modified":
+                last_modified = value
+            elif lower_name == "server":
+                server_is_set = True
+            line = f"{name}: {value}\r\n"
+            lines.append(line)
+            if lower_name in NOT_MODIFIED_HEADERS:
+                not_modified_lines.append(line)
+        if not server_is_set:
+            lines.append(SERVER_HEADER)
+            not_modified_lines.append(SERVER_HEADER)
+        lines.append(f"Content-Length: {len(body)}\r\n")
+        if not status.startswith("200"):
+            # На условный запрос 304 отвечают только вместо успешного ответа
+            etag = last_modified = None
+
+        now = time.time()
+        response = CachedResponse(
+            status,
+            "".join(lines).encode("latin-1"),
+            body,
+            now,
+            now + ttl,
+            etag,
+            last_modified,
+            "".join(not_modified_lines).encode("latin-1"),
+        )
+        if response.size > self.max_entry_size:
+            return
+
+        key = (headers.get("host", ""), target)
+        vary_values = tuple(headers.get(name, "") for name in vary)
+        with self.lock:
+            variants = self.entries.get(key)
+            if variants is None or variants.vary != vary:
+                # Vary изменился - старые варианты по новому ключу уже не найти
+                if variants is not None:
+                    self.size -= variants.size
+                variants = self.entries[key] = _Variants(vary)
+            old = variants.responses.get(vary_values)
+            if old is not None:
+                variants.size -= old.size
+                self.size -= old.size
+            variants.responses[vary_values] = response
+            variants.size += response.size
+            self.size += response.size
+            self.entries.move_to_end(key)
+
+            while self.size > self.max_size:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += len(evicted.responses)
+
+    def stats(self) -> dict[str, int]:
+        """Счётчики кэша: попадания, промахи, вытеснения, число URL и занятые байты."""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size": self.size,
+            }
+
+    def _request_cacheable(self, method: str, headers: dict[str, str]) -> bool:
+        # Ответ на запрос с авторизацией может быть персональным
+        return method == "GET" and "authorization" not in headers
+
+
+def _directives(cache_control: str) -> dict[str, str]:
+    """Директивы Cache-Control: {"max-age": "60", "public": ""}."""
+    directives = {}
+    for directive in cache_control.split(","):
+        name, _, value = directive.partition("=")
+        name = name.strip().lower()
+        if name:
+            directives[name] = value.strip().strip('"')
+    return directives
@@ -1,8 +1,64 @@
+from final_tcp_server.listeners import is_tcp
+from final_tcp_server.prefork import PreforkTCPServer
 from final_tcp_server.server import TCPServer
 
 from .handler import WSGIHandler
 
+
+def make_handler(
+    app,
+    host,
+    port,
+    write_coalesce_threshold=64 * 1024,
+    max_body_size=16 * 1024 * 1024,
+    body_spool_threshold=1024 * 1024,
+    http_limits=None,
+    pipeline_depth=16,
+    max_requests_per_connection=1000,
+    response_cache=None,
+    etag_max_size=0,
+    compression=None,
+    metrics=None,
+    metrics_path="/metrics",
+    tracer=None,
+    **server_options,
+):
+    """
+    WSGIHandler для WSGIServer и PreforkWSGIServer: параметры обработчика разбираются здесь,
+    остальные возвращаются как параметры TCP-сервера. metrics нужен обоим.
+    """
+    handler = WSGIHandler(
+        app=app,
+        host=host,
+        port=port,
+        write_coalesce_threshold=write_coalesce_threshold,
+        max_body_size=max_body_size,
+        body_spool_threshold=body_spool_threshold,
+        limits=http_limits,
+        pipeline_depth=pipeline_depth,
+        max_requests_per_connection=max_requests_per_connection,
+        response_cache=response_cache,
+        etag_max_size=etag_max_size,
+        compression=compression,
+        metrics=metrics,
+        metrics_path=metrics_path,
+        tracer=tracer,
+    )
+    return handler, {"metrics": metrics, **server_options}
+
+
+def attach_handler(server, handler):
+    """Передаёт обработчику то, что известно только после создания сервера."""
+    handler.multithread = server.dispatcher.multithread
+    # При port=0 порт выбирает ядро: в SERVER_PORT - порт, на котором сервер слушает.
+    # У unix-сокета порта нет, там остаётся переданный port
+    if is_tcp(server.server_socket):
+        handler.base_environ["SERVER_PORT"] = str(server.server_socket.getsockname()[1])
+
+
 class WSGIServer(TCPServer):
+    """WSGI-сервер; параметры обработчика - см. make_handler, остальные - TCPServer."""
+
     def __init__(
         self,
         host,
@@ -11,13 +67,26 @@ class WSGIServer(TCPServer):
         poll_interval=0.5,
         client_idle_timeout=5,
         shutdown_timeout=10,
+        **kwargs,
     ):
-        handler = WSGIHandler(app, host, port)
+        handler, server_options = make_handler(app, host, port, **kwargs)
         super().__init__(
-	        host,
-	        port,
-	        handler,
-	        poll_interval,
-	        client_idle_timeout,
-	        shutdown_timeout,
-	    )
\ No newline at end of file
+            host,
+            port,
+            handler,
+            poll_interval,
+            client_idle_timeout,
+            shutdown_timeout,
+            **server_options,
+        )
+        attach_handler(self, handler)
+
+
+class PreforkWSGIServer(PreforkTCPServer):
+    """Pre-fork WSGI-сервер; параметры обработчика - см. make_handler."""
+
+    def __init__(self, host, port, app, processes=4, **kwargs):
+        handler, server_options = make_handler(app, host, port, **kwargs)
+        super().__init__(host, port, handler, processes, **server_options)
+        attach_handler(self, handler)
+        handler.multiprocess = True
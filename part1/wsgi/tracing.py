@@ -0,0 +1,117 @@
+import cProfile
+import io
+import itertools
+import logging
+import pstats
+import threading
+from dataclasses import dataclass
+from logging.handlers import RotatingFileHandler
+
+# cProfile в процессе может быть включён только один (в Python 3.12 он занимает
+# инструмент sys.monitoring): enable() второго бросает ValueError. Параллельные
+# запросы из выборки не ждут блокировку, а выполняются без профиля
+_profiling = threading.Lock()
+
+
+@dataclass
+class RequestTrace:
+    """Границы фаз одного запроса - отметки time.perf_counter()."""
+
+    request_line: str
+    status: str
+    peer: str
+    # Первый байт запроса получен
+    started: float
+    # Заголовки разобраны, тело подготовлено для wsgi.input
+    parsed: float
+    # Приложение вернуло ответ (или ответ найден в кэше)
+    app_done: float
+    # Ответ отправлен (или придержан для pipelined-пачки)
+    written: float
+    # Сколько из этого времени поток ждал данных клиента в poll()
+    recv_wait: float
+    cached: bool
+
+
+class RequestTracer:
+    """
+    Трассировка медленных запросов: для каждого запроса сервер отмечает границы фаз
+    (получение, разбор, приложение, отправка), и запросы дольше threshold секунд
+    записываются в файл с ротацией.
+    Каждый profile_every-й вызов приложения выполняется под cProfile (0 - без профилирования):
+    профиль попадает в файл вместе с фазами, если запрос оказался медленным. Профилировщик
+    замедляет приложение в разы, выборка 1 из N позволяет держать трассировку включённой
+    в проде. Тело-генератор приложения выполняется уже при отправке и в профиль не попадает.
+    В pre-fork режиме ротация не синхронизирована между воркерами - каждому нужен свой файл.
+    """
+
+    def __init__(
+        self,
+        path: str = "slow_requests.log",
+        threshold: float = 1.0,
+        profile_every: int = 0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 3,
+        profile_limit: int = 30,
+    ):
+        self.threshold = threshold
+        self.profile_every = profile_every
+        # Сколько строк профиля (по cumulative time) записывать
+        self.profile_limit = profile_limit
+        # next() у itertools.count атомарен под GIL - номер вызова без блокировки
+        self.app_calls = itertools.count(1)
+        self.slow_requests = 0
+        self.file_handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+        )
+        self.file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+
+    def start_profile(self) -> cProfile.Profile | None:
+        """
+        Включает профилировщик в текущем потоке, если этот вызов приложения попал в выборку
+        и в процессе не работает другой профиль. Выключать - через stop_profile().
+        """
+        if not self.profile_every or next(self.app_calls) % self.profile_every:
+            return None
+        if not _profiling.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Профилировщик включён вне сервера (например, python -m cProfile)
+            _profiling.release()
+            logging.debug("Python: профилирование пропущено - активен другой профилировщик")
+            return None
+        return profiler
+
+    def stop_profile(self, profiler: cProfile.Profile):
+        profiler.disable()
+        _profiling.release()
+
+    def dump(self, trace: RequestTrace, profiler: cProfile.Profile | None = None):
+        """Записывает медленный запрос: фазы и профиль приложения."""
+        self.slow_requests += 1
+        total = trace.written - trace.started
+        lines = [
+            f"Python: медленный запрос {total:.3f} с: {trace.request_line} -> {trace.status} "
+            f"(клиент {trace.peer}{', из кэша' if trace.cached else ''})",
+            "  первый байт        +0.000000 с",
+            f"  разобран           +{trace.parsed - trace.started:.6f} с",
+            f"  ответ приложения   +{trace.app_done - trace.started:.6f} с",
+            f"  отправлен          +{trace.written - trace.started:.6f} с",
+            f"  ожидание recv()     {trace.recv_wait:.6f} с",
+        ]
+        if profiler is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.profile_limit)
+            lines.append(stream.getvalue().rstrip())
+        self.file_handler.handle(
+            logging.makeLogRecord(
+                {"msg": "\n".join(lines), "levelno": logging.WARNING, "levelname": "WARNING"}
+            )
+        )
+
+    def close(self):
+        self.file_handler.close()